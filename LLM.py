@@ -3,23 +3,12 @@
 # from botocore.exceptions import ClientError
 # os.environ['AWS_PROFILE'] = "mohamed"
 
-from langchain_aws import ChatBedrockConverse
-from langchain_core.messages import HumanMessage
-import json
+from aws_clients import get_llm
 from botocore.exceptions import ClientError
-import os
-from dotenv import load_dotenv
-load_dotenv(override=True)
 
 try:
-    # Initialize ChatBedrockConverse
-    llm = ChatBedrockConverse(
-        model="mistral.mistral-7b-instruct-v0:2",
-        temperature=0.7,
-        region_name='eu-west-3',
-        ACCESS_KEY_ID=os.getenv("ACCESS_KEY_ID"),
-        SECRET_ACCESS_KEY=os.getenv("SECRET_ACCESS_KEY")
-    )
+    # Shared ChatBedrockConverse on the pooled bedrock-runtime client
+    llm = get_llm()
 
     # # Create message
     # messages = [
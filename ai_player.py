@@ -0,0 +1,165 @@
+import re
+
+import numpy as np
+
+from ann_index import recall_at_k
+from embedding_store import COMMON_WORD_PATTERN
+
+CANDIDATE_SEPARATORS = re.compile(r"[\n,;]+")
+CANDIDATE_PREFIX = re.compile(r"^[\s\d.):*\u2022-]+")
+CANDIDATE_WORD = re.compile(r"^[a-z][a-z0-9'-]*$")
+
+
+def message_text(content):
+    """Text of a chat message's content, which is a str or a list of content blocks"""
+    if isinstance(content, str):
+        return content
+    return "".join(block.get("text", "") if isinstance(block, dict) else str(block) for block in content)
+
+
+def stream_candidates(chunks):
+    """Yield candidate words from a streamed answer as soon as each list entry is complete.
+
+    chunks are message chunks (or strings). An entry is complete once a
+    separator arrives after it; the last one when the stream ends.
+    """
+    buffer = ""
+    for chunk in chunks:
+        buffer += message_text(getattr(chunk, "content", chunk))
+        *entries, buffer = CANDIDATE_SEPARATORS.split(buffer)
+        for entry in entries:
+            yield from parse_candidates(entry)
+    yield from parse_candidates(buffer)
+
+
+def parse_candidates(text):
+    """Words from an LLM's list answer, in order, without numbering, bullets or duplicates.
+
+    Entries that are not a single word are dropped.
+    """
+    words = []
+    for item in CANDIDATE_SEPARATORS.split(text.lower()):
+        item = CANDIDATE_PREFIX.sub("", item).strip(" .!?\"'`")
+        if CANDIDATE_WORD.match(item) and item not in words:
+            words.append(item)
+    return words
+
+
+class EmbeddingAIPlayer:
+    """AI opponent that reasons directly over the embedding space.
+
+    The similarities of previous guesses are the only feedback it uses (the
+    same information the LLM prompt gets). Each turn it combines the vectors of
+    the best-scoring guesses, weighting better guesses exponentially more, and
+    plays the nearest unused word to that point. Candidates are limited to the
+    `vocab_limit` most frequent plain lowercase words, since GloVe is ordered
+    by frequency and the game expects common English words.
+
+    With an IVF index over `candidate_vectors` (see attach_index), the nearest
+    words are searched in a few cells instead of scanning every candidate;
+    the exact scan remains the fallback.
+    """
+
+    def __init__(self, normed_vectors, key_to_index, index_to_key, vocab_limit=50000, top_guesses=10,
+                 temperature=0.05, opening_words=2000, seed=None):
+        limit = min(vocab_limit, len(normed_vectors))
+        candidates = [i for i in range(limit) if COMMON_WORD_PATTERN.match(index_to_key[i])]
+        self.candidate_indices = np.array(candidates, dtype=np.int64)
+        self.candidate_words = [index_to_key[i] for i in candidates]
+        self.candidate_vectors = np.ascontiguousarray(normed_vectors[self.candidate_indices], dtype=np.float32)
+        self.top_guesses = top_guesses
+        self.temperature = temperature
+        self.opening_words = min(opening_words, len(candidates))
+        self.rng = np.random.default_rng(seed)
+        self.normed_vectors = normed_vectors
+        self.key_to_index = key_to_index
+        self.index = None
+
+    def sample_queries(self, count=50, blend=3, seed=0):
+        """Query vectors like query_vector's: normalized blends of a few random candidates"""
+        rng = np.random.default_rng(seed)
+        rows = self.candidate_vectors[rng.integers(len(self.candidate_vectors), size=(count, blend))].sum(axis=1)
+        return rows / np.linalg.norm(rows, axis=1, keepdims=True)
+
+    def attach_index(self, index, min_recall=0.9, k=10):
+        """Search with index from now on, at the smallest nprobe whose recall@k reaches min_recall.
+
+        index must be built over candidate_vectors. nprobe is doubled from the
+        index's own up to a quarter of its cells; past that a search saves
+        little over the scan, so the scan is kept. Returns the last recall measured.
+        """
+        queries = self.sample_queries()
+        nprobe = index.nprobe
+        while True:
+            recall = recall_at_k(index, queries, k=k, nprobe=nprobe)
+            if recall >= min_recall:
+                index.nprobe = nprobe
+                self.index = index
+                return recall
+            if nprobe * 2 > index.nlist // 4:
+                self.index = None
+                return recall
+            nprobe *= 2
+
+    def query_vector(self, guesses):
+        """Weighted combination of the best guesses' vectors, or None without usable guesses.
+
+        guesses is a list of (word, rank, similarity) tuples.
+        """
+        known = []
+        for guess in guesses:
+            index = self.key_to_index.get(guess[0])
+            if index is not None:
+                known.append((guess[2], index))
+        if not known:
+            return None
+        best = sorted(known, reverse=True)[:self.top_guesses]
+        similarities = np.array([similarity for similarity, _ in best], dtype=np.float32)
+        weights = np.exp((similarities - similarities.max()) / self.temperature)
+        vectors = np.asarray(self.normed_vectors[[index for _, index in best]], dtype=np.float32)
+        query = weights @ vectors
+        norm = np.linalg.norm(query)
+        return query / norm if norm else None
+
+    def rank_candidates(self, guesses, words):
+        """Order vocabulary words by similarity to the query vector, best first.
+
+        All candidates are scored in one matrix-vector product. Without usable
+        guesses the order is left as given.
+        """
+        query = self.query_vector(guesses)
+        if query is None or not words:
+            return list(words)
+        vectors = np.asarray(self.normed_vectors[[self.key_to_index[word] for word in words]], dtype=np.float32)
+        return [words[i] for i in np.argsort(-(vectors @ query), kind="stable")]
+
+    def choose(self, guesses, used_words):
+        """Return the next guess: the nearest unused candidate to the query vector"""
+        query = self.query_vector(guesses)
+        if query is None:
+            # Nothing to go on yet: open with a random frequent word
+            for position in self.rng.permutation(self.opening_words):
+                word = self.candidate_words[position]
+                if word not in used_words:
+                    return word
+            return None
+
+        if self.index is not None:
+            # Enough neighbours to skip every used word; the probed cells may still run out
+            positions, _ = self.index.search(query, k=len(used_words) + 1)
+            word = self._first_unused(positions, used_words)
+            if word is not None:
+                return word
+
+        scores = self.candidate_vectors @ query
+        # Enough candidates to skip every used word and still have one left
+        k = min(len(scores), len(used_words) + 1)
+        top = np.argpartition(-scores, k - 1)[:k]
+        return self._first_unused(top[np.argsort(-scores[top])], used_words)
+
+    def _first_unused(self, positions, used_words):
+        for position in positions:
+            word = self.candidate_words[position]
+            if word not in used_words:
+                return word
+        return None
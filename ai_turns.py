@@ -0,0 +1,51 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class AITurnRunner:
+    """Runs AI turns on a background thread pool.
+
+    /api/guess submits the AI's turn here and returns the human's result
+    straight away; the turn's outcome is written to the session's game state,
+    where the poll and stream endpoints pick it up. Futures are tracked per
+    (session, turn) so an endpoint served by the same worker can wait on the
+    job directly instead of polling the store.
+    """
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or int(os.getenv("AI_TURN_WORKERS", 4))
+        self._executor = None
+        self._executor_pid = None
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        # A pool created before a gunicorn fork has no threads in the child
+        if self._executor is None or self._executor_pid != os.getpid():
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="ai-turn")
+            self._executor_pid = os.getpid()
+            self._futures = {}
+        return self._executor
+
+    def submit(self, session_id, turn_id, fn, *args):
+        with self._lock:
+            future = self._get_executor().submit(fn, *args)
+            key = (session_id, turn_id)
+            self._futures[key] = future
+        future.add_done_callback(lambda _: self._forget(key, future))
+        return future
+
+    def _forget(self, key, future):
+        with self._lock:
+            if self._futures.get(key) is future:
+                del self._futures[key]
+
+    def get(self, session_id, turn_id):
+        """Return the running future for this turn if it was submitted by this process"""
+        with self._lock:
+            return self._futures.get((session_id, turn_id))
+
+    def pending(self):
+        with self._lock:
+            return len(self._futures)
@@ -0,0 +1,160 @@
+import os
+
+import numpy as np
+
+from rank_engine import model_fingerprint
+
+ASSIGN_CHUNK_SIZE = 8192
+
+
+def _normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _assign(vectors, centroids):
+    """Index of the most similar centroid for every row, computed in chunks to bound memory"""
+    assignment = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), ASSIGN_CHUNK_SIZE):
+        chunk = np.asarray(vectors[start:start + ASSIGN_CHUNK_SIZE], dtype=np.float32)
+        assignment[start:start + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+    return assignment
+
+
+class IVFIndex:
+    """Inverted-file approximate nearest-neighbour index over unit-normalized vectors.
+
+    Build runs spherical k-means to split the vocabulary into `nlist` cells and
+    stores each cell's member indices contiguously. A search scores the query
+    against the centroids, then only against the members of the `nprobe` best
+    cells, instead of the whole vocabulary. The index stores ids only; vectors
+    are read from the matrix it was built over.
+    """
+
+    def __init__(self, normed_vectors, centroids, list_offsets, list_indices, nprobe=8):
+        self.normed_vectors = normed_vectors
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+        self.list_indices = list_indices
+        self.nprobe = nprobe
+
+    @property
+    def nlist(self):
+        return len(self.centroids)
+
+    @classmethod
+    def build(cls, normed_vectors, nlist=None, iterations=10, sample_size=100000, nprobe=8, seed=0):
+        count = len(normed_vectors)
+        if nlist is None:
+            nlist = max(1, int(2 * np.sqrt(count)))
+        nlist = min(nlist, count)
+        rng = np.random.default_rng(seed)
+
+        # Train centroids on a sample; every row is assigned once at the end
+        sample_ids = np.sort(rng.choice(count, size=min(sample_size, count), replace=False))
+        sample = np.asarray(normed_vectors[sample_ids], dtype=np.float32)
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = _assign(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            sizes = np.bincount(assignment, minlength=nlist)
+            empty = sizes == 0
+            if empty.any():
+                # Re-seed empty cells with random sample rows
+                sums[empty] = sample[rng.choice(len(sample), size=int(empty.sum()), replace=False)]
+            centroids = _normalize_rows(sums).astype(np.float32)
+
+        assignment = _assign(normed_vectors, centroids)
+        list_indices = np.argsort(assignment, kind="stable").astype(np.int32)
+        list_offsets = np.zeros(nlist + 1, dtype=np.int64)
+        list_offsets[1:] = np.cumsum(np.bincount(assignment, minlength=nlist))
+        return cls(normed_vectors, centroids, list_offsets, list_indices, nprobe=nprobe)
+
+    def candidates(self, query, nprobe=None):
+        """Vocabulary indices in the nprobe cells closest to query"""
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+        centroid_scores = self.centroids @ query
+        probe = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+        return np.concatenate([
+            self.list_indices[self.list_offsets[cell]:self.list_offsets[cell + 1]] for cell in probe
+        ])
+
+    def search(self, query, k=10, nprobe=None, exclude=None):
+        """Approximate top-k most similar rows to a unit-normalized query.
+
+        Returns (indices, similarities) sorted by decreasing similarity.
+        exclude is an optional collection of vocabulary indices to skip.
+        """
+        query = np.asarray(query, dtype=np.float32)
+        candidate_ids = self.candidates(query, nprobe)
+        if exclude:
+            candidate_ids = candidate_ids[~np.isin(candidate_ids, np.fromiter(exclude, dtype=np.int64))]
+        if len(candidate_ids) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        scores = np.asarray(self.normed_vectors[candidate_ids], dtype=np.float32) @ query
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return candidate_ids[top].astype(np.int64), scores[top]
+
+    def most_similar(self, word, key_to_index, index_to_key, topn=10, nprobe=None):
+        """Approximate equivalent of KeyedVectors.most_similar for a single word"""
+        word_index = key_to_index[word]
+        indices, scores = self.search(self.normed_vectors[word_index], k=topn, nprobe=nprobe, exclude={word_index})
+        return [(index_to_key[i], float(score)) for i, score in zip(indices.tolist(), scores.tolist())]
+
+    def save(self, path):
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(
+            tmp_path,
+            centroids=self.centroids,
+            list_offsets=self.list_offsets,
+            list_indices=self.list_indices,
+            nprobe=np.array(self.nprobe),
+            fingerprint=np.array(model_fingerprint(self.normed_vectors)),
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, normed_vectors):
+        """Load an index saved for normed_vectors; raises ValueError if it was built over other vectors"""
+        with np.load(path) as data:
+            if str(data["fingerprint"]) != model_fingerprint(normed_vectors):
+                raise ValueError(f"ANN index {path} was built for different vectors")
+            return cls(
+                normed_vectors,
+                data["centroids"],
+                data["list_offsets"],
+                data["list_indices"],
+                nprobe=int(data["nprobe"]),
+            )
+
+
+def recall_at_k(index, queries, k=10, nprobe=None):
+    """Share of each query's exact top-k rows that index.search also returns, averaged over queries"""
+    vectors = np.asarray(index.normed_vectors, dtype=np.float32)
+    hits = 0
+    for query in queries:
+        scores = vectors @ query
+        exact = np.argpartition(-scores, k - 1)[:k]
+        found, _ = index.search(query, k=k, nprobe=nprobe)
+        hits += len(np.intersect1d(exact, found))
+    return hits / (k * len(queries))
+
+
+def open_or_build_index(path, normed_vectors, **build_kwargs):
+    """Load the index at path, rebuilding and saving it if missing or stale"""
+    if os.path.exists(path):
+        try:
+            return IVFIndex.load(path, normed_vectors)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Rebuilding ANN index {path}: {e}")
+    index = IVFIndex.build(normed_vectors, **build_kwargs)
+    try:
+        index.save(path)
+    except OSError as e:
+        print(f"Could not save ANN index {path}: {e}")
+    return index
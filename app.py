@@ -1,269 +1,234 @@
-from flask import Flask, jsonify, request, render_template
+from flask import Flask, jsonify, request, render_template, Response, stream_with_context, g
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
-from datetime import datetime
-import random
+from datetime import date, datetime
 import numpy as np
-from gensim.models import KeyedVectors
-from langchain.schema import HumanMessage
-from langchain_aws import ChatBedrockConverse
+import atexit
 import json
-from botocore.exceptions import ClientError
 import os
 from dotenv import load_dotenv
-import boto3
 import uuid
-import bcrypt
-from datetime import datetime
 import time
-from boto3.dynamodb.conditions import Key, Attr
+from types import SimpleNamespace
+from rank_engine import RankEngine
+from binary_similarity import BinaryRankEngine
+from embedding_store import open_or_build
+from session_store import create_session_store
+from ai_turns import AITurnRunner
+from leaderboard import Leaderboard
+from aws_clients import get_dynamodb, get_llm
+from history_queue import HistoryQueue
+from llm_cache import create_llm_cache
+from ann_index import open_or_build_index
+from ai_player import EmbeddingAIPlayer, message_text, parse_candidates, stream_candidates
+from scorer import SimilarityScorer
+from similarity import TipsService
+from concurrent.futures import wait as wait_for_futures
+from contextlib import closing
+from warmup import Lazy, Warmup
+from metrics import REGISTRY, counter, gauge, histogram, log_event
 load_dotenv(override=True)
 
-# Set AWS credentials as environment variables
-os.environ['AWS_ACCESS_KEY_ID'] = os.getenv("ACCESS_KEY_ID")
-os.environ['AWS_SECRET_ACCESS_KEY'] = os.getenv("SECRET_ACCESS_KEY")
-
 app = Flask(__name__, static_folder="static")
 CORS(app)
 
-# Initialize DynamoDB
-dynamodb = boto3.resource('dynamodb',
-    region_name='eu-west-3',
-    aws_access_key_id=os.getenv("ACCESS_KEY_ID"),
-    aws_secret_access_key=os.getenv("SECRET_ACCESS_KEY")
+# Latency histograms, exposed per worker at /metrics in the Prometheus format
+HTTP_REQUEST_SECONDS = histogram(
+    'contexto_http_request_seconds', 'Time to build each response (streamed bodies excluded)',
+    ['route', 'method', 'status']
+)
+SIMILARITY_SECONDS = histogram('contexto_similarity_seconds', 'Rank and similarity lookups', ['kind'])
+LLM_CALL_SECONDS = histogram(
+    'contexto_llm_call_seconds', 'Each LLM request, until its answer is read or abandoned', ['mode']
 )
+AI_TURN_SECONDS = histogram('contexto_ai_turn_seconds', 'Background AI turns', ['strategy'])
+JSON_SECONDS = histogram('contexto_json_serialize_seconds', 'Serializing JSON response bodies')
+# Event counts, on the same endpoint
+GUESSES = counter('contexto_guesses_total', 'Human guesses, by outcome', ['outcome'])
+AI_TURN_ERRORS = counter('contexto_ai_turn_errors_total', 'Background AI turns that failed to pick a word', ['strategy'])
 
+class TimedJSONProvider(DefaultJSONProvider):
+    def dumps(self, obj, **kwargs):
+        with JSON_SECONDS.time():
+            return super().dumps(obj, **kwargs)
 
-# Game history functions
-def save_game_history(user_id, target_word, guesses_count, final_rank, time_taken, completed=True):
-    try:
-        table = dynamodb.Table('ContextoGameHistory')
-        timestamp = int(time.time())
-        
-        game_item = {
-            'game_id': str(uuid.uuid4()),
-            'user_id': user_id,
-            'target_word': target_word,
-            'guesses_count': guesses_count,
-            'final_rank': final_rank,
-            'played_at': timestamp,
-            'completed': completed,
-            'time_taken': time_taken
-        }
-        
-        table.put_item(Item=game_item)
-        return True, "Game history saved successfully"
-        
-    except Exception as e:
-        print(f"Error saving game history: {e}")
-        return False, str(e)
+app.json = TimedJSONProvider(app)
 
-def get_user_game_history(user_id, limit=10):
-    try:
-        table = dynamodb.Table('ContextoGameHistory')
-        
-        # Use scan with filter expression as a temporary solution
-        response = table.scan(
-            FilterExpression=Attr('user_id').eq(user_id),
-            Limit=limit
-        )
-        
-        # Sort the results by played_at in descending order
-        items = sorted(response['Items'], key=lambda x: x.get('played_at', 0), reverse=True)
-        
-        return True, items[:limit]
-        
-    except Exception as e:
-        print(f"Error retrieving game history: {e}")
-        return False, str(e)
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
 
-def get_user_stats(user_id):
-    try:
-        table = dynamodb.Table('ContextoGameHistory')
-        
-        # Use scan with filter expression
-        response = table.scan(
-            FilterExpression=Attr('user_id').eq(user_id)
-        )
-        
-        games = response['Items']
-        
-        # Calculate statistics
-        total_games = len(games)
-        if total_games == 0:
-            return True, {
-                'total_games': 0,
-                'completed_games': 0,
-                'completion_rate': 0,
-                'best_rank': None,
-                'average_guesses': 0
-            }
-            
-        completed_games = len([g for g in games if g.get('completed', False)])
-        ranks = [g.get('final_rank', float('inf')) for g in games if g.get('final_rank') is not None]
-        best_rank = min(ranks) if ranks else None
-        guesses = [g.get('guesses_count', 0) for g in games]
-        average_guesses = sum(guesses) / len(guesses) if guesses else 0
-        
-        stats = {
-            'total_games': total_games,
-            'completed_games': completed_games,
-            'completion_rate': (completed_games / total_games * 100) if total_games > 0 else 0,
-            'best_rank': best_rank,
-            'average_guesses': round(average_guesses, 1)
-        }
-        
-        return True, stats
-        
-    except Exception as e:
-        print(f"Error retrieving user stats: {e}")
-        return False, str(e)
+@app.after_request
+def observe_request(response):
+    start = g.pop('request_start', None)
+    if start is not None:
+        # The URL rule, not the path, so the number of series stays bounded
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start, route, request.method, str(response.status_code))
+    return response
 
-# User management functions
-def create_user(username, email, password):
-    try:
-        table = dynamodb.Table('ContextoUsers')
-        
-        # Check if username already exists
-        response = table.scan(
-            FilterExpression=Attr('username').eq(username)
-        )
-        if response['Items']:
-            return False, "Username already exists"
-            
-        # Check if email already exists
-        response = table.scan(
-            FilterExpression=Attr('email').eq(email)
-        )
-        if response['Items']:
-            return False, "Email already exists"
-        
-        # Hash password
-        password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
-        
-        # Create user
-        user_id = str(uuid.uuid4())
-        timestamp = int(time.time())
-        
-        user_item = {
-            'user_id': user_id,
-            'username': username,
-            'email': email,
-            'password_hash': password_hash.decode('utf-8'),
-            'created_at': timestamp,
-            'last_login': timestamp,
-            'games_played': 0,
-            'best_score': 0
-        }
-        
-        table.put_item(Item=user_item)
-        return True, "User created successfully"
-        
-    except Exception as e:
-        print(f"Error creating user: {e}")
-        return False, str(e)
+from storage import (
+    save_game_history, get_user_game_history, get_user_stats,
+    create_user, verify_user, update_user_stats,
+    game_history_item, write_game_history_batch, is_retryable_error,
+    get_daily_leaderboard, get_daily_player_count
+)
 
-def verify_user(username, password):
-    try:
-        table = dynamodb.Table('ContextoUsers')
-        
-        # Get user by username
-        response = table.scan(
-            FilterExpression=Attr('username').eq(username)
-        )
-        
-        if not response['Items']:
-            return False, "User not found"
-            
-        user = response['Items'][0]
-        
-        # Verify password
-        if bcrypt.checkpw(password.encode('utf-8'), user['password_hash'].encode('utf-8')):
-            # Update last login
-            table.update_item(
-                Key={'user_id': user['user_id']},
-                UpdateExpression='SET last_login = :timestamp',
-                ExpressionAttributeValues={':timestamp': int(time.time())}
-            )
-            return True, user
-        else:
-            return False, "Invalid password"
-            
-    except Exception as e:
-        print(f"Error verifying user: {e}")
-        return False, str(e)
+# Game history is written behind the request by a background batching queue
+history_queue = HistoryQueue(write_game_history_batch, is_retryable=is_retryable_error)
+history_queue.start()
+atexit.register(history_queue.close)
+gauge('contexto_history_queue_depth', 'Game history records not yet written', history_queue.depth)
 
-def update_user_stats(user_id, score):
-    try:
-        table = dynamodb.Table('ContextoUsers')
-        
-        # Get current user stats
-        response = table.get_item(
-            Key={'user_id': user_id}
-        )
-        
-        if 'Item' not in response:
-            return False, "User not found"
-            
-        user = response['Item']
-        
-        # Update stats
-        table.update_item(
-            Key={'user_id': user_id},
-            UpdateExpression='SET games_played = games_played + :inc, best_score = :score',
-            ExpressionAttributeValues={
-                ':inc': 1,
-                ':score': min(score, user.get('best_score', float('inf'))) if user.get('best_score') else score
-            }
-        )
-        return True, "Stats updated successfully"
-        
-    except Exception as e:
-        print(f"Error updating user stats: {e}")
-        return False, str(e)
-
-
-# Load word embeddings model
-print("Loading word embeddings model...")
-model = KeyedVectors.load('glove-wiki-gigaword-50.model')
-word_vectors = model.vectors
-print("Model loaded!")
-
-try:
-    # Initialize ChatBedrockConverse
-    llm = ChatBedrockConverse(
-        model="mistral.mistral-7b-instruct-v0:2",
-        temperature=0.7,
-        region_name='eu-west-3'
-    )
+def queue_game_history(**fields):
+    history_queue.put({'game': game_history_item(**fields)})
 
-    # # Create message
-    # messages = [
-    #     HumanMessage(content="what's the capital of Tunisia in one word without ponctuation ?")
-    # ]
+# Word embeddings and everything scored against them. They are loaded by the
+# warm-up thread (see the end of this file) or on first use, not at import.
+MODEL_PATH = 'glove-wiki-gigaword-50.model'
+EMBEDDING_STORE_PATH = os.getenv('EMBEDDING_STORE_PATH', 'glove-wiki-gigaword-50.store')
+# 'float' ranks by cosine over the vectors; 'binary' by Hamming distance over
+# packed bit codes (BINARY_BITS random-hyperplane bits, or 0 for one sign bit per dimension)
+SIMILARITY_BACKEND = os.getenv('SIMILARITY_BACKEND', 'float')
+# IVF index the embedding AI player searches instead of scanning its whole
+# vocabulary; built on first load, and only used if its recall is high enough
+ANN_INDEX_PATH = os.getenv('ANN_INDEX_PATH', 'ai_player.ivf.npz')
+ANN_MIN_RECALL = float(os.getenv('ANN_MIN_RECALL', 0.9))
 
-    # # Get response
-    # response = llm.invoke(messages)
+def load_embeddings():
+    """Open the embedding store (memory-mapped, shared across gunicorn workers) and build the engines over it"""
+    print("Loading word embeddings model...")
+    model = open_or_build(EMBEDDING_STORE_PATH, MODEL_PATH)
+    
+    # A pruned embedding store (see glove-wiki.py) must still hold every target word
+    missing_targets = [word for word in TARGET_WORDS if word not in model.key_to_index]
+    if missing_targets:
+        raise RuntimeError(f"Target words missing from the embedding store: {', '.join(missing_targets)}")
+    
+    if SIMILARITY_BACKEND == 'binary':
+        rank_engine = BinaryRankEngine.from_vectors(
+            model.get_normed_vectors(), model.key_to_index, n_bits=int(os.getenv('BINARY_BITS', 256)) or None,
+            cached_targets=TARGET_WORDS
+        )
+    else:
+        # Only the game's targets get cached and persisted tables
+        rank_engine = RankEngine(model.get_normed_vectors(), model.key_to_index, cached_targets=TARGET_WORDS)
     
-    # # Print response
-    # print("Response:", response.content)
+    embedding_ai_player = EmbeddingAIPlayer(model.get_normed_vectors(), model.key_to_index, model.index_to_key)
+    if ANN_INDEX_PATH:
+        index = open_or_build_index(ANN_INDEX_PATH, embedding_ai_player.candidate_vectors)
+        recall = embedding_ai_player.attach_index(index, min_recall=ANN_MIN_RECALL)
+        if embedding_ai_player.index:
+            print(f"AI player searches the ANN index (nprobe {index.nprobe}, recall@10 {recall:.3f})")
+        else:
+            print(f"AI player scans its vocabulary: ANN recall@10 {recall:.3f} is below {ANN_MIN_RECALL}")
+    
+    loaded = SimpleNamespace(
+        model=model,
+        rank_engine=rank_engine,
+        embedding_ai_player=embedding_ai_player,
+        tips_service=TipsService(SimilarityScorer(model, rank_engine))
+    )
+    print("Model loaded!")
+    return loaded
+
+embeddings = Lazy('embeddings', load_embeddings)
 
-except ClientError as e:
-    print(f"AWS Error: {e}")
-except Exception as e:
-    print(f"Error: {e}")
+# AI opponents: 'llm' asks the Bedrock model, 'embedding' searches the vector space locally
+AI_STRATEGIES = ('llm', 'embedding')
+DEFAULT_AI_STRATEGY = os.getenv('AI_STRATEGY', 'llm')
+# Words the LLM is asked for per call; 1 keeps the one-word-per-call retry loop
+LLM_CANDIDATES = int(os.getenv('LLM_CANDIDATES', 5))
+LLM_CANDIDATE_ATTEMPTS = 2
+# Stream LLM answers and stop reading once enough words have arrived
+LLM_STREAMING = os.getenv('LLM_STREAMING', '1') == '1'
 
 # Game state
 class GameState:
+    """One player's game.
+
+    The guess lists are the stored form; the leaderboard is rebuilt from
+    them on first use after loading and then updated one guess at a time.
+    """
+
     def __init__(self):
-        self.target_word = TARGET_WORDS[0] if TARGET_WORDS else None  # Initialize with first word
+        self.target_word = daily_target_word()
         self.game_over = False
         self.winner = None
         self.human_guesses = []
         self.ai_guesses = []
+        self._leaderboard = Leaderboard()  # All guesses sorted by rank, plus the used words
+        self._leaderboard_id = self._leaderboard.id
         self.current_turn = 'human'
         self.start_time = int(time.time())
         self.last_reset_date = datetime.now().date()  # Add last_reset_date
-        self.daily_number = 0  # Add daily_number
+        self.daily_number = get_daily_number()  # Add daily_number
+        self.ai_turn = 0  # Incremented each time the AI is handed the turn
+        self.ai_strategy = DEFAULT_AI_STRATEGY  # 'llm' or 'embedding'
+        self.last_ai_result = None  # Outcome of the most recent AI turn
+
+    def to_dict(self):
+        return {
+            'target_word': self.target_word,
+            'game_over': self.game_over,
+            'winner': self.winner,
+            'human_guesses': self.human_guesses,
+            'ai_guesses': self.ai_guesses,
+            'current_turn': self.current_turn,
+            'start_time': self.start_time,
+            'last_reset_date': self.last_reset_date.isoformat() if self.last_reset_date else None,
+            'daily_number': self.daily_number,
+            'ai_turn': self.ai_turn,
+            'ai_strategy': self.ai_strategy,
+            'last_ai_result': self.last_ai_result,
+            'leaderboard_id': self._leaderboard_id
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls()
+        state.target_word = data['target_word']
+        state.game_over = data['game_over']
+        state.winner = data['winner']
+        state.human_guesses = [tuple(guess) for guess in data['human_guesses']]
+        state.ai_guesses = [tuple(guess) for guess in data['ai_guesses']]
+        state.current_turn = data['current_turn']
+        state.start_time = data['start_time']
+        last_reset_date = data.get('last_reset_date')
+        state.last_reset_date = datetime.fromisoformat(last_reset_date).date() if last_reset_date else None
+        state.daily_number = data.get('daily_number', 0)
+        state.ai_turn = data.get('ai_turn', 0)
+        state.ai_strategy = data.get('ai_strategy', DEFAULT_AI_STRATEGY)
+        state.last_ai_result = data.get('last_ai_result')
+        # States saved before leaderboard_id carried the whole board
+        state._leaderboard_id = data.get('leaderboard_id') or data.get('leaderboard', {}).get('id')
+        state._leaderboard = None
+        return state
+
+    @property
+    def leaderboard(self):
+        if self._leaderboard is None:
+            self._leaderboard = Leaderboard.from_guesses(self.human_guesses, self.ai_guesses,
+                                                         board_id=self._leaderboard_id)
+            self._leaderboard_id = self._leaderboard.id
+        return self._leaderboard
+
+    @property
+    def used_words(self):
+        return self.leaderboard.used_words
+
+    def add_guess(self, player, word, rank, similarity):
+        """Record a scored guess for 'human' or 'ai' and place it on the leaderboard"""
+        guesses = self.human_guesses if player == 'human' else self.ai_guesses
+        guesses.append((word, rank, float(similarity)))
+        if self._leaderboard is not None:
+            self._leaderboard.add(word, rank, player)
+
+    def clear_guesses(self):
+        self.human_guesses = []
+        self.ai_guesses = []
+        self._leaderboard = Leaderboard()
+        self._leaderboard_id = self._leaderboard.id
 
 # Static list of simple words to guess
 TARGET_WORDS = [
@@ -275,37 +240,63 @@ TARGET_WORDS = [
     'pillow', 'coffee', 'mirror', 'carpet', 'picture'
 ]
 
-game_state = GameState()
+# Per-player game state, keyed by the session id the client sends
+SESSION_HEADER = 'X-Session-Id'
 
-def generate_easy_word():
-    """Select a random word from our predefined list"""
-    word = random.choice(TARGET_WORDS)
-    
-    # Print the word in the terminal for debugging/testing
-    print("\n" + "="*50)
-    print(f"Today's target word is: {word}")
-    print("="*50 + "\n")
-    
-    return word
+session_store = create_session_store(
+    dumps=lambda state: json.dumps(state.to_dict()),
+    loads=lambda data: GameState.from_dict(json.loads(data))
+)
+
+def get_session_id(data=None):
+    """Read the caller's session id from the header, JSON body or query string"""
+    if data is None:
+        data = request.get_json(silent=True) or {}
+    return request.headers.get(SESSION_HEADER) or data.get('session_id') or request.args.get('session_id')
 
-def initialize_daily_word():
+def load_game(session_id):
+    """Return the session's game state, creating a fresh one if it doesn't exist or has expired"""
+    state = session_store.get(session_id)
+    if state is None:
+        state = GameState()
+    return state
+
+def store_game(session_id, state):
+    session_store.set(session_id, state)
+
+# Background AI turns
+AI_TURN_TIMEOUT = float(os.getenv('AI_TURN_TIMEOUT', 60))
+AI_STREAM_POLL_INTERVAL = 0.25
+
+ai_turn_runner = AITurnRunner()
+llm_cache = create_llm_cache()
+gauge('contexto_ai_turns_pending', 'AI turns queued or running in this worker', ai_turn_runner.pending)
+
+def get_daily_number(day=None):
+    # Days since the game's epoch, for the given date or today
+    epoch = datetime(2024, 1, 1)
+    return ((day or datetime.now().date()) - epoch.date()).days
+
+def daily_target_word(day=None):
+    """The day's target word (today's by default), the same for every player and worker"""
+    return TARGET_WORDS[get_daily_number(day) % len(TARGET_WORDS)]
+
+def initialize_daily_word(game_state):
     current_date = datetime.now().date()
     
     # Initialize if target_word is None or last_reset_date is different from current date
     if (game_state.target_word is None or 
         getattr(game_state, 'last_reset_date', None) != current_date):
         
-        # Generate new easy word
-        game_state.target_word = generate_easy_word()
+        # A session carried over from an earlier day moves on to today's word
+        game_state.target_word = daily_target_word()
+        embeddings.get().rank_engine.prepare(game_state.target_word)
         
         # Calculate daily number (days since epoch)
-        epoch = datetime(2024, 1, 1)
-        today = datetime.now()
-        game_state.daily_number = (today - epoch).days
+        game_state.daily_number = get_daily_number()
         
         game_state.last_reset_date = current_date
-        game_state.human_guesses = []  # Create new empty list
-        game_state.ai_guesses = []     # Create new empty list
+        game_state.clear_guesses()
         game_state.current_turn = 'human'
         game_state.game_over = False
         game_state.winner = None
@@ -335,50 +326,44 @@ def convert_similarity_to_rank(similarity):
     return rank
 
 def calculate_similarity(word1, word2):
-    """Calculate semantic similarity between two words and convert to rank"""
-    try:
-        # Get word vectors
-        vec1 = model[word1]
-        vec2 = model[word2]
-        
-        # Calculate cosine similarity
-        similarity = np.dot(vec1, vec2) / (np.linalg.norm(vec1) * np.linalg.norm(vec2))
-        
-        # Convert to rank
-        rank = convert_similarity_to_rank(float(similarity))
-        
-        return rank, float(similarity)
-    except KeyError:
-        return None
+    """Look up the true vocabulary rank and cosine similarity of word1 for target word2"""
+    with SIMILARITY_SECONDS.time('lookup'):
+        try:
+            return embeddings.get().rank_engine.lookup(word1, word2)
+        except KeyError:
+            return None
+
+def calculate_similarity_batch(words, targets):
+    """Score aligned lists of words against targets in one vectorized pass.
+
+    Returns a list with a (rank, similarity) tuple per pair, or None where
+    either word is not in the vocabulary.
+    """
+    with SIMILARITY_SECONDS.time('batch'):
+        return _calculate_similarity_batch(words, targets)
+
+def _calculate_similarity_batch(words, targets):
+    loaded = embeddings.get()
+    key_to_index = loaded.model.key_to_index
+    word_indices = np.array([key_to_index.get(word, -1) for word in words], dtype=np.int64)
+    target_indices = np.array([key_to_index.get(target, -1) for target in targets], dtype=np.int64)
+    valid = (word_indices >= 0) & (target_indices >= 0)
+
+    results = [None] * len(word_indices)
+    if valid.any():
+        ranks, similarities = loaded.rank_engine.lookup_batch(word_indices[valid], target_indices[valid])
+        for position, rank, similarity in zip(np.flatnonzero(valid), ranks.tolist(), similarities.tolist()):
+            results[position] = (rank, similarity)
+    return results
 
 # Helper function to get leaderboard data
-def get_leaderboard_data():
-    # Combine and sort all guesses
-    all_guesses = []
-    
-    # Add human guesses
-    for word, rank, similarity in game_state.human_guesses:
-        all_guesses.append({
-            'word': word,
-            'rank': rank,
-            'player': 'human'
-        })
-    
-    # Add AI guesses
-    for word, rank, similarity in game_state.ai_guesses:
-        all_guesses.append({
-            'word': word,
-            'rank': rank,
-            'player': 'ai'
-        })
-    
-    # Sort by rank (lower is better)
-    all_guesses.sort(key=lambda x: x['rank'])
-    
+def get_leaderboard_data(game_state, offset=0, limit=None):
+    """Guesses sorted by rank (lower is better); offset and limit select a page"""
+    leaderboard = game_state.leaderboard
     return {
-        'leaderboard': all_guesses,
-        'totalGuesses': len(all_guesses),
-        'totalPlayers': len(set(guess['player'] for guess in all_guesses))
+        'leaderboard': leaderboard.page(offset, limit),
+        'totalGuesses': len(leaderboard),
+        'totalPlayers': leaderboard.total_players
     }
 
 @app.route('/')
@@ -387,19 +372,28 @@ def serve_index():
 
 @app.route('/api/start', methods=['POST'])
 def start_game():
-    initialize_daily_word()  # Initialize or get the daily word
+    data = request.get_json(silent=True) or {}
+    ai_strategy = data.get('ai_strategy', DEFAULT_AI_STRATEGY)
+    if ai_strategy not in AI_STRATEGIES:
+        return jsonify({'status': 'error', 'message': 'Invalid AI strategy'}), 400
+    
+    session_id = get_session_id(data) or str(uuid.uuid4())
+    game_state = load_game(session_id)
+    initialize_daily_word(game_state)  # Initialize or get the daily word
     
     # Reset game state with new empty lists
-    game_state.human_guesses = []  # Create new empty list
-    game_state.ai_guesses = []     # Create new empty list
+    game_state.clear_guesses()
     game_state.current_turn = 'human'
     game_state.game_over = False
     game_state.winner = None
     game_state.start_time = int(time.time())
+    game_state.ai_strategy = ai_strategy
+    store_game(session_id, game_state)
     
     # Return empty leaderboard
     return jsonify({
         'status': 'success',
+        'session_id': session_id,
         'leaderboard': {
             'leaderboard': [],
             'totalGuesses': 0,
@@ -407,41 +401,57 @@ def start_game():
         }
     })
 
-@app.route('/api/guess', methods=['POST'])
-def make_guess():
-    data = request.get_json()
+def play_human_guess(data):
+    """Validate and record a human guess, handing the turn to the AI unless the game is won.
+    
+    Returns (response, session_id, game_state); response has status 'error' and
+    a message when the guess is refused. A successful response carries the
+    guess's leaderboard_delta, taken before the AI's turn can add a row.
+    """
     guess = data.get('guess', '').lower()
     user_id = data.get('user_id')
+    session_id = get_session_id(data)
+    
+    if not session_id:
+        return {'status': 'error', 'message': 'No active game, start a new one'}, session_id, None
     
     if not guess:
-        return jsonify({'status': 'error', 'message': 'No guess provided'})
+        return {'status': 'error', 'message': 'No guess provided'}, session_id, None
+    
+    game_state = load_game(session_id)
     
     if game_state.game_over:
-        return jsonify({'status': 'error', 'message': 'Game is already over'})
+        GUESSES.inc('refused')
+        return {'status': 'error', 'message': 'Game is already over'}, session_id, game_state
     
     if game_state.current_turn != 'human':
-        return jsonify({'status': 'error', 'message': 'Not your turn'})
+        GUESSES.inc('refused')
+        return {'status': 'error', 'message': 'Not your turn'}, session_id, game_state
     
     # Check if word has been guessed before - fixed to check entire words
-    used_words = {g[0] for g in game_state.human_guesses + game_state.ai_guesses}  # g[0] is the word from the tuple
-    if guess in used_words:
-        return jsonify({'status': 'error', 'message': 'Word has already been guessed'})
+    if guess in game_state.used_words:
+        GUESSES.inc('repeated')
+        return {'status': 'error', 'message': 'Word has already been guessed'}, session_id, game_state
     
-    rank, similarity = calculate_similarity(guess, game_state.target_word)
-    print("Guess:"+ guess + " similarity:" + str(similarity))
+    result = calculate_similarity(guess, game_state.target_word)
+    if result is None:
+        GUESSES.inc('invalid')
+        return {'status': 'error', 'message': 'Invalid word'}, session_id, game_state
     
-    if rank is None:
-        return jsonify({'status': 'error', 'message': 'Invalid word'})
+    rank, similarity = result
+    log_event('guess', session_id=session_id, word=guess, rank=rank, similarity=round(float(similarity), 4))
     
     # Add human guess
-    game_state.human_guesses.append((guess, rank, float(similarity)))
+    game_state.add_guess('human', guess, rank, similarity)
+    GUESSES.inc('win' if rank == 1 else 'ranked')
+    leaderboard_delta = game_state.leaderboard.delta(guess, rank)
     
     # Check if human won
     if rank == 1:
         game_state.game_over = True
         game_state.winner = 'human'
         if user_id:
-            save_game_history(
+            queue_game_history(
                 user_id=user_id,
                 target_word=game_state.target_word,
                 guesses_count=len(game_state.human_guesses),
@@ -449,50 +459,208 @@ def make_guess():
                 time_taken=int(time.time()) - game_state.start_time,
                 completed=True
             )
-        return jsonify({
+        store_game(session_id, game_state)
+        return {
             'status': 'success',
+            'guess': guess,
             'rank': rank,
             'game_over': True,
             'winner': 'human',
+            'ai_pending': False,
             'target_word': game_state.target_word,
-            'leaderboard': get_leaderboard_data()  # Return current leaderboard data
-        })
+            'leaderboard_delta': leaderboard_delta
+        }, session_id, game_state
     
-    # If human didn't win, let AI make a guess
-    if not game_state.game_over:
-        game_state.current_turn = 'ai'
-        ai_guess, ai_rank = make_ai_guess()
-        
-        if ai_guess is None:
-            return jsonify({
-                'status': 'success',
-                'rank': rank,
-                'game_over': game_state.game_over,
-                'winner': game_state.winner,
-                'ai_guess': None,
-                'ai_rank': None,
-                'leaderboard': get_leaderboard_data()  # Return current leaderboard data
-            })
-    
-    # Always switch back to human turn after AI's guess (unless game is over)
-    if not game_state.game_over:
-        game_state.current_turn = 'human'
+    # If human didn't win, hand the turn to the AI in the background and
+    # return the human's result right away. The AI's guess is delivered by
+    # /api/ai-guess (poll), /api/ai-guess/stream or /api/guess/stream (server-sent events).
+    game_state.current_turn = 'ai'
+    game_state.ai_turn += 1
+    ai_turn = game_state.ai_turn
+    store_game(session_id, game_state)
+    ai_turn_runner.submit(session_id, ai_turn, run_ai_turn, session_id, ai_turn)
     
-    return jsonify({
+    return {
         'status': 'success',
+        'guess': guess,
         'rank': rank,
+        'game_over': False,
+        'winner': None,
+        'ai_guess': None,
+        'ai_rank': None,
+        'ai_pending': True,
+        'ai_turn': ai_turn,
+        'target_word': None,
+        'leaderboard_delta': leaderboard_delta
+    }, session_id, game_state
+
+@app.route('/api/guess', methods=['POST'])
+def make_guess():
+    response, _, game_state = play_human_guess(request.get_json())
+    if response['status'] == 'success':
+        response.pop('leaderboard_delta')
+        response['leaderboard'] = get_leaderboard_data(game_state)  # Return current leaderboard data
+    return jsonify(response)
+
+@app.route('/api/guess/stream', methods=['POST'])
+def stream_guess():
+    """Play a guess and push the outcome as server-sent events.
+    
+    A 'guess' event carries the human's rank as soon as it is scored, then an
+    'ai_guess' event carries the AI's guess once its turn finishes (or 'timeout').
+    Both carry a leaderboard delta (the new row and its position) instead of
+    the whole board.
+    """
+    # The human's delta comes from play_human_guess: by the time the stream
+    # starts, a fast AI turn may already have added its row to a shared state
+    response, session_id, _ = play_human_guess(request.get_json())
+    
+    def generate():
+        yield sse_event('guess', response)
+        if response['status'] != 'success' or not response['ai_pending']:
+            return
+        
+        turn_id = response['ai_turn']
+        for state, result in await_ai_turn(session_id, turn_id):
+            if result is None:
+                yield ": waiting\n\n"
+                continue
+            result.pop('leaderboard')
+            result['leaderboard_delta'] = (state.leaderboard.delta(result['ai_guess'], result['ai_rank'])
+                                           if result['ai_guess'] else None)
+            yield sse_event('ai_guess', result)
+            return
+        yield sse_event('timeout', {'ai_turn': turn_id})
+    
+    return event_stream(generate())
+
+def run_ai_turn(session_id, turn_id):
+    """Play the AI's turn for a session in the background and record the outcome in its game state"""
+    def is_current(state):
+        return (state is not None and not state.game_over and
+                state.current_turn == 'ai' and state.ai_turn == turn_id)
+    
+    stored, version = session_store.get_versioned(session_id)
+    if not is_current(stored):
+        return
+    
+    # The guess is chosen and scored without changing the game, then recorded
+    # only if nothing (a give-up, restart or new target) has written the
+    # session since it was read
+    start = time.perf_counter()
+    ai_guess, ai_rank, similarity = None, None, None
+    try:
+        ai_guess = choose_ai_guess(stored)
+        if ai_guess is not None:
+            ai_rank, similarity = calculate_similarity(ai_guess, stored.target_word)
+    except Exception as e:
+        log_event('ai_turn_error', sample_rate=1, session_id=session_id, turn=turn_id, error=str(e))
+        AI_TURN_ERRORS.inc(stored.ai_strategy)
+        ai_guess = None
+    seconds = time.perf_counter() - start
+    AI_TURN_SECONDS.observe(seconds, stored.ai_strategy)
+    log_event('ai_turn', session_id=session_id, turn=turn_id, strategy=stored.ai_strategy,
+              word=ai_guess, rank=ai_rank, seconds=round(seconds, 4))
+    
+    def apply(game_state):
+        if not is_current(game_state):
+            return None
+        if ai_guess is not None:
+            add_ai_guess(game_state, ai_guess, ai_rank, similarity)
+        # Always switch back to human turn after AI's guess (unless game is over)
+        if not game_state.game_over:
+            game_state.current_turn = 'human'
+        game_state.last_ai_result = {'turn': turn_id, 'ai_guess': ai_guess, 'ai_rank': ai_rank}
+        return game_state
+    
+    session_store.update(session_id, version, apply)
+
+def get_ai_turn_result(game_state, turn_id):
+    """Build the response for a finished AI turn, or return None while it is still running"""
+    result = game_state.last_ai_result
+    finished = result is not None and result['turn'] == turn_id
+    if not finished and not game_state.game_over:
+        return None
+    
+    return {
+        'status': 'success',
+        'ai_turn': turn_id,
+        'ai_guess': result['ai_guess'] if finished else None,
+        'ai_rank': result['ai_rank'] if finished else None,
         'game_over': game_state.game_over,
         'winner': game_state.winner,
-        'ai_guess': ai_guess,
-        'ai_rank': ai_rank,
         'target_word': game_state.target_word if game_state.game_over else None,
-        'leaderboard': get_leaderboard_data()  # Return current leaderboard data
-    })
+        'leaderboard': get_leaderboard_data(game_state)
+    }
+
+@app.route('/api/ai-guess', methods=['GET'])
+def poll_ai_guess():
+    session_id = get_session_id()
+    if not session_id:
+        return jsonify({'status': 'error', 'message': 'No active game, start a new one'})
+    
+    game_state = load_game(session_id)
+    turn_id = request.args.get('turn', game_state.ai_turn, type=int)
+    result = get_ai_turn_result(game_state, turn_id)
+    if result is None:
+        return jsonify({'status': 'pending', 'ai_turn': turn_id})
+    return jsonify(result)
+
+def await_ai_turn(session_id, turn_id):
+    """Yield (game_state, None) while an AI turn runs, so callers can send keep-alives,
+    then (game_state, result) once it has finished; stops after AI_TURN_TIMEOUT"""
+    deadline = time.time() + AI_TURN_TIMEOUT
+    # Wait on the job directly when this worker runs it, otherwise poll the store
+    future = ai_turn_runner.get(session_id, turn_id)
+    while True:
+        # Look first: a fast turn may have finished before the caller got here
+        game_state = load_game(session_id)
+        result = get_ai_turn_result(game_state, turn_id)
+        yield game_state, result
+        if result is not None or time.time() >= deadline:
+            return
+        
+        if future is not None:
+            wait_for_futures([future], timeout=AI_STREAM_POLL_INTERVAL)
+            if future.done():
+                future = None
+        else:
+            time.sleep(AI_STREAM_POLL_INTERVAL)
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def event_stream(events):
+    return Response(
+        stream_with_context(events),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/api/ai-guess/stream', methods=['GET'])
+def stream_ai_guess():
+    session_id = get_session_id()
+    if not session_id:
+        return jsonify({'status': 'error', 'message': 'No active game, start a new one'})
+    turn_id = request.args.get('turn', load_game(session_id).ai_turn, type=int)
+    
+    def generate():
+        for _, result in await_ai_turn(session_id, turn_id):
+            if result is None:
+                yield ": waiting\n\n"
+                continue
+            yield sse_event('ai_guess', result)
+            return
+        yield sse_event('timeout', {'ai_turn': turn_id})
+    
+    return event_stream(generate())
 
 @app.route('/api/give-up', methods=['POST'])
 def give_up():
     data = request.get_json()
     user_id = data.get('user_id')
+    session_id = get_session_id(data)
+    game_state = load_game(session_id)
     
     if user_id:
         # Save game history as incomplete
@@ -500,7 +668,7 @@ def give_up():
         time_taken = int(time.time()) - game_state.start_time
         last_rank = guesses_count + 1  # Use number of guesses + 1 as final rank for incomplete games
         
-        save_game_history(
+        queue_game_history(
             user_id=user_id,
             target_word=game_state.target_word,
             guesses_count=guesses_count,
@@ -511,19 +679,55 @@ def give_up():
 
     game_state.game_over = True
     game_state.winner = 'ai'
+    if session_id:
+        store_game(session_id, game_state)
     return jsonify({
         'target_word': game_state.target_word,
         'total_guesses': len(game_state.human_guesses)
     })
 
+@app.route('/api/hint', methods=['POST'])
+def get_hint():
+    session_id = get_session_id()
+    if not session_id:
+        return jsonify({'status': 'error', 'message': 'No active game, start a new one'})
+    
+    game_state = load_game(session_id)
+    if game_state.game_over:
+        return jsonify({'status': 'error', 'message': 'Game is already over'})
+    
+    # Each hint is ranked better than the best guess so far
+    hint, similarity = embeddings.get().tips_service.get_tip(
+        game_state.target_word, game_state.leaderboard.best_rank, exclude=game_state.used_words
+    )
+    if hint is None:
+        return jsonify({'status': 'error', 'message': 'No hint available'})
+    
+    rank, similarity = calculate_similarity(hint, game_state.target_word)
+    return jsonify({'status': 'success', 'hint': hint, 'rank': rank, 'similarity': similarity})
+
 @app.route('/api/stats', methods=['GET'])
 def get_stats():
-    initialize_daily_word()
+    session_id = get_session_id()
+    game_state = load_game(session_id)
+    initialize_daily_word(game_state)
+    if session_id:
+        store_game(session_id, game_state)
+    # Players who have solved today's word, from the daily leaderboard's counters
+    success, total_players = get_daily_player_count(daily_target_word())
     return jsonify({
         'dailyNumber': game_state.daily_number,
-        'totalPlayers': len(set(guess[0] for guess in game_state.human_guesses))
+        'totalPlayers': total_players if success else None
     })
 
+@app.route('/api/history-queue', methods=['GET'])
+def get_history_queue_metrics():
+    return jsonify(history_queue.metrics())
+
+@app.route('/api/llm-cache', methods=['GET'])
+def get_llm_cache_stats():
+    return jsonify(llm_cache.stats())
+
 @app.route('/api/save_game', methods=['POST'])
 def save_game():
     data = request.get_json()
@@ -561,24 +765,34 @@ def set_target_word():
     if word_index is None or not (0 <= word_index < len(TARGET_WORDS)):
         return jsonify({'success': False, 'message': 'Invalid word index'}), 400
     
+    ai_strategy = data.get('ai_strategy', DEFAULT_AI_STRATEGY)
+    if ai_strategy not in AI_STRATEGIES:
+        return jsonify({'success': False, 'message': 'Invalid AI strategy'}), 400
+    
     # Initialize new game state
     selected_word = TARGET_WORDS[word_index]
     print(f"\n=== New Game Started ===")
     print(f"Selected Word: {selected_word}")
     print("=" * 25)
     
+    session_id = get_session_id(data) or str(uuid.uuid4())
+    game_state = load_game(session_id)
+    
     # Clear all game state
     game_state.target_word = selected_word
+    embeddings.get().rank_engine.prepare(selected_word)
     game_state.game_over = False
     game_state.winner = None
-    game_state.human_guesses = []  # Create new empty list
-    game_state.ai_guesses = []     # Create new empty list
+    game_state.clear_guesses()
     game_state.current_turn = 'human'
     game_state.start_time = int(time.time())
+    game_state.ai_strategy = ai_strategy
+    store_game(session_id, game_state)
     
     # Return empty leaderboard for frontend sync
     return jsonify({
         'success': True,
+        'session_id': session_id,
         'leaderboard': {
             'leaderboard': [],
             'totalGuesses': 0,
@@ -586,9 +800,60 @@ def set_target_word():
         }
     })
 
+MAX_BATCH_SIZE = 10000
+# Each target outside TARGET_WORDS costs a full-vocabulary sort
+MAX_BATCH_TARGETS = 5
+
+@app.route('/api/similarity/batch', methods=['POST'])
+def similarity_batch():
+    data = request.get_json() or {}
+    words = data.get('words')
+    targets = data.get('targets')
+    
+    # A single 'target' scores every word against the same target word
+    if targets is None and isinstance(data.get('target'), str):
+        targets = [data['target']] * len(words or [])
+    
+    if not isinstance(words, list) or not isinstance(targets, list):
+        return jsonify({'status': 'error', 'message': 'words and targets must be lists'}), 400
+    if len(words) != len(targets):
+        return jsonify({'status': 'error', 'message': 'words and targets must have the same length'}), 400
+    if len(words) > MAX_BATCH_SIZE:
+        return jsonify({'status': 'error', 'message': f'At most {MAX_BATCH_SIZE} pairs per request'}), 400
+    
+    words = [str(word).lower() for word in words]
+    targets = [str(target).lower() for target in targets]
+    if len(set(targets)) > MAX_BATCH_TARGETS:
+        return jsonify({'status': 'error', 'message': f'At most {MAX_BATCH_TARGETS} distinct targets per request'}), 400
+    
+    results = []
+    for word, target, scored in zip(words, targets, calculate_similarity_batch(words, targets)):
+        rank, similarity = scored if scored is not None else (None, None)
+        results.append({
+            'word': word,
+            'target': target,
+            'rank': rank,
+            'similarity': similarity
+        })
+    
+    return jsonify({'status': 'success', 'results': results})
+
 @app.route('/api/leaderboard', methods=['GET'])
 def get_leaderboard():
-    return jsonify(get_leaderboard_data())
+    """Leaderboard page (offset, limit query args) with an ETag so unchanged boards answer 304"""
+    offset = max(0, request.args.get('offset', 0, type=int))
+    limit = request.args.get('limit', type=int)
+    if limit is not None:
+        limit = max(0, limit)
+    
+    game_state = load_game(get_session_id())
+    etag = game_state.leaderboard.etag
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = jsonify(get_leaderboard_data(game_state, offset, limit))
+    response.set_etag(etag)
+    return response
 
 @app.route('/api/register', methods=['POST'])
 def register():
@@ -666,18 +931,55 @@ def get_user_game_stats():
     else:
         return jsonify({'success': False, 'message': result}), 500
 
-def make_ai_guess():
+@app.route('/api/daily-leaderboard', methods=['GET'])
+def get_daily_leaderboard_route():
+    day = request.args.get('day')  # YYYY-MM-DD, today by default
+    limit = min(max(0, request.args.get('limit', 10, type=int)), 100)
+    user_id = request.args.get('user_id')
+    
+    # One board per word played that day, the day's own word by default
+    word = request.args.get('word')
+    if not word:
+        try:
+            word = daily_target_word(date.fromisoformat(day) if day else None)
+        except ValueError:
+            return jsonify({'success': False, 'message': 'day must be YYYY-MM-DD'}), 400
+    
+    success, result = get_daily_leaderboard(word, day, limit, user_id)
+    if success:
+        return jsonify({'success': True, **result})
+    else:
+        return jsonify({'success': False, 'message': result}), 500
+
+def choose_ai_guess(game_state):
+    """Pick the AI's word with the game's strategy, without changing the game; returns None if it has none"""
+    if game_state.ai_strategy == 'embedding':
+        return choose_embedding_ai_guess(game_state)
+    return choose_llm_ai_guess(game_state)
+
+def add_ai_guess(game_state, ai_guess, rank, similarity):
+    """Add a scored AI guess to the game, ending it if the AI found the word"""
+    game_state.add_guess('ai', ai_guess, rank, similarity)
+    
+    # Check if AI won
+    if ai_guess == game_state.target_word:
+        game_state.game_over = True
+        game_state.winner = 'ai'
+
+def choose_embedding_ai_guess(game_state):
+    """Nearest-neighbour AI turn over the embedding space, no LLM round trips"""
+    all_guesses = game_state.human_guesses + game_state.ai_guesses
+    return embeddings.get().embedding_ai_player.choose(all_guesses, game_state.used_words)
+
+def choose_llm_ai_guess(game_state):
     # Get all previously used words
-    used_words = {guess[0] for guess in game_state.human_guesses + game_state.ai_guesses}
-    print("Used words:", used_words)
+    used_words = game_state.used_words
     # Create context from previous guesses, sorted by rank to help AI understand the pattern
     all_guesses = game_state.human_guesses + game_state.ai_guesses
     sorted_guesses = sorted(all_guesses, key=lambda x: x[1])  # Sort by rank (second element)
-    print("sorted guesses:", sorted_guesses)
     
     # Take only the 10 most relevant guesses to avoid context overload
     relevant_guesses = sorted_guesses[:10]
-    print("relevant guesses:", relevant_guesses)
     context = " "
     context = '''
     This is like the Contexto word guessing game. You need to guess a target word based on semantic similarity.
@@ -685,45 +987,134 @@ def make_ai_guess():
     context += "Previous guesses and their similarities (higher is better):\n"
     for guess, rank, similarity in relevant_guesses:
         context += f"{guess} (similarity {similarity:.3f})\n"
-    print("context:", context)
+    log_event('llm_context', guesses=len(all_guesses), used_words=len(used_words),
+              best=[guess for guess, _, _ in relevant_guesses[:3]])
     
     # Add instruction to avoid used words
     context += "\nDo not use any of these words that have already been guessed: " + ", ".join(used_words)
     
+    # Games that reach the same guesses reuse an earlier answer instead of calling the model
+    cache_key, cached_guess = llm_cache.get(all_guesses, used_words)
+    if cached_guess is not None and cached_guess in embeddings.get().model.key_to_index:
+        return cached_guess
+    
+    llm_start = time.perf_counter()
+    if LLM_CANDIDATES > 1:
+        ai_guess = choose_llm_candidate(context, all_guesses, used_words)
+        if ai_guess is not None:
+            llm_cache.put(cache_key, ai_guess, time.perf_counter() - llm_start)
+        return ai_guess
+    
     # Ask AI for a guess with more specific instructions
     prompt = f"{context}\n\nBased on these similarities (higher is better, 1 is correct), suggest a single word that you think is closest to the target word. Requirements:\n1. Must be a common English word\n2. Must NOT be any word that has been guessed before\n3. Should try to get a better similarity than {sorted_guesses[0][2] if sorted_guesses else 'previous guesses'}\n\nRespond with just the word, no punctuation or explanation."
     
     max_attempts = 5  # Increased attempts
     for attempt in range(max_attempts):
-        messages = [HumanMessage(content=prompt)]
-        response = llm.invoke(messages)
-        ai_guess = response.content.strip().lower()
-        
-        # Validate the guess
-        if (ai_guess not in used_words and 
-            ai_guess in model.key_to_index and 
-            len(ai_guess) >= 2):  # Basic validation
-            
-            # Calculate similarity and add to guesses
-            rank, similarity = calculate_similarity(ai_guess, game_state.target_word)
-            print("similarity:", similarity)
-            if rank is not None:
-                game_state.ai_guesses.append((ai_guess, rank, float(similarity)))
-                
-                # Check if AI won
-                if ai_guess == game_state.target_word:
-                    game_state.game_over = True
-                    game_state.winner = 'ai'
+        answer = []
+        with closing(llm_answer_words(prompt)) as words:
+            for ai_guess in words:
+                answer.append(ai_guess)
                 
-                return ai_guess, rank
+                # Validate the guess
+                if is_playable(ai_guess, used_words):
+                    llm_cache.put(cache_key, ai_guess, time.perf_counter() - llm_start)
+                    return ai_guess
         
         # If we get here, either the word was used or invalid
         # Add to the context to explicitly tell the AI not to use this word
-        context += f"\nDo not use '{ai_guess}' as it has already been guessed or is invalid."
+        context += f"\nDo not use '{' '.join(answer)}' as it has already been guessed or is invalid."
         prompt = context + "\n\nTry another word. Respond with just the word, no punctuation or explanation."
     
     # If we've exhausted all attempts, return None
-    return None, None
+    return None
+
+def is_playable(word, used_words):
+    return word not in used_words and word in embeddings.get().model.key_to_index and len(word) >= 2
+
+def llm_answer_words(prompt):
+    """Words of the LLM's answer to prompt, in order.
+    
+    With LLM_STREAMING each word is yielded as soon as it is complete, so a
+    caller that stops iterating (and closes this generator) stops reading the
+    generation instead of waiting for all of it.
+    """
+    from langchain_core.messages import HumanMessage  # loaded with the LLM client, not at import
+    
+    messages = [HumanMessage(content=prompt)]
+    mode = 'stream' if LLM_STREAMING else 'invoke'
+    start = time.perf_counter()
+    try:
+        if not LLM_STREAMING:
+            yield from parse_candidates(message_text(get_llm().invoke(messages).content))
+            return
+        stream = get_llm().stream(messages)
+        try:
+            yield from stream_candidates(stream)
+        finally:
+            # Stops reading the response; the rest of the generation is dropped with the connection
+            stream.close()
+    finally:
+        # One observation per attempt, however it ended
+        seconds = time.perf_counter() - start
+        LLM_CALL_SECONDS.observe(seconds, mode)
+        log_event('llm_call', mode=mode, seconds=round(seconds, 4))
+
+def choose_llm_candidate(context, all_guesses, used_words):
+    """Ask for a ranked list of words in one call and pick the best playable one locally.
+    
+    Candidates are checked against the vocabulary and used words, then scored in
+    one pass against the weighted centre of the best guesses so far (not the
+    target, which the AI must not see). Reading stops once LLM_CANDIDATES
+    playable words have arrived. Returns None if no call gave a usable word.
+    """
+    body = (f"Based on these similarities (higher is better, 1 is correct), suggest {LLM_CANDIDATES} different "
+            "common English words that could be closest to the target word, best first. None of them may be "
+            "a word that has been guessed before.\n\nRespond with one word per line, no numbering, "
+            "punctuation or explanation.")
+    prompt = f"{context}\n\n{body}"
+    for attempt in range(LLM_CANDIDATE_ATTEMPTS):
+        candidates, playable = [], []
+        with closing(llm_answer_words(prompt)) as words:
+            for word in words:
+                candidates.append(word)
+                if is_playable(word, used_words) and word not in playable:
+                    playable.append(word)
+                    if len(playable) >= LLM_CANDIDATES:
+                        break
+        if playable:
+            return embeddings.get().embedding_ai_player.rank_candidates(all_guesses, playable)[0]
+        
+        # Nothing usable: say which words were rejected and ask again
+        context += "\nDo not use any of these words, they were already guessed or are invalid: " + ", ".join(candidates)
+        prompt = f"{context}\n\n{body}"
+    return None
+
+# Warm-up: load the embeddings and build the AWS clients in the background, so
+# the app answers right away (see /readyz) and the first game doesn't wait
+warmup = Warmup(
+    required=[embeddings],
+    optional=[Lazy('llm', lambda: get_llm()), Lazy('dynamodb', get_dynamodb)]
+)
+WARMUP = os.getenv('WARMUP', '1') == '1'
+
+@app.before_request
+def start_warmup():
+    # Also covers gunicorn workers forked from a preloaded app, where the import-time thread doesn't run
+    if WARMUP:
+        warmup.start()
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """This worker's histograms, counters and gauges in the Prometheus text format"""
+    return Response(REGISTRY.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+@app.route('/readyz', methods=['GET'])
+def readyz():
+    """200 once the required resources are loaded, 503 before; lists each resource's state"""
+    return jsonify(warmup.status()), 200 if warmup.ready else 503
+
+if WARMUP:
+    warmup.start()
 
 if __name__ == "__main__":
    app.run(host='0.0.0.0', port=8080)
@@ -0,0 +1,106 @@
+import os
+import threading
+
+import boto3
+from botocore.config import Config
+from dotenv import load_dotenv
+load_dotenv(override=True)
+
+AWS_REGION = 'eu-west-3'
+MAX_POOL_CONNECTIONS = int(os.getenv('AWS_MAX_POOL_CONNECTIONS', 32))
+MAX_ATTEMPTS = int(os.getenv('AWS_MAX_ATTEMPTS', 5))
+
+# (connect, read) timeouts in seconds; model calls can take far longer than table reads
+SERVICE_TIMEOUTS = {
+    'dynamodb': (2, 10),
+    'bedrock-runtime': (5, 60),
+}
+
+LLM_MODEL_ID = "mistral.mistral-7b-instruct-v0:2"
+
+_lock = threading.Lock()
+_pid = None
+_session = None
+_clients = {}
+_resources = {}
+_llm = None
+
+
+def client_config(service_name):
+    connect_timeout, read_timeout = SERVICE_TIMEOUTS.get(service_name, (5, 60))
+    return Config(
+        region_name=AWS_REGION,
+        max_pool_connections=MAX_POOL_CONNECTIONS,
+        tcp_keepalive=True,
+        connect_timeout=connect_timeout,
+        read_timeout=read_timeout,
+        retries={'mode': 'adaptive', 'max_attempts': MAX_ATTEMPTS},
+    )
+
+
+def _reset_for_pid():
+    """Drop everything built by another process.
+
+    A client created before a gunicorn fork would share its pooled sockets
+    with every worker, so each process builds its own on first use.
+    Callers hold _lock.
+    """
+    global _pid, _session, _clients, _resources, _llm
+    if _pid != os.getpid():
+        _pid = os.getpid()
+        # boto3 sessions are not thread-safe; clients built from one are
+        _session = boto3.session.Session(
+            aws_access_key_id=os.getenv("ACCESS_KEY_ID"),
+            aws_secret_access_key=os.getenv("SECRET_ACCESS_KEY"),
+            region_name=AWS_REGION,
+        )
+        _clients = {}
+        _resources = {}
+        _llm = None
+
+
+def get_client(service_name):
+    """Shared low-level client for service_name, one per process"""
+    with _lock:
+        _reset_for_pid()
+        client = _clients.get(service_name)
+        if client is None:
+            client = _session.client(service_name, config=client_config(service_name))
+            _clients[service_name] = client
+        return client
+
+
+def get_resource(service_name):
+    """Shared boto3 resource for service_name, one per process.
+
+    Only Table request methods are used from request threads; they do not
+    mutate the resource and go through its thread-safe client.
+    """
+    with _lock:
+        _reset_for_pid()
+        resource = _resources.get(service_name)
+        if resource is None:
+            resource = _session.resource(service_name, config=client_config(service_name))
+            _resources[service_name] = resource
+        return resource
+
+
+def get_dynamodb():
+    return get_resource('dynamodb')
+
+
+def get_llm():
+    """Shared Bedrock chat model, using the pooled bedrock-runtime client"""
+    global _llm
+    client = get_client('bedrock-runtime')
+    with _lock:
+        if _llm is None or _llm.client is not client:
+            from langchain_aws import ChatBedrockConverse
+
+            _llm = ChatBedrockConverse(
+                model=LLM_MODEL_ID,
+                temperature=0.7,
+                region_name=AWS_REGION,
+                client=client,
+            )
+        return _llm
@@ -0,0 +1,68 @@
+"""Latency of /api/guess with the AI turn in the background vs inline.
+
+Replaces the Bedrock model with a stub that sleeps for a configurable delay,
+then plays a few turns through Flask's test client. It reports the time until
+the player gets their own rank back and the time until the AI's guess is
+available. The "inline" mode runs the AI turn inside the request, the way
+/api/guess used to.
+
+Run from the directory holding the embedding model:
+    python benchmarks/ai_turn_latency.py --delays 0.5 1 2 --turns 5
+"""
+import argparse
+import time
+
+from fakes import FakeLLM, import_app, percentile
+
+
+def play(app, client, session_id, turns, word_offset):
+    headers = {'X-Session-Id': session_id}
+    client.post('/api/set-target-word', json={'index': 0}, headers=headers)
+    human_latencies, ai_latencies = [], []
+    for turn in range(turns):
+        guess = app.embeddings.get().model.index_to_key[word_offset + turn]
+        started = time.perf_counter()
+        data = client.post('/api/guess', json={'guess': guess}, headers=headers).get_json()
+        human_latencies.append(time.perf_counter() - started)
+        if data.get('status') != 'success':
+            raise RuntimeError(f"Guess '{guess}' failed: {data}")
+
+        if data.get('ai_pending'):
+            while True:
+                result = client.get(f"/api/ai-guess?turn={data['ai_turn']}", headers=headers).get_json()
+                if result['status'] != 'pending':
+                    break
+                time.sleep(0.002)
+        ai_latencies.append(time.perf_counter() - started)
+    return human_latencies, ai_latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--delays', type=float, nargs='+', default=[0.25, 1.0])
+    parser.add_argument('--turns', type=int, default=5)
+    args = parser.parse_args()
+
+    app = import_app()
+    client = app.app.test_client()
+    answers = [app.embeddings.get().model.index_to_key[i] for i in range(5000, 5000 + 10 * args.turns)]
+    background_submit = app.ai_turn_runner.submit
+
+    def inline_submit(session_id, turn_id, fn, *fn_args):
+        fn(*fn_args)
+
+    print(f"{'mode':>10} {'delay_s':>8} {'human_p50_ms':>13} {'human_p95_ms':>13} {'ai_p50_ms':>10} {'ai_p95_ms':>10}")
+    for delay in args.delays:
+        for mode, submit in (('inline', inline_submit), ('background', background_submit)):
+            fake_llm = FakeLLM(answers, delay=delay)
+            app.get_llm = lambda: fake_llm
+            app.ai_turn_runner.submit = submit
+            human, ai = play(app, client, f"bench-{mode}-{delay}", args.turns, word_offset=1000)
+            print(f"{mode:>10} {delay:>8.2f} "
+                  f"{percentile(human, 50) * 1000:>13.1f} {percentile(human, 95) * 1000:>13.1f} "
+                  f"{percentile(ai, 50) * 1000:>10.1f} {percentile(ai, 95) * 1000:>10.1f}")
+    app.ai_turn_runner.submit = background_submit
+
+
+if __name__ == '__main__':
+    main()
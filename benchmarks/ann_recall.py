@@ -0,0 +1,73 @@
+"""Recall and latency of the IVF index against exact KeyedVectors.most_similar.
+
+Builds (or loads) the IVF index over the GloVe vectors. For a sample of
+frequent query words it compares the approximate top-k with gensim's exact
+most_similar at several nprobe settings, and reports recall@k and
+per-query latency.
+
+Run from the directory holding the embedding model:
+    python benchmarks/ann_recall.py --queries 200 --k 10 --nprobe 1 2 4 8 16 32
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from gensim.models import KeyedVectors
+
+from ann_index import IVFIndex, open_or_build_index
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', default='glove-wiki-gigaword-50.model')
+    parser.add_argument('--index', default='glove-wiki-gigaword-50.ivf.npz')
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--query-pool', type=int, default=50000, help='sample queries from the N most frequent words')
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--nprobe', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument('--rebuild', action='store_true')
+    args = parser.parse_args()
+
+    model = KeyedVectors.load(args.model)
+    normed = model.get_normed_vectors()
+
+    started = time.perf_counter()
+    if args.rebuild:
+        index = IVFIndex.build(normed)
+        index.save(args.index)
+    else:
+        index = open_or_build_index(args.index, normed)
+    print(f"index ready in {time.perf_counter() - started:.2f}s: {index.nlist} cells over {len(normed)} vectors")
+
+    rng = np.random.default_rng(0)
+    pool = min(args.query_pool, len(model.index_to_key))
+    query_words = [model.index_to_key[i] for i in rng.choice(pool, size=min(args.queries, pool), replace=False)]
+
+    exact = {}
+    started = time.perf_counter()
+    for word in query_words:
+        exact[word] = {w for w, _ in model.most_similar(word, topn=args.k)}
+    exact_ms = (time.perf_counter() - started) * 1000 / len(query_words)
+    print(f"{'method':>14} {'recall@' + str(args.k):>10} {'ms/query':>9} {'speedup':>8}")
+    print(f"{'exact':>14} {1.0:>10.3f} {exact_ms:>9.3f} {1.0:>8.1f}")
+
+    for nprobe in args.nprobe:
+        hits = 0
+        started = time.perf_counter()
+        results = {
+            word: index.most_similar(word, model.key_to_index, model.index_to_key, topn=args.k, nprobe=nprobe)
+            for word in query_words
+        }
+        elapsed_ms = (time.perf_counter() - started) * 1000 / len(query_words)
+        for word, neighbours in results.items():
+            hits += len(exact[word] & {w for w, _ in neighbours})
+        recall = hits / (len(query_words) * args.k)
+        print(f"{'ivf nprobe=' + str(nprobe):>14} {recall:>10.3f} {elapsed_ms:>9.3f} {exact_ms / elapsed_ms:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
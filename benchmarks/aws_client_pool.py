@@ -0,0 +1,135 @@
+"""Per-call overhead of AWS clients: a new client per call vs the shared pooled clients.
+
+Bedrock and DynamoDB are replaced by a local HTTP stub that answers
+invoke_model and GetItem immediately, so the numbers are client overhead:
+building the client, signing, and opening connections. The stub counts TCP
+connections, showing how many calls reuse a pooled keep-alive connection.
+
+    python benchmarks/aws_client_pool.py --calls 200 --threads 8
+"""
+import argparse
+import json
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from fakes import percentile
+
+os.environ.setdefault('ACCESS_KEY_ID', 'benchmark')
+os.environ.setdefault('SECRET_ACCESS_KEY', 'benchmark')
+
+import boto3
+
+import aws_clients
+
+EMBEDDING_RESPONSE = json.dumps({'embedding': [0.1] * 256, 'inputTextTokenCount': 1}).encode()
+ITEM_RESPONSE = json.dumps({'Item': {'user_id': {'S': 'user-1'}, 'total_games': {'N': '12'}}}).encode()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    connections = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        # Headers and body go out in separate writes; without this, Nagle's
+        # algorithm stalls every keep-alive response on the client's delayed ACK
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with StubHandler.lock:
+            StubHandler.connections += 1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if self.path.startswith('/model/'):
+            body, content_type = EMBEDDING_RESPONSE, 'application/json'
+        else:
+            body, content_type = ITEM_RESPONSE, 'application/x-amz-json-1.0'
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def invoke_embedding(client):
+    response = client.invoke_model(body=json.dumps({'inputText': 'house'}), modelId='amazon.titan-embed-text-v2:0',
+                                   accept='application/json', contentType='application/json')
+    return json.loads(response['body'].read())
+
+
+def get_stats_item(table):
+    return table.get_item(Key={'user_id': 'user-1'})
+
+
+def per_call_embedding():
+    # What embedding.generate_embeddings used to do
+    client = boto3.client('bedrock-runtime', region_name='eu-west-3', aws_access_key_id='benchmark',
+                          aws_secret_access_key='benchmark')
+    return invoke_embedding(client)
+
+
+def per_call_dynamodb():
+    resource = boto3.resource('dynamodb', region_name='eu-west-3', aws_access_key_id='benchmark',
+                              aws_secret_access_key='benchmark')
+    return get_stats_item(resource.Table('ContextoUserStats'))
+
+
+def pooled_embedding():
+    return invoke_embedding(aws_clients.get_client('bedrock-runtime'))
+
+
+def pooled_dynamodb():
+    return get_stats_item(aws_clients.get_dynamodb().Table('ContextoUserStats'))
+
+
+def run(fn, calls, threads):
+    def timed(_):
+        start = time.perf_counter()
+        fn()
+        return (time.perf_counter() - start) * 1000
+
+    StubHandler.connections = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        latencies = list(pool.map(timed, range(calls)))
+    return latencies, time.perf_counter() - start, StubHandler.connections
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--calls', type=int, default=200)
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ['AWS_ENDPOINT_URL'] = f'http://127.0.0.1:{server.server_address[1]}'
+
+    # Warm up the botocore loaders so both variants start from the same caches
+    per_call_embedding()
+    per_call_dynamodb()
+
+    print(f"{args.calls} calls on {args.threads} threads against a local stub")
+    print(f"{'variant':>24} {'p50 ms':>8} {'p95 ms':>8} {'calls/s':>9} {'connections':>12}")
+    for name, fn in (
+        ('bedrock per-call client', per_call_embedding),
+        ('bedrock pooled client', pooled_embedding),
+        ('dynamodb per-call', per_call_dynamodb),
+        ('dynamodb pooled', pooled_dynamodb),
+    ):
+        latencies, elapsed, connections = run(fn, args.calls, args.threads)
+        print(f"{name:>24} {percentile(latencies, 50):>8.2f} {percentile(latencies, 95):>8.2f} "
+              f"{args.calls / elapsed:>9.0f} {connections:>12}")
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""Binary (Hamming) ranks vs float cosine ranks: size, speed and agreement.
+
+For each code width, builds a BinaryRankEngine over the embedding store and
+compares it with the float RankEngine on sampled target words:
+
+- index size in bytes,
+- time to score the whole vocabulary against a target, and to build a
+  full rank table (score + argsort),
+- recall@k: share of the float top-k that is also in the binary top-k,
+- Spearman correlation of the two rank tables over the float top 1000,
+- mean absolute error of binary similarities against float cosines.
+
+Run from the directory holding the model files:
+    python benchmarks/binary_ranks.py --bits 0 128 256 512 1024 --targets 50
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+from fakes import REPO_ROOT  # noqa: F401  (puts the repo on sys.path)
+
+from binary_similarity import BinaryRankEngine
+from embedding_store import open_or_build
+from rank_engine import RankEngine
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+
+def spearman(a, b):
+    a = np.argsort(np.argsort(a)).astype(np.float64)
+    b = np.argsort(np.argsort(b)).astype(np.float64)
+    return float(np.corrcoef(a, b)[0, 1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--store', default=os.getenv('EMBEDDING_STORE_PATH', 'glove-wiki-gigaword-50.store'))
+    parser.add_argument('--model', default='glove-wiki-gigaword-50.model')
+    parser.add_argument('--bits', type=int, nargs='+', default=[0, 128, 256, 512, 1024],
+                        help='code widths; 0 uses one sign bit per dimension')
+    parser.add_argument('--targets', type=int, default=50)
+    parser.add_argument('--target-pool', type=int, default=5000, help='sample targets from the most frequent words')
+    args = parser.parse_args()
+
+    model = open_or_build(args.store, args.model)
+    vectors = model.get_normed_vectors()
+    rng = np.random.default_rng(0)
+    targets = rng.choice(min(args.target_pool, len(vectors)), size=args.targets, replace=False)
+    pairs = rng.integers(0, len(vectors), size=(2, 10000))
+
+    float_engine = RankEngine(vectors, model.key_to_index, cache_dir=None)
+    float_tables = {int(t): float_engine._compute(int(t)) for t in targets}
+    float_pair_sims = float_engine.similarities(pairs[0], pairs[1])
+    float_score_ms, _ = timed(lambda: float_engine.scores(int(targets[0])), 20)
+    float_table_ms, _ = timed(lambda: float_engine._compute(int(targets[0])), 5)
+
+    print(f"{len(vectors)} words x {vectors.shape[1]} dims, {args.targets} targets")
+    print(f"{'engine':>12} {'bytes':>11} {'score ms':>9} {'table ms':>9} {'R@10':>6} {'R@100':>6} "
+          f"{'R@1000':>7} {'spearman':>9} {'sim MAE':>8}")
+    print(f"{'float32':>12} {vectors.size * 4:>11} {float_score_ms:>9.2f} {float_table_ms:>9.2f} "
+          f"{1:>6.3f} {1:>6.3f} {1:>7.3f} {1:>9.3f} {0:>8.3f}")
+
+    for bits in args.bits:
+        engine = BinaryRankEngine.from_vectors(vectors, model.key_to_index, n_bits=bits or None, cache_dir=None)
+        score_ms, _ = timed(lambda: engine.scores(int(targets[0])), 20)
+        table_ms, _ = timed(lambda: engine._compute(int(targets[0])), 5)
+
+        recalls = {10: [], 100: [], 1000: []}
+        correlations = []
+        for target in targets:
+            reference = float_tables[int(target)]
+            ranks = engine._compute(int(target))
+            for k in recalls:
+                top_float = reference <= k
+                recalls[k].append(np.count_nonzero(top_float & (ranks <= k)) / k)
+            top = np.flatnonzero(reference <= 1000)
+            correlations.append(spearman(reference[top], ranks[top]))
+        error = np.abs(engine.similarities(pairs[0], pairs[1]) - float_pair_sims).mean()
+
+        name = f"{engine.n_bits}-bit" + (" sign" if not bits else "")
+        print(f"{name:>12} {engine.nbytes:>11} {score_ms:>9.2f} {table_ms:>9.2f} "
+              f"{np.mean(recalls[10]):>6.3f} {np.mean(recalls[100]):>6.3f} {np.mean(recalls[1000]):>7.3f} "
+              f"{np.mean(correlations):>9.3f} {error:>8.3f}")
+
+
+if __name__ == '__main__':
+    main()
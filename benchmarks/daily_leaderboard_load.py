@@ -0,0 +1,229 @@
+"""Load test of the daily leaderboard: thousands of players finishing at once.
+
+Runs against moto's in-memory DynamoDB. `--finishers` players each save a
+solved game from `--threads` concurrent workers; a share of them finish a
+second time (a better or worse solve) and some saves are replayed, as the
+history queue does after a failure. The run is repeated with one shard and
+with `--shards` shards, each on its own day.
+
+Reports save throughput and latency, transaction retries, the share of
+writes that land on the busiest partition key (a single key is what
+DynamoDB throttles first), and then checks the results against a brute-force
+ranking: the top-K, the player count and sampled players' own ranks. Reads
+per top-K and per rank lookup are compared with a scan of the board.
+
+moto does not model partition throughput, so the hot-key share is the
+number to watch rather than the latency. moto is not thread-safe either, so
+it serves one request at a time; the workers still interleave their reads
+and conditional transactions request by request. moto also snapshots the
+whole table for every action of a transaction so it can roll back, which
+makes a run quadratic in its size; the harness skips the snapshot when
+none of the transaction's conditions fail (see cheap_moto_transactions).
+
+Requires moto (pip install moto):
+    python benchmarks/daily_leaderboard_load.py --finishers 3000 --threads 64 --shards 10
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault('ACCESS_KEY_ID', 'benchmark')
+os.environ.setdefault('SECRET_ACCESS_KEY', 'benchmark')
+
+from boto3.dynamodb.conditions import Key
+from moto import mock_aws
+
+from fakes import percentile, serialize_requests
+
+
+def cheap_moto_transactions():
+    import types
+    from moto.dynamodb import models
+
+    transact = models.DynamoDBBackend.transact_write_items
+    no_copy = types.SimpleNamespace(deepcopy=lambda value: value)
+
+    def conditions_hold(backend, transact_items):
+        for action in transact_items:
+            _, op = next(iter(action.items()))
+            if not op.get('ConditionExpression'):
+                continue
+            table = backend.get_table(op['TableName'])
+            key = op.get('Key') or {name: op['Item'][name] for name in (table.hash_key_attr, table.range_key_attr)
+                                   if name}
+            condition = models.get_filter_expression(
+                op['ConditionExpression'], op.get('ExpressionAttributeNames'), op.get('ExpressionAttributeValues'))
+            if not condition.expr(backend.get_item(op['TableName'], key)):
+                return False
+        return True
+
+    def transact_write_items(self, transact_items):
+        if not conditions_hold(self, transact_items):
+            return transact(self, transact_items)  # will roll back, so it needs its snapshot
+        # Requests are serialized (serialize_requests), so swapping the module is safe
+        models.copy, real_copy = no_copy, models.copy
+        try:
+            return transact(self, transact_items)
+        finally:
+            models.copy = real_copy
+    models.DynamoDBBackend.transact_write_items = transact_write_items
+
+
+class CallCounter:
+    """Tallies transaction writes per partition key, retries, and items read, from botocore events"""
+
+    def __init__(self, client):
+        self.lock = threading.Lock()
+        self.writes_per_key = Counter()
+        self.cancelled = 0
+        self.items_read = 0
+        self.calls = 0
+        client.meta.events.register('provide-client-params.dynamodb.TransactWriteItems', self._before_transaction)
+        client.meta.events.register('after-call.dynamodb', self._after)
+
+    def _before_transaction(self, params, **kwargs):
+        with self.lock:
+            for action in params['TransactItems']:
+                body = next(iter(action.values()))
+                key = body.get('Key') or body.get('Item')
+                self.writes_per_key[key['pk']] += 1
+
+    def _after(self, http_response, parsed, model, **kwargs):
+        with self.lock:
+            self.calls += 1
+            if model.name == 'TransactWriteItems' and http_response.status_code != 200:
+                self.cancelled += 1
+            if model.name in ('Query', 'Scan'):
+                self.items_read += parsed.get('ScannedCount', parsed.get('Count', 0))
+            elif model.name == 'GetItem':
+                self.items_read += 1
+            elif model.name == 'BatchGetItem':
+                self.items_read += sum(len(items) for items in parsed.get('Responses', {}).values())
+
+    def reset(self):
+        with self.lock:
+            self.writes_per_key.clear()
+            self.cancelled = self.items_read = self.calls = 0
+
+
+def make_games(finishers, repeat_share, replay_share, played_at, rng):
+    games = []
+    for i in range(finishers):
+        user_id = f"user-{i:06d}"
+        games.append({'game_id': f"{user_id}-a", 'user_id': user_id, 'target_word': 'benchmark', 'guesses_count': rng.randint(3, 60),
+                      'time_taken': rng.randint(20, 900), 'played_at': played_at, 'completed': True})
+        if rng.random() < repeat_share:
+            games.append({'game_id': f"{user_id}-b", 'user_id': user_id, 'target_word': 'benchmark',
+                          'guesses_count': rng.randint(3, 60),
+                          'time_taken': rng.randint(20, 900), 'played_at': played_at, 'completed': True})
+    games += [dict(game) for game in rng.sample(games, int(len(games) * replay_share))]
+    rng.shuffle(games)
+    return games
+
+
+def expected_ranking(storage, games):
+    best = {}
+    for game in games:
+        score = storage.leaderboard_score(game['guesses_count'], game['time_taken'], game['user_id'])
+        best[game['user_id']] = min(score, best.get(game['user_id'], score))
+    ordered = sorted(best.items(), key=lambda item: item[1])
+    return [user_id for user_id, _ in ordered]
+
+
+def run(storage, counter, games, threads, shards, top_k, samples, rng):
+    storage.DAILY_LEADERBOARD_SHARDS = shards
+    day = storage.leaderboard_day(games[0]['played_at'])
+    board_key = storage.daily_board(day, 'benchmark')
+    counter.reset()
+
+    latencies = []
+    latency_lock = threading.Lock()
+
+    def save(game):
+        start = time.perf_counter()
+        storage.record_daily_result(game)
+        with latency_lock:
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(save, games))
+    elapsed = time.perf_counter() - start
+    writes = sum(counter.writes_per_key.values())
+    hottest = max(counter.writes_per_key.values()) / writes
+    cancelled = counter.cancelled
+
+    ranking = expected_ranking(storage, games)
+    counter.reset()
+    success, board = storage.get_daily_leaderboard('benchmark', day, top_k)
+    top_reads = counter.items_read
+    top_ok = success and [entry['user_id'] for entry in board['leaderboard']] == ranking[:top_k]
+    players_ok = success and board['totalPlayers'] == len(ranking)
+
+    sampled = rng.sample(range(len(ranking)), min(samples, len(ranking)))
+    counter.reset()
+    ranks_ok = 0
+    for position in sampled:
+        success, result = storage.get_daily_leaderboard('benchmark', day, 0, ranking[position])
+        ranks_ok += success and result['player']['rank'] == position + 1
+    rank_reads = (counter.items_read / len(sampled)) if sampled else 0
+
+    table = storage.get_dynamodb().Table(storage.DAILY_LEADERBOARD_TABLE)
+    # What ranking by scanning would have to read: every entry of the board
+    scan_reads = sum(
+        table.query(KeyConditionExpression=Key('pk').eq(f"{board_key}#entries#{shard}"), Select='COUNT')['Count']
+        for shard in range(shards)
+    )
+
+    return {
+        'saves': len(games), 'per_second': len(games) / elapsed, 'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000, 'cancelled': cancelled, 'hottest': hottest,
+        'top_ok': top_ok, 'players_ok': players_ok, 'ranks_ok': ranks_ok, 'samples': len(sampled),
+        'top_reads': top_reads, 'rank_reads': rank_reads, 'scan_reads': scan_reads,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--finishers', type=int, default=3000)
+    parser.add_argument('--threads', type=int, default=64)
+    parser.add_argument('--shards', type=int, default=10)
+    parser.add_argument('--repeat-share', type=float, default=0.2, help='players who finish twice')
+    parser.add_argument('--replay-share', type=float, default=0.05, help='saves delivered twice')
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--samples', type=int, default=50, help='players whose own rank is checked')
+    args = parser.parse_args()
+
+    serialize_requests()
+    cheap_moto_transactions()
+    with mock_aws():
+        import storage
+        import dynamodb
+        dynamodb.create_tables()
+
+        counter = CallCounter(storage.get_dynamodb().meta.client)
+        print(f"{args.finishers} finishers, {args.threads} threads, top {args.top}")
+        print(f"{'shards':>6} {'saves':>6} {'saves/s':>8} {'p50 ms':>7} {'p95 ms':>7} {'retries':>8} "
+              f"{'hot key':>8} {'top-K':>6} {'players':>8} {'ranks':>7} {'reads/top':>10} {'reads/rank':>11} "
+              f"{'day items':>10}")
+        for run_number, shards in enumerate((1, args.shards)):
+            rng = random.Random(run_number)
+            played_at = int(time.time()) - (run_number + 1) * 86400
+            games = make_games(args.finishers, args.repeat_share, args.replay_share, played_at, rng)
+            result = run(storage, counter, games, args.threads, shards, args.top, args.samples, rng)
+            print(f"{shards:>6} {result['saves']:>6} {result['per_second']:>8.0f} {result['p50_ms']:>7.1f} "
+                  f"{result['p95_ms']:>7.1f} {result['cancelled']:>8} {result['hottest']:>8.1%} "
+                  f"{'ok' if result['top_ok'] else 'WRONG':>6} {'ok' if result['players_ok'] else 'WRONG':>8} "
+                  f"{result['ranks_ok']:>3}/{result['samples']:<3} {result['top_reads']:>10} "
+                  f"{result['rank_reads']:>11.1f} {result['scan_reads']:>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,192 @@
+"""Read capacity of the user and history paths: table scans vs key/index queries.
+
+Runs against moto's in-memory DynamoDB. It seeds users and game history,
+then calls each read path with the previous scan-based code (reproduced
+below) and with the functions in storage.py, which use key and index
+queries and read user stats from a per-user aggregate item.
+
+moto reports a flat 1 capacity unit per call. Read units are therefore
+estimated the way DynamoDB bills them: from the size of every item a Scan or
+Query reads, not just the ones it returns, rounded up to 4 KB per request at
+0.5 RCU per 4 KB (eventually consistent).
+
+Requires moto (pip install moto):
+    python benchmarks/dynamodb_read_units.py --users 200 --games-per-user 25
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+import uuid
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault('ACCESS_KEY_ID', 'benchmark')
+os.environ.setdefault('SECRET_ACCESS_KEY', 'benchmark')
+
+from boto3.dynamodb.conditions import Attr
+from moto import mock_aws
+
+
+def item_size(item):
+    """Approximate DynamoDB item size in bytes"""
+    size = 0
+    for name, value in item.items():
+        size += len(name.encode('utf-8'))
+        if isinstance(value, str):
+            size += len(value.encode('utf-8'))
+        elif isinstance(value, bool):
+            size += 1
+        else:
+            size += len(str(value)) // 2 + 1
+    return size
+
+
+class ReadUnitCounter:
+    """Estimates read units per operation from botocore events"""
+
+    def __init__(self, client, average_item_size):
+        self.average_item_size = average_item_size
+        self.read_units = defaultdict(float)
+        self.items_read = defaultdict(int)
+        self.calls = defaultdict(int)
+        self.label = None
+        client.meta.events.register('before-parameter-build.dynamodb', self._before)
+        client.meta.events.register('after-call.dynamodb', self._after)
+
+    def _before(self, params, context, **kwargs):
+        context['benchmark_table'] = params.get('TableName')
+
+    def _after(self, parsed, model, context, **kwargs):
+        if self.label is None or model.name not in ('Scan', 'Query', 'GetItem'):
+            return
+        if model.name == 'GetItem':
+            read = 1 if parsed.get('Item') else 0
+        else:
+            read = parsed.get('ScannedCount', 0)
+        size = read * self.average_item_size.get(context.get('benchmark_table'), 0)
+        self.read_units[self.label] += max(1, math.ceil(size / 4096)) * 0.5
+        self.items_read[self.label] += read
+        self.calls[self.label] += 1
+
+
+# Previous implementations, kept here for comparison
+def legacy_get_user_game_history(dynamodb, user_id, limit=10):
+    table = dynamodb.Table('ContextoGameHistory')
+    response = table.scan(FilterExpression=Attr('user_id').eq(user_id), Limit=limit)
+    items = sorted(response['Items'], key=lambda x: x.get('played_at', 0), reverse=True)
+    return items[:limit]
+
+
+def legacy_get_user_games(dynamodb, user_id):
+    table = dynamodb.Table('ContextoGameHistory')
+    return table.scan(FilterExpression=Attr('user_id').eq(user_id))['Items']
+
+
+def legacy_find_user(dynamodb, attribute, value):
+    table = dynamodb.Table('ContextoUsers')
+    items = table.scan(FilterExpression=Attr(attribute).eq(value))['Items']
+    return items[0] if items else None
+
+
+def seed(storage, users, games_per_user):
+    rng = random.Random(0)
+    users_table = storage.get_dynamodb().Table(storage.USERS_TABLE)
+    history_table = storage.get_dynamodb().Table(storage.GAME_HISTORY_TABLE)
+    seeded = []
+    now = int(time.time())
+    with users_table.batch_writer() as batch:
+        for i in range(users):
+            user = {
+                'user_id': str(uuid.uuid4()),
+                'username': f'player{i}',
+                'email': f'player{i}@example.com',
+                'password_hash': '$2b$12$' + 'x' * 53,
+                'created_at': now,
+                'last_login': now,
+                'games_played': games_per_user,
+                'best_score': 1
+            }
+            batch.put_item(Item=user)
+            seeded.append(user)
+    with history_table.batch_writer() as batch:
+        for user in seeded:
+            for game in range(games_per_user):
+                batch.put_item(Item={
+                    'game_id': str(uuid.uuid4()),
+                    'user_id': user['user_id'],
+                    'target_word': rng.choice(['house', 'table', 'chair', 'book']),
+                    'guesses_count': rng.randint(1, 60),
+                    'final_rank': rng.randint(1, 500),
+                    'played_at': now - game * 3600,
+                    'completed': rng.random() < 0.7,
+                    'time_taken': rng.randint(10, 900)
+                })
+    # Backfill the stats aggregates, as the first stats read would
+    for user in seeded:
+        storage.rebuild_user_stats(user['user_id'])
+    return seeded
+
+
+def average_sizes(storage):
+    sizes = {}
+    for name in (storage.USERS_TABLE, storage.GAME_HISTORY_TABLE, storage.USER_STATS_TABLE):
+        items = storage.get_dynamodb().Table(name).scan()['Items']
+        sizes[name] = sum(item_size(item) for item in items) / max(1, len(items))
+    return sizes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--games-per-user', type=int, default=25)
+    parser.add_argument('--samples', type=int, default=20, help='users to look up per path')
+    args = parser.parse_args()
+
+    with mock_aws():
+        import storage
+        import dynamodb
+        dynamodb.create_tables()
+
+        users = seed(storage, args.users, args.games_per_user)
+        counter = ReadUnitCounter(storage.get_dynamodb().meta.client, average_sizes(storage))
+        sample = random.Random(1).sample(users, min(args.samples, len(users)))
+        db = storage.get_dynamodb()
+        complete = defaultdict(int)
+
+        paths = [
+            ('game_history', lambda u: legacy_get_user_game_history(db, u['user_id']),
+             lambda u: storage.get_user_game_history(u['user_id'])[1],
+             lambda result: len(result) == min(10, args.games_per_user)),
+            ('user_stats', lambda u: legacy_get_user_games(db, u['user_id']),
+             lambda u: storage.get_user_stats(u['user_id'])[1],
+             lambda result: (result['total_games'] if isinstance(result, dict) else len(result)) == args.games_per_user),
+            ('find_username', lambda u: legacy_find_user(db, 'username', u['username']),
+             lambda u: storage.find_user_by(db.Table(storage.USERS_TABLE), storage.USERNAME_INDEX, 'username', u['username']),
+             lambda result: result is not None),
+            ('find_email', lambda u: legacy_find_user(db, 'email', u['email']),
+             lambda u: storage.find_user_by(db.Table(storage.USERS_TABLE), storage.EMAIL_INDEX, 'email', u['email']),
+             lambda result: result is not None),
+        ]
+        for name, legacy, current, is_complete in paths:
+            for variant, fn in (('scan', legacy), ('indexed', current)):
+                counter.label = (name, variant)
+                for user in sample:
+                    complete[(name, variant)] += bool(is_complete(fn(user)))
+        counter.label = None
+
+    print(f"{len(users)} users, {len(users) * args.games_per_user} history items, {len(sample)} lookups per path")
+    print(f"{'path':>14} {'variant':>8} {'calls':>6} {'items read':>11} {'est. RCU':>9} {'RCU/lookup':>11} {'complete':>9}")
+    for name, *_ in paths:
+        for variant in ('scan', 'indexed'):
+            key = (name, variant)
+            print(f"{name:>14} {variant:>8} {counter.calls[key]:>6} {counter.items_read[key]:>11} "
+                  f"{counter.read_units[key]:>9.1f} {counter.read_units[key] / len(sample):>11.2f} "
+                  f"{complete[key]:>4}/{len(sample)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""Pruned, quantized embedding stores vs the full gensim model: size, cold start and rank fidelity.
+
+Build the stores first with glove-wiki.py, e.g.
+    python glove-wiki.py --store g-int8.store --dtype int8 --vocab-size 100000
+
+For the full model and each store this reports:
+
+- bytes on disk, which is what the image carries,
+- cold start in a fresh interpreter: imports, loading the vectors and
+  building the first rank table, plus the process's peak RSS
+  (best of --runs, warm page cache),
+- kept@1000: share of the full model's 1000 nearest words that are still in
+  the store's vocabulary (what pruning drops, mostly numbers and tokens
+  players can't guess),
+- recall@k and Spearman over the top 1000 against the full model's float32
+  ranking restricted to the store's vocabulary (what quantization changes),
+- mean absolute error of similarities against float32 cosines.
+
+Run from the directory holding the model:
+    python benchmarks/embedding_artifact.py g-int8.store g-float16.store --targets 50
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+from fakes import REPO_ROOT
+
+from embedding_store import EmbeddingStore
+from rank_engine import RankEngine
+
+COLD_START = {
+    'model': (
+        "from gensim.models import KeyedVectors\n"
+        "model = KeyedVectors.load(PATH)\n"
+        "vectors, key_to_index = model.get_normed_vectors(), model.key_to_index\n"
+    ),
+    'store': (
+        "from embedding_store import EmbeddingStore\n"
+        "model = EmbeddingStore(PATH)\n"
+        "vectors, key_to_index = model.get_normed_vectors(), model.key_to_index\n"
+    ),
+}
+TIMER = (
+    "import json, time\n"
+    "start = time.perf_counter()\n"
+    "{load}"
+    "from rank_engine import RankEngine\n"
+    "RankEngine(vectors, key_to_index, cache_dir=None).lookup('water', 'house')\n"
+    "seconds = time.perf_counter() - start\n"
+    # VmHWM starts over at exec, unlike ru_maxrss, which counts the parent's pages from before it
+    "peak = next(line for line in open('/proc/self/status') if line.startswith('VmHWM'))\n"
+    "print(json.dumps({{'seconds': seconds, 'peak_rss_mb': int(peak.split()[1]) / 1024}}))\n"
+)
+
+
+def disk_bytes(path):
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+    # gensim keeps large arrays next to the .model file
+    directory = os.path.dirname(path) or '.'
+    return sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory)
+               if name.startswith(os.path.basename(path)))
+
+
+def cold_start(kind, path, runs):
+    code = f"PATH = {path!r}\n" + TIMER.format(load=COLD_START[kind])
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT)
+    results = [json.loads(subprocess.run([sys.executable, '-c', code], env=env, check=True, capture_output=True,
+                                         text=True).stdout.strip().splitlines()[-1]) for _ in range(runs)]
+    return min(r['seconds'] for r in results), min(r['peak_rss_mb'] for r in results)
+
+
+def spearman(a, b):
+    a = np.argsort(np.argsort(a)).astype(np.float64)
+    b = np.argsort(np.argsort(b)).astype(np.float64)
+    return float(np.corrcoef(a, b)[0, 1])
+
+
+def fidelity(full_vectors, full_keys, store, targets):
+    """kept@1000, recall@10/100/1000, Spearman@1000 and similarity MAE of a store against the full model"""
+    store_vectors = store.get_normed_vectors()
+    # Rows of the full matrix for each store word, in store order
+    to_full = np.array([full_keys[word] for word in store.index_to_key], dtype=np.int64)
+    restricted = full_vectors[to_full]
+    engine = RankEngine(store_vectors, store.key_to_index, cache_dir=None)
+
+    kept, recalls, correlations, errors = [], {10: [], 100: [], 1000: []}, [], []
+    in_store = np.zeros(len(full_vectors), dtype=bool)
+    in_store[to_full] = True
+    for word in targets:
+        full_target = full_vectors[full_keys[word]]
+        full_top = np.argsort(-(full_vectors @ full_target))[1:1001]
+        kept.append(in_store[full_top].mean())
+
+        target = store.key_to_index[word]
+        reference_sims = restricted @ full_target
+        order_sims = reference_sims.copy()
+        order_sims[target] = np.inf
+        reference = np.empty(len(order_sims), dtype=np.int64)
+        reference[np.argsort(-order_sims, kind='stable')] = np.arange(1, len(order_sims) + 1)
+        ranks = engine._compute(target)
+        for k in recalls:
+            recalls[k].append(np.count_nonzero((reference <= k) & (ranks <= k)) / k)
+        top = np.flatnonzero(reference <= 1000)
+        correlations.append(spearman(reference[top], ranks[top]))
+        store_sims = np.asarray(store_vectors @ store_vectors[target], dtype=np.float32)
+        errors.append(np.abs(store_sims[top] - reference_sims[top]).mean())
+    return np.mean(kept), {k: np.mean(v) for k, v in recalls.items()}, np.mean(correlations), np.mean(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('stores', nargs='+')
+    parser.add_argument('--model', default='glove-wiki-gigaword-50.model')
+    parser.add_argument('--targets', type=int, default=50)
+    parser.add_argument('--target-pool', type=int, default=5000, help='sample targets from the most frequent words')
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    from gensim.models import KeyedVectors
+    model = KeyedVectors.load(args.model)
+    full_vectors = model.get_normed_vectors()
+    stores = {path: EmbeddingStore(path) for path in args.stores}
+    # Targets every store can score, drawn from the most frequent words
+    pool = [word for word in model.index_to_key[:args.target_pool]
+            if all(word in store.key_to_index for store in stores.values())]
+    targets = list(np.random.default_rng(0).choice(pool, size=min(args.targets, len(pool)), replace=False))
+
+    print(f"full model: {len(full_vectors)} words x {full_vectors.shape[1]} dims; {len(targets)} targets; "
+          f"cold start is the best of {args.runs} runs")
+    print(f"{'artifact':>24} {'words':>7} {'dtype':>7} {'MB':>6} {'start s':>8} {'RSS MB':>7} {'kept@1k':>8} "
+          f"{'R@10':>6} {'R@100':>6} {'R@1000':>7} {'spearman':>9} {'sim MAE':>8}")
+    seconds, rss = cold_start('model', args.model, args.runs)
+    print(f"{os.path.basename(args.model):>24} {len(full_vectors):>7} {'float32':>7} "
+          f"{disk_bytes(args.model) / 1e6:>6.1f} {seconds:>8.2f} {rss:>7.0f} {1:>8.3f} {1:>6.3f} {1:>6.3f} "
+          f"{1:>7.3f} {1:>9.3f} {0:>8.4f}")
+    for path, store in stores.items():
+        seconds, rss = cold_start('store', path, args.runs)
+        kept, recalls, correlation, error = fidelity(full_vectors, model.key_to_index, store, targets)
+        print(f"{os.path.basename(path):>24} {len(store):>7} {store.meta['dtype']:>7} "
+              f"{disk_bytes(path) / 1e6:>6.1f} {seconds:>8.2f} {rss:>7.0f} {kept:>8.3f} {recalls[10]:>6.3f} "
+              f"{recalls[100]:>6.3f} {recalls[1000]:>7.3f} {correlation:>9.3f} {error:>8.4f}")
+
+
+if __name__ == '__main__':
+    main()
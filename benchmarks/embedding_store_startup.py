@@ -0,0 +1,123 @@
+"""Startup time and memory of KeyedVectors.load vs the mmap EmbeddingStore.
+
+Spawns several fresh interpreters per loader at once, like gunicorn workers.
+Each one loads the vectors the way app.py does, touches the whole normalized
+matrix and reports its load time and RSS split into private (RssAnon) and
+file-backed (RssFile) pages. While all workers are alive the parent also reads
+their PSS, which divides shared pages between processes. That gives the real
+combined footprint.
+
+Usage:
+    python benchmarks/embedding_store_startup.py --workers 4 \\
+        --model glove-wiki-gigaword-50.model --store glove-wiki-gigaword-50.store
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+WORKER = r'''
+import json, sys, time
+t0 = time.perf_counter()
+kind, model_path, store_path = sys.argv[1:4]
+if kind == "keyedvectors":
+    from gensim.models import KeyedVectors
+    model = KeyedVectors.load(model_path)
+else:
+    from embedding_store import EmbeddingStore
+    model = EmbeddingStore(store_path)
+matrix = model.get_normed_vectors()
+load_s = time.perf_counter() - t0
+checksum = float(matrix.sum(dtype="float64"))
+ready_s = time.perf_counter() - t0
+status = {}
+with open("/proc/self/status") as f:
+    for line in f:
+        key, _, value = line.partition(":")
+        if key in ("VmRSS", "RssAnon", "RssFile"):
+            status[key] = int(value.split()[0])
+print(json.dumps({"load_s": load_s, "ready_s": ready_s, "checksum": checksum, **status}), flush=True)
+sys.stdin.read()
+'''
+
+
+def read_pss_kb(pid):
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Pss:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def run_workers(kind, workers, model_path, store_path):
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT)
+    procs = [
+        subprocess.Popen(
+            [sys.executable, "-c", WORKER, kind, model_path, store_path],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, env=env, text=True,
+        )
+        for _ in range(workers)
+    ]
+    results = []
+    for proc in procs:
+        line = proc.stdout.readline()
+        if not line:
+            raise RuntimeError(f"{kind} worker exited without reporting")
+        results.append(json.loads(line))
+    pss = [read_pss_kb(proc.pid) for proc in procs]
+    for proc in procs:
+        proc.stdin.close()
+        proc.wait()
+    return results, pss
+
+
+def summarize(kind, results, pss):
+    n = len(results)
+    avg = lambda key: sum(r[key] for r in results) / n
+    total_pss = sum(p for p in pss if p is not None) if all(p is not None for p in pss) else None
+    return {
+        "loader": kind,
+        "workers": n,
+        "avg_load_s": round(avg("load_s"), 4),
+        "avg_ready_s": round(avg("ready_s"), 4),
+        "avg_rss_mb": round(avg("VmRSS") / 1024, 1),
+        "avg_rss_anon_mb": round(avg("RssAnon") / 1024, 1),
+        "avg_rss_file_mb": round(avg("RssFile") / 1024, 1),
+        "total_pss_mb": round(total_pss / 1024, 1) if total_pss is not None else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--model", default="glove-wiki-gigaword-50.model")
+    parser.add_argument("--store", default="glove-wiki-gigaword-50.store")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    from embedding_store import open_or_build
+    open_or_build(args.store, args.model)
+
+    rows = []
+    for kind in ("keyedvectors", "store"):
+        results, pss = run_workers(kind, args.workers, os.path.abspath(args.model), os.path.abspath(args.store))
+        rows.append(summarize(kind, results, pss))
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    header = list(rows[0].keys())
+    print("  ".join(f"{h:>16}" for h in header))
+    for row in rows:
+        print("  ".join(f"{str(row[h]):>16}" for h in header))
+
+
+if __name__ == "__main__":
+    main()
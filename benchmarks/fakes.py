@@ -0,0 +1,95 @@
+"""Local stand-ins for external services, shared by the benchmark scripts."""
+import os
+import re
+import sys
+import threading
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+
+class FakeMessage:
+    def __init__(self, content):
+        self.content = content
+
+
+class FakeLLM:
+    """Chat model stub that sleeps `delay` seconds per call.
+
+    Answers cycle through `answers`; `calls` counts invocations so benchmarks
+    can report round trips. With `token_delay`, answers are generated one
+    token (word plus trailing whitespace or punctuation) at a time after a
+    first-token wait of `delay`: `invoke` waits for all of them, `stream`
+    yields each as it is made and stops generating when closed.
+    `tokens_streamed` counts tokens generated, to show early stops.
+    `content_blocks` yields chunk content as Bedrock's list of text blocks.
+    """
+
+    def __init__(self, answers, delay=0.0, token_delay=0.0, content_blocks=False):
+        self.answers = list(answers)
+        self.delay = delay
+        self.token_delay = token_delay
+        self.content_blocks = content_blocks
+        self.calls = 0
+        self.tokens_streamed = 0
+        self._lock = threading.Lock()
+
+    def _next_answer(self):
+        with self._lock:
+            answer = self.answers[self.calls % len(self.answers)]
+            self.calls += 1
+        return answer
+
+    @staticmethod
+    def tokens(answer):
+        return re.findall(r"\w+\W*|\W+", answer)
+
+    def invoke(self, messages):
+        answer = self._next_answer()
+        delay = self.delay + self.token_delay * len(self.tokens(answer))
+        if delay:
+            time.sleep(delay)
+        return FakeMessage(answer)
+
+    def stream(self, messages):
+        answer = self._next_answer()
+        if self.delay:
+            time.sleep(self.delay)
+        for token in self.tokens(answer):
+            if self.token_delay:
+                time.sleep(self.token_delay)
+            with self._lock:
+                self.tokens_streamed += 1
+            yield FakeMessage([{"type": "text", "text": token}] if self.content_blocks else token)
+
+
+def serialize_requests():
+    """Send one botocore request at a time: moto's in-memory backends are not thread-safe"""
+    from botocore.endpoint import Endpoint
+
+    lock = threading.Lock()
+    send = Endpoint._do_get_response
+
+    def locked(self, *args, **kwargs):
+        with lock:
+            return send(self, *args, **kwargs)
+    Endpoint._do_get_response = locked
+
+
+def import_app():
+    """Import app.py with placeholder AWS credentials, from the current directory's model files"""
+    os.environ.setdefault("ACCESS_KEY_ID", "benchmark")
+    os.environ.setdefault("SECRET_ACCESS_KEY", "benchmark")
+    os.environ.setdefault("SESSION_BACKEND", "memory")
+    import app
+    return app
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
@@ -0,0 +1,106 @@
+"""game.py's word embeddings: the pickled {word: vector} dict vs the shared embedding store.
+
+Writes a synthetic word_embeddings.npy (--words random vectors of --dims)
+in a temporary directory, converts it with game.convert_embeddings, and
+compares:
+
+- starting a game: the previous Game.__init__ unpickled the whole dict for
+  every instance; now the first game opens the store and the rest share it,
+- the memory that costs (tracemalloc peak of one load; the store's
+  vectors are mapped from the file, so only its word -> row table counts),
+- calculate_similarity per call: two norms per call on the dict vs a dot
+  product of rows that were normalized once,
+- that both give the same similarities.
+
+Run from anywhere:
+    python benchmarks/game_embeddings.py --words 100000 --dims 50 --games 5
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from fakes import REPO_ROOT  # noqa: F401  (puts the repo on sys.path)
+
+os.environ.setdefault('ACCESS_KEY_ID', 'benchmark')
+os.environ.setdefault('SECRET_ACCESS_KEY', 'benchmark')
+
+
+class DictGame:
+    """The previous Game's embeddings handling"""
+
+    def __init__(self, path):
+        self.word_embeddings = np.load(path, allow_pickle=True).item()
+        self.words = list(self.word_embeddings.keys())
+
+    def calculate_similarity(self, word1, word2):
+        if word1 not in self.word_embeddings or word2 not in self.word_embeddings:
+            return 0.0
+        vec1 = self.word_embeddings[word1]
+        vec2 = self.word_embeddings[word2]
+        return float(np.dot(vec1, vec2) / (np.linalg.norm(vec1) * np.linalg.norm(vec2)))
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def peak_bytes(fn):
+    tracemalloc.start()
+    result = fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--words', type=int, default=100000)
+    parser.add_argument('--dims', type=int, default=50)
+    parser.add_argument('--games', type=int, default=5)
+    parser.add_argument('--pairs', type=int, default=20000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    word_embeddings = {f"w{i}": rng.standard_normal(args.dims).astype(np.float32) for i in range(args.words)}
+    with tempfile.TemporaryDirectory() as directory:
+        npy_path = os.path.join(directory, 'word_embeddings.npy')
+        np.save(npy_path, word_embeddings)
+        os.environ['EMBEDDINGS_STORE_PATH'] = os.path.join(directory, 'word_embeddings.store')
+        import game
+
+        game.EMBEDDINGS_PATH = npy_path
+        _, convert_seconds = timed(lambda: game.convert_embeddings(npy_path, game.EMBEDDINGS_STORE_PATH))
+
+        _, dict_peak = peak_bytes(lambda: DictGame(npy_path))
+        dict_games, dict_seconds = timed(lambda: [DictGame(npy_path) for _ in range(args.games)])
+        _, store_peak = peak_bytes(game.load_embeddings)
+
+        def start_games():
+            games = [game.Game() for _ in range(args.games)]
+            for started in games:
+                started.start_new_game()  # the first game to need the embeddings opens the store
+            return games
+        store_games, store_seconds = timed(start_games)
+
+        pairs = [(f"w{random.randrange(args.words)}", f"w{random.randrange(args.words)}") for _ in range(args.pairs)]
+        old, old_seconds = timed(lambda: [dict_games[0].calculate_similarity(a, b) for a, b in pairs])
+        new, new_seconds = timed(lambda: [store_games[-1].calculate_similarity(a, b) for a, b in pairs])
+
+    print(f"{args.words} words x {args.dims} dims, {args.games} games; conversion took {convert_seconds:.2f} s")
+    print(f"{'':>12} {'start ms/game':>14} {'load peak MB':>13} {'similarity us':>14}")
+    print(f"{'pickled dict':>12} {dict_seconds / args.games * 1000:>14.1f} {dict_peak / 1e6:>13.1f} "
+          f"{old_seconds / args.pairs * 1e6:>14.2f}")
+    print(f"{'store':>12} {store_seconds / args.games * 1000:>14.3f} {store_peak / 1e6:>13.1f} "
+          f"{new_seconds / args.pairs * 1e6:>14.2f}")
+    print(f"max similarity difference: {np.max(np.abs(np.array(old) - np.array(new))):.2e}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""When the player sees each half of a turn: /api/guess plus a separate AI stream vs /api/guess/stream.
+
+Replaces the Bedrock model with a stub that sleeps for a configurable delay
+and plays a game through Flask's test client, reading responses as they are
+streamed. For each turn it reports the time until the player's own rank
+arrives and until the AI's guess arrives, and the leaderboard bytes sent.
+
+- "previous": POST /api/guess, then GET /api/ai-guess/stream; both carry the
+  full leaderboard, and the old client showed the AI's word no sooner than
+  3 seconds after the guess ("shown" column).
+- "stream": POST /api/guess/stream, one response whose 'guess' and
+  'ai_guess' events carry leaderboard deltas, rendered as they arrive.
+
+Run from the directory holding the embedding model:
+    python benchmarks/guess_stream.py --delays 0.25 1 --turns 20
+"""
+import argparse
+import json
+import time
+
+from fakes import FakeLLM, import_app, percentile
+
+OLD_CLIENT_DELAY = 3.0
+
+
+def read_events(response, started):
+    """Yield (seconds since started, event name, data) for each server-sent event as it arrives"""
+    buffer = ''
+    for chunk in response.response:
+        buffer += chunk.decode() if isinstance(chunk, bytes) else chunk
+        while '\n\n' in buffer:
+            block, buffer = buffer.split('\n\n', 1)
+            fields = dict(line.split(': ', 1) for line in block.splitlines() if not line.startswith(':'))
+            if 'data' in fields:
+                yield time.perf_counter() - started, fields.get('event', 'message'), fields['data']
+    response.close()
+
+
+def leaderboard_bytes(payload):
+    data = json.loads(payload)
+    return len(json.dumps(data.get('leaderboard') or data.get('leaderboard_delta')))
+
+
+def turn_previous(client, headers, guess):
+    started = time.perf_counter()
+    response = client.post('/api/guess', json={'guess': guess}, headers=headers)
+    human = time.perf_counter() - started
+    data = response.get_json()
+    sent = len(json.dumps(data['leaderboard']))
+    ai = human
+    if data.get('ai_pending'):
+        stream = client.get(f"/api/ai-guess/stream?turn={data['ai_turn']}", headers=headers, buffered=False)
+        for ai, event, payload in read_events(stream, started):
+            sent += leaderboard_bytes(payload)
+    return data, human, ai, sent
+
+
+def turn_stream(client, headers, guess):
+    started = time.perf_counter()
+    response = client.post('/api/guess/stream', json={'guess': guess}, headers=headers, buffered=False)
+    data, human, ai, sent = None, None, None, 0
+    for seconds, event, payload in read_events(response, started):
+        if event == 'guess':
+            data, human = json.loads(payload), seconds
+            if data['status'] != 'success':
+                break
+        ai = seconds
+        sent += leaderboard_bytes(payload)
+    return data, human, ai, sent
+
+
+def play(client, session_id, turn, guesses):
+    headers = {'X-Session-Id': session_id}
+    client.post('/api/set-target-word', json={'index': 0}, headers=headers)
+    human_latencies, ai_latencies, sent = [], [], []
+    for number in range(len(guesses)):
+        data, human, ai, leaderboard_sent = turn(client, headers, guesses[number])
+        if data['status'] != 'success':
+            raise RuntimeError(f"Guess failed: {data}")
+        human_latencies.append(human)
+        ai_latencies.append(ai)
+        sent.append(leaderboard_sent)
+        if data['game_over']:
+            break
+    return human_latencies, ai_latencies, sent
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--delays', type=float, nargs='+', default=[0.25, 1.0])
+    parser.add_argument('--turns', type=int, default=20)
+    args = parser.parse_args()
+
+    app = import_app()
+    from llm_cache import LLMGuessCache
+    app.llm_cache = LLMGuessCache(max_entries=0)  # every AI turn asks the (fake) model
+    client = app.app.test_client()
+    # Words the AI accepts as answers (see embedding_store.COMMON_WORD_PATTERN)
+    words = [word for word in app.embeddings.get().model.index_to_key[1000:] if word.isalpha() and word.islower()]
+    guesses, answers = words[:args.turns], words[args.turns:args.turns * 11]
+
+    print(f"{'mode':>9} {'delay_s':>8} {'human_p50_ms':>13} {'ai_p50_ms':>10} {'ai_p95_ms':>10} "
+          f"{'shown_p50_ms':>13} {'board_B/turn':>13} {'last_turn_B':>12}")
+    for delay in args.delays:
+        for mode, turn in (('previous', turn_previous), ('stream', turn_stream)):
+            fake_llm = FakeLLM(answers, delay=delay)
+            app.get_llm = lambda: fake_llm
+            human, ai, sent = play(client, f"bench-{mode}-{delay}", turn, guesses)
+            shown = [max(seconds, OLD_CLIENT_DELAY) for seconds in ai] if mode == 'previous' else ai
+            print(f"{mode:>9} {delay:>8.2f} {percentile(human, 50) * 1000:>13.1f} "
+                  f"{percentile(ai, 50) * 1000:>10.1f} {percentile(ai, 95) * 1000:>10.1f} "
+                  f"{percentile(shown, 50) * 1000:>13.1f} {sum(sent) / len(sent):>13.0f} {sent[-1]:>12}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""Request-path cost of saving game history: blocking writes vs the write-behind queue.
+
+A fake writer sleeps `--write-ms` per call to stand in for a slow DynamoDB,
+optionally failing the first `--fail-first` calls to exercise retries. The
+script reports the caller-side latency of each approach, the queue's flush
+metrics, and checks that records spilled on close are replayed by a new
+queue.
+
+    python benchmarks/history_queue.py --records 500 --write-ms 40
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from fakes import percentile
+
+from history_queue import HistoryQueue
+
+
+class SlowWriter:
+    def __init__(self, delay, fail_first=0):
+        self.delay = delay
+        self.fail_first = fail_first
+        self.calls = 0
+        self.written = []
+        self.lock = threading.Lock()
+
+    def __call__(self, records):
+        with self.lock:
+            self.calls += 1
+            failing = self.calls <= self.fail_first
+        time.sleep(self.delay)
+        if failing:
+            raise RuntimeError("ProvisionedThroughputExceededException")
+        with self.lock:
+            self.written.extend(records)
+        return []
+
+
+def record(i):
+    return {'game': {'game_id': f'game-{i}', 'user_id': f'user-{i % 50}', 'guesses_count': 10, 'final_rank': 1,
+                     'completed': True}}
+
+
+def timed_calls(fn, count):
+    latencies = []
+    for i in range(count):
+        start = time.perf_counter()
+        fn(record(i))
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--records', type=int, default=500)
+    parser.add_argument('--write-ms', type=float, default=40.0)
+    parser.add_argument('--fail-first', type=int, default=2)
+    args = parser.parse_args()
+    delay = args.write_ms / 1000
+
+    blocking = SlowWriter(delay)
+    sync_latencies = timed_calls(lambda r: blocking([r]), min(args.records, 100))
+
+    spill_dir = tempfile.mkdtemp(prefix='history-spill-')
+    writer = SlowWriter(delay, fail_first=args.fail_first)
+    queue = HistoryQueue(writer, spill_dir=spill_dir, batch_size=25, flush_interval=0.2, backoff=0.05)
+    queue_latencies = timed_calls(queue.put, args.records)
+    deadline = time.monotonic() + 30
+    while queue.depth() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    metrics = queue.metrics()
+
+    print(f"{'path':>18} {'calls':>6} {'p50 ms':>8} {'p99 ms':>8}")
+    for name, latencies in (('blocking write', sync_latencies), ('queue.put', queue_latencies)):
+        print(f"{name:>18} {len(latencies):>6} {percentile(latencies, 50):>8.3f} {percentile(latencies, 99):>8.3f}")
+    print(f"queue: written={metrics['written']}/{args.records} flushes={metrics['flushes']} "
+          f"failed_flushes={metrics['failed_flushes']} flush latency ms={metrics['flush_latency_ms']}")
+
+    # Spill on close, replay on the next start
+    stalled = SlowWriter(delay, fail_first=10 ** 9)
+    queue = HistoryQueue(stalled, spill_dir=spill_dir, batch_size=25, flush_interval=0.05, backoff=10)
+    for i in range(100):
+        queue.put(record(i))
+    queue.close(timeout=1.0)
+    spilled = queue.metrics()['spilled']
+
+    replay_writer = SlowWriter(0)
+    queue = HistoryQueue(replay_writer, spill_dir=spill_dir, batch_size=25, flush_interval=0.05)
+    queue.start()
+    replayed = queue.metrics()['replayed']
+    queue.close(timeout=5.0)
+    ids = {r['game']['game_id'] for r in replay_writer.written}
+    print(f"spill/replay: spilled={spilled} replayed={replayed} written after replay={len(ids)} "
+          f"files left={len(os.listdir(spill_dir))}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
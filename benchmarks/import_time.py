@@ -0,0 +1,97 @@
+"""Cold import of app.py, as a recycled gunicorn worker pays it, profiled with -X importtime.
+
+Imports app in fresh interpreters with the warm-up thread off (WARMUP=0),
+so only the import itself is measured, and reports:
+
+- the import time of app (best of --runs; -X importtime's own cumulative
+  figure, so interpreter start-up is left out),
+- the modules with the largest cumulative import time,
+- any module from --forbid that was imported: these are only needed once
+  the model is converted (gensim) or the LLM is called (langchain), and
+  belong behind the lazy paths,
+- the time to load the embeddings afterwards (what the warm-up thread does,
+  and what /readyz waits for).
+
+Exits with status 1 if a forbidden module is imported or the import takes
+longer than --budget-ms, so it can guard cold starts in CI.
+
+Run from the directory holding the embedding model:
+    python benchmarks/import_time.py --runs 5 --budget-ms 1000
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+from fakes import REPO_ROOT
+
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+LOAD_EMBEDDINGS = (
+    "import json, time\n"
+    "import app\n"
+    "start = time.perf_counter()\n"
+    "app.embeddings.get()\n"
+    "print(json.dumps({'seconds': time.perf_counter() - start}))\n"
+)
+
+
+def child_env():
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT, WARMUP='0')
+    env.setdefault('ACCESS_KEY_ID', 'benchmark')
+    env.setdefault('SECRET_ACCESS_KEY', 'benchmark')
+    env.setdefault('SESSION_BACKEND', 'memory')
+    return env
+
+
+def profile_import():
+    """{module: cumulative microseconds} for one cold `import app`"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'], env=child_env(),
+                            capture_output=True, text=True, check=True)
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            cumulative[match.group(4)] = int(match.group(2))
+    return cumulative
+
+
+def load_seconds():
+    result = subprocess.run([sys.executable, '-c', LOAD_EMBEDDINGS], env=child_env(), capture_output=True,
+                            text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])['seconds']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--forbid', nargs='*', default=['gensim', 'langchain', 'langchain_core', 'langchain_aws'])
+    parser.add_argument('--budget-ms', type=float, default=None, help='fail if importing app takes longer')
+    args = parser.parse_args()
+
+    profiles = [profile_import() for _ in range(args.runs)]
+    best = min(profiles, key=lambda profile: profile['app'])
+    import_ms = best['app'] / 1000
+    print(f"import app: {import_ms:.0f} ms (best of {args.runs}), {len(best)} modules")
+
+    print(f"\n{'cumulative ms':>14}  module")
+    top_level = {name: us for name, us in best.items() if '.' not in name and name != 'app'}
+    for name, us in sorted(top_level.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{us / 1000:>14.1f}  {name}")
+
+    forbidden = sorted(prefix for prefix in args.forbid
+                       if any(name == prefix or name.startswith(prefix + '.') for name in best))
+    print(f"\nforbidden packages imported: {', '.join(forbidden) if forbidden else 'none'}")
+    print(f"loading the embeddings afterwards: {load_seconds() * 1000:.0f} ms")
+
+    failed = bool(forbidden)
+    if args.budget_ms is not None and import_ms > args.budget_ms:
+        print(f"import took longer than the {args.budget_ms:.0f} ms budget")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""Per-guess leaderboard cost: rebuilding and sorting every time vs the incremental Leaderboard.
+
+For games of each length, plays every guess and after it does what
+/api/guess does: checks the word against the used words, records it and
+builds the leaderboard response. The rebuild path is the previous code
+(a used-words set and a sorted list of dicts built from both guess lists
+on every call); the incremental path uses leaderboard.Leaderboard, with
+a full page and a top-10 page. Reports microseconds per guess.
+
+Run from anywhere:
+    python benchmarks/leaderboard_updates.py --lengths 10 100 500 2000
+"""
+import argparse
+import random
+import time
+
+from fakes import REPO_ROOT  # noqa: F401  (puts the repo on sys.path)
+
+from leaderboard import Leaderboard
+
+
+def rebuild(human_guesses, ai_guesses):
+    all_guesses = [{'word': word, 'rank': rank, 'player': 'human'} for word, rank, _ in human_guesses]
+    all_guesses += [{'word': word, 'rank': rank, 'player': 'ai'} for word, rank, _ in ai_guesses]
+    all_guesses.sort(key=lambda x: x['rank'])
+    return {'leaderboard': all_guesses, 'totalGuesses': len(all_guesses),
+            'totalPlayers': len(set(guess['player'] for guess in all_guesses))}
+
+
+def play_rebuild(guesses):
+    human, ai = [], []
+    for turn, (word, rank) in enumerate(guesses):
+        used_words = {g[0] for g in human + ai}
+        assert word not in used_words
+        (human if turn % 2 == 0 else ai).append((word, rank, 0.0))
+        rebuild(human, ai)
+
+
+def play_incremental(guesses, limit):
+    board = Leaderboard()
+    for turn, (word, rank) in enumerate(guesses):
+        assert word not in board.used_words
+        board.add(word, rank, 'human' if turn % 2 == 0 else 'ai')
+        {'leaderboard': board.page(0, limit), 'totalGuesses': len(board), 'totalPlayers': board.total_players}
+
+
+def per_guess_us(fn, guesses, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(guesses)
+    return (time.perf_counter() - start) / repeat / len(guesses) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lengths', type=int, nargs='+', default=[10, 100, 500, 2000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    print(f"{'guesses':>8} {'rebuild us':>11} {'incr. full us':>14} {'incr. top-10 us':>16}")
+    for length in args.lengths:
+        ranks = rng.sample(range(2, 400000), length)
+        guesses = [(f"word{rank}", rank) for rank in ranks]
+        print(f"{length:>8} {per_guess_us(play_rebuild, guesses, args.repeat):>11.1f} "
+              f"{per_guess_us(lambda g: play_incremental(g, None), guesses, args.repeat):>14.1f} "
+              f"{per_guess_us(lambda g: play_incremental(g, 10), guesses, args.repeat):>16.1f}")
+
+
+if __name__ == '__main__':
+    main()
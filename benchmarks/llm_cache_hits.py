@@ -0,0 +1,67 @@
+"""LLM round trips per AI turn with and without the guess cache.
+
+Plays many short games on the target words the game uses, with human
+openings drawn from a small pool of common words (players tend to open
+alike). The Bedrock model is replaced by a stub that sleeps `--delay`
+seconds per call. Reports LLM calls, hit rate and time spent per AI turn.
+
+Run from the directory holding the embedding model:
+    python benchmarks/llm_cache_hits.py --games 200 --turns 4 --delay 0.05
+"""
+import argparse
+import os
+import random
+import time
+
+from fakes import FakeLLM, import_app
+
+OPENERS = ['house', 'water', 'time', 'people', 'food', 'city', 'music', 'family', 'money', 'world']
+
+
+def play_games(app, games, turns, seed):
+    rng = random.Random(seed)
+    model = app.embeddings.get().model
+    openers = [word for word in OPENERS if word in model.key_to_index] or model.index_to_key[100:110]
+    elapsed = []
+    for _ in range(games):
+        state = app.GameState()
+        state.target_word = rng.choice(app.TARGET_WORDS[:10])
+        for _ in range(turns):
+            used = state.used_words
+            word = rng.choice([w for w in openers if w not in used])
+            rank, similarity = app.calculate_similarity(word, state.target_word)
+            state.add_guess('human', word, rank, similarity)
+            start = time.perf_counter()
+            ai_guess = app.choose_llm_ai_guess(state)
+            elapsed.append(time.perf_counter() - start)
+            if ai_guess is not None:
+                app.add_ai_guess(state, ai_guess, *app.calculate_similarity(ai_guess, state.target_word))
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--games', type=int, default=200)
+    parser.add_argument('--turns', type=int, default=4)
+    parser.add_argument('--delay', type=float, default=0.05)
+    args = parser.parse_args()
+
+    os.environ['LLM_CACHE_PATH'] = ''
+    app = import_app()
+    from llm_cache import LLMGuessCache
+
+    answers = [app.embeddings.get().model.index_to_key[i] for i in range(200, 2200)]
+    print(f"{args.games} games x {args.turns} AI turns, {args.delay * 1000:.0f}ms per LLM call")
+    print(f"{'cache':>8} {'llm calls':>10} {'calls/turn':>11} {'ms/turn':>8} {'hit rate':>9}")
+    for name, cache in (('off', LLMGuessCache(max_entries=0)), ('on', LLMGuessCache())):
+        fake_llm = FakeLLM(answers, delay=args.delay)
+        app.get_llm = lambda: fake_llm
+        app.llm_cache = cache
+        elapsed = play_games(app, args.games, args.turns, seed=1)
+        print(f"{name:>8} {fake_llm.calls:>10} {fake_llm.calls / len(elapsed):>11.2f} "
+              f"{sum(elapsed) / len(elapsed) * 1000:>8.1f} {cache.stats()['hit_rate']:>9.2%}")
+    print(f"cache stats: {cache.stats()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""LLM round trips per AI turn: one word per call vs a ranked candidate list per call.
+
+The Bedrock model is replaced by a stub whose answers are unusable (not in
+the vocabulary) with probability `--invalid`, standing in for the words the
+real model repeats or makes up. The single-word mode retries up to five
+times; the candidate mode asks for `--candidates` words per call and picks
+the best playable one locally. Reports calls per turn, turns with no guess,
+time per turn and the mean rank of the AI's guesses.
+
+Run from the directory holding the embedding model:
+    python benchmarks/llm_round_trips.py --turns 300 --invalid 0.5 --delay 0.05
+"""
+import argparse
+import os
+import random
+import time
+
+from fakes import FakeLLM, import_app, percentile
+
+
+def scripted_answers(app, rng, count, per_answer, invalid):
+    vocabulary = [app.embeddings.get().model.index_to_key[i] for i in range(100, 5000)]
+    answers = []
+    for i in range(count):
+        words = [f"zq{i}x{j}" if rng.random() < invalid else rng.choice(vocabulary) for j in range(per_answer)]
+        answers.append("\n".join(words))
+    return answers
+
+
+def play(app, turns, seed):
+    rng = random.Random(seed)
+    calls, elapsed, ranks, failed = [], [], [], 0
+    state = None
+    for turn in range(turns):
+        if state is None or state.game_over or len(state.ai_guesses) >= 10:
+            state = app.GameState()
+            state.target_word = rng.choice(app.TARGET_WORDS[:10])
+        word = app.embeddings.get().model.index_to_key[rng.randrange(100, 5000)]
+        if word not in state.used_words:
+            rank, similarity = app.calculate_similarity(word, state.target_word)
+            state.add_guess('human', word, rank, similarity)
+
+        before = app.get_llm().calls
+        start = time.perf_counter()
+        ai_guess = app.choose_llm_ai_guess(state)
+        elapsed.append(time.perf_counter() - start)
+        calls.append(app.get_llm().calls - before)
+        if ai_guess is None:
+            failed += 1
+        else:
+            rank, similarity = app.calculate_similarity(ai_guess, state.target_word)
+            app.add_ai_guess(state, ai_guess, rank, similarity)
+            ranks.append(rank)
+    return calls, elapsed, ranks, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--turns', type=int, default=300)
+    parser.add_argument('--invalid', type=float, default=0.5, help='share of unusable words in answers')
+    parser.add_argument('--candidates', type=int, default=5)
+    parser.add_argument('--delay', type=float, default=0.05)
+    args = parser.parse_args()
+
+    os.environ['LLM_CACHE_PATH'] = ''
+    app = import_app()
+    from llm_cache import LLMGuessCache
+
+    print(f"{args.turns} AI turns, {args.invalid:.0%} unusable words, {args.delay * 1000:.0f}ms per call")
+    print(f"{'mode':>14} {'calls/turn':>11} {'p95 calls':>10} {'max':>4} {'no guess':>9} {'ms/turn':>8} {'mean rank':>10}")
+    for name, candidates in (('single word', 1), (f'{args.candidates} candidates', args.candidates)):
+        rng = random.Random(0)
+        fake_llm = FakeLLM(scripted_answers(app, rng, args.turns * 5, candidates, args.invalid), delay=args.delay)
+        app.get_llm = lambda: fake_llm
+        app.llm_cache = LLMGuessCache(max_entries=0)
+        app.LLM_CANDIDATES = candidates
+        calls, elapsed, ranks, failed = play(app, args.turns, seed=1)
+        print(f"{name:>14} {sum(calls) / len(calls):>11.2f} {percentile(calls, 95):>10} {max(calls):>4} "
+              f"{failed:>9} {sum(elapsed) / len(elapsed) * 1000:>8.1f} "
+              f"{sum(ranks) / max(1, len(ranks)):>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
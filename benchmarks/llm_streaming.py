@@ -0,0 +1,84 @@
+"""Time to the AI's guess with a full LLM response vs a streamed one.
+
+The Bedrock model is replaced by a stub that waits `--first-token` seconds
+and then generates one token every `--token-delay` seconds. Its answers
+put the word(s) first and then ramble for `--tail` tokens, as chat models
+often do despite the prompt. `invoke` waits for the whole answer; the
+streaming path stops reading once it has the word(s) it needs. Reports
+time per AI turn and tokens generated per call, in single word and
+candidate list modes.
+
+Run from the directory holding the embedding model:
+    python benchmarks/llm_streaming.py --turns 100 --first-token 0.2 --token-delay 0.01 --tail 40
+"""
+import argparse
+import os
+import random
+import time
+
+from fakes import FakeLLM, import_app, percentile
+
+
+def scripted_answers(app, rng, count, per_answer, tail):
+    vocabulary = [app.embeddings.get().model.index_to_key[i] for i in range(100, 5000)]
+    explanation = " ".join(["because it is closely related to the best guesses so far"] * (tail // 10 + 1))
+    explanation = " ".join(explanation.split()[:tail])
+    return ["\n".join(rng.choice(vocabulary) for _ in range(per_answer)) + "\n\n" + explanation
+            for _ in range(count)]
+
+
+def play(app, turns, seed):
+    rng = random.Random(seed)
+    elapsed = []
+    state = None
+    for _ in range(turns):
+        if state is None or state.game_over or len(state.ai_guesses) >= 10:
+            state = app.GameState()
+            state.target_word = rng.choice(app.TARGET_WORDS[:10])
+        word = app.embeddings.get().model.index_to_key[rng.randrange(100, 5000)]
+        if word not in state.used_words:
+            rank, similarity = app.calculate_similarity(word, state.target_word)
+            state.add_guess('human', word, rank, similarity)
+        start = time.perf_counter()
+        ai_guess = app.choose_llm_ai_guess(state)
+        elapsed.append(time.perf_counter() - start)
+        if ai_guess is not None:
+            app.add_ai_guess(state, ai_guess, *app.calculate_similarity(ai_guess, state.target_word))
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--turns', type=int, default=100)
+    parser.add_argument('--first-token', type=float, default=0.2)
+    parser.add_argument('--token-delay', type=float, default=0.01)
+    parser.add_argument('--tail', type=int, default=40, help='tokens of explanation after the answer')
+    parser.add_argument('--candidates', type=int, default=5)
+    args = parser.parse_args()
+
+    os.environ['LLM_CACHE_PATH'] = ''
+    app = import_app()
+    from llm_cache import LLMGuessCache
+
+    print(f"{args.turns} AI turns, first token {args.first_token * 1000:.0f}ms, "
+          f"{args.token_delay * 1000:.0f}ms per token, {args.tail} token tail")
+    print(f"{'mode':>14} {'path':>7} {'ms/turn':>8} {'p95 ms':>7} {'tokens/call':>12}")
+    for name, candidates in (('single word', 1), (f'{args.candidates} candidates', args.candidates)):
+        for streaming in (False, True):
+            rng = random.Random(0)
+            fake_llm = FakeLLM(scripted_answers(app, rng, args.turns * 5, candidates, args.tail),
+                               delay=args.first_token, token_delay=args.token_delay, content_blocks=True)
+            app.get_llm = lambda: fake_llm
+            app.llm_cache = LLMGuessCache(max_entries=0)
+            app.LLM_CANDIDATES = candidates
+            app.LLM_STREAMING = streaming
+            elapsed = play(app, args.turns, seed=1)
+            tokens = (fake_llm.tokens_streamed if streaming else
+                      sum(len(fake_llm.tokens(answer)) for answer in fake_llm.answers[:fake_llm.calls]))
+            print(f"{name:>14} {'stream' if streaming else 'invoke':>7} "
+                  f"{sum(elapsed) / len(elapsed) * 1000:>8.1f} {percentile(elapsed, 95) * 1000:>7.1f} "
+                  f"{tokens / max(1, fake_llm.calls):>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
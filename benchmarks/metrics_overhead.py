@@ -0,0 +1,97 @@
+"""What the latency instrumentation costs: per observation, per request, and per /metrics scrape.
+
+- Histogram.observe() and the time() context manager, called in a loop,
+- requests through Flask's test client with the timing hooks and the timed
+  JSON provider installed, then with them removed (the difference is the
+  per-request overhead; the similarity and DynamoDB timers stay in both),
+- rendering /metrics once every route has a series.
+
+Run from the directory holding the embedding model:
+    python benchmarks/metrics_overhead.py --requests 2000
+"""
+import argparse
+import time
+
+from flask.json.provider import DefaultJSONProvider
+
+from fakes import import_app, percentile
+from metrics import Histogram
+
+
+def per_call_us(fn, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def request_latencies(client, requests, words):
+    latencies = []
+    for number in range(requests):
+        start = time.perf_counter()
+        if number % 2:
+            response = client.get('/api/leaderboard', headers={'X-Session-Id': 'bench-metrics'})
+        else:
+            response = client.post('/api/similarity/batch', json={'words': words, 'target': words[0]})
+        response.get_data()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--calls', type=int, default=200000)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--block', type=int, default=50, help='requests per block; the two setups alternate')
+    args = parser.parse_args()
+
+    histogram = Histogram('bench_seconds', 'benchmark', ['route'])
+    observe_us = per_call_us(lambda: histogram.observe(0.003, '/api/guess'), args.calls)
+
+    def timed_block():
+        with histogram.time('/api/guess'):
+            pass
+    time_us = per_call_us(timed_block, args.calls)
+    print(f"observe(): {observe_us:.2f} us, time() context manager: {time_us:.2f} us")
+
+    app = import_app()
+    loaded = app.embeddings.get()
+    words = loaded.model.index_to_key[100:110]
+    client = app.app.test_client()
+    client.post('/api/start', json={'ai_strategy': 'embedding'}, headers={'X-Session-Id': 'bench-metrics'})
+    request_latencies(client, 200, words)  # warm up
+
+    hooks = (app.start_request_timer, app.observe_request, app.app.json)
+
+    def instrument(enabled):
+        before, after = app.app.before_request_funcs.setdefault(None, []), app.app.after_request_funcs.setdefault(None, [])
+        if enabled:
+            before.append(hooks[0])
+            after.append(hooks[1])
+            app.app.json = hooks[2]
+        else:
+            before.remove(hooks[0])
+            after.remove(hooks[1])
+            app.app.json = DefaultJSONProvider(app.app)
+
+    results = {'instrumented': [], 'bare': []}
+    for _ in range(max(1, args.requests // args.block)):
+        results['instrumented'] += request_latencies(client, args.block, words)
+        instrument(False)
+        results['bare'] += request_latencies(client, args.block, words)
+        instrument(True)
+
+    print(f"\n{'':>13} {'p50_us':>8} {'p95_us':>8} {'mean_us':>8}")
+    for name, latencies in results.items():
+        print(f"{name:>13} {percentile(latencies, 50) * 1e6:>8.1f} {percentile(latencies, 95) * 1e6:>8.1f} "
+              f"{sum(latencies) / len(latencies) * 1e6:>8.1f}")
+    overhead = percentile(results['instrumented'], 50) - percentile(results['bare'], 50)
+    print(f"per-request overhead (p50 difference): {overhead * 1e6:.1f} us")
+
+    start = time.perf_counter()
+    body = client.get('/metrics').get_data()
+    print(f"/metrics: {len(body)} bytes rendered in {(time.perf_counter() - start) * 1000:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
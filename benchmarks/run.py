@@ -0,0 +1,317 @@
+"""Benchmark suite for the game's hot paths, with results saved as JSON to compare commits.
+
+Scenarios (pick some with --only):
+
+- similarity: app.calculate_similarity, the first lookup for a target
+  (which may build its rank table) reported apart from the rest,
+- convert_rank: app.convert_similarity_to_rank,
+- leaderboard: get_leaderboard_data and its JSON body for games of
+  --board-sizes guesses,
+- guess: whole turns through Flask's test client: POST /api/guess, then
+  the AI's answer from /api/ai-guess/stream, and POST /api/save_game at
+  the end of each game,
+- load: the same turns from each of --clients concurrent players, each with
+  its own session, for throughput and latency under contention.
+
+The LLM opponent is a FakeLLM answering after --llm-delay seconds (and its
+answer cache is off, so every AI turn reaches it), and DynamoDB is moto's
+in-memory one, so runs need no AWS access and are repeatable. moto serves one
+request at a time, so the load scenario measures the app's own contention,
+not DynamoDB's. All clients share one process, as in one gunicorn worker.
+
+Results go to --output (default benchmarks/results/<commit>.json): the
+commit, Python version and arguments, then the metrics of each scenario.
+Latencies end in _us or _ms and throughputs in _per_sec. With --compare,
+metrics are set against an earlier results file and the run exits with
+status 1 if a median, mean or throughput is more than --tolerance worse
+(p95s are shown but, over runs this short, too noisy to fail on).
+
+Requires moto (pip install moto). Run from the directory holding the embedding model:
+    python benchmarks/run.py
+    python benchmarks/run.py --only guess load --compare benchmarks/results/abc1234.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from moto import mock_aws
+
+from fakes import REPO_ROOT, FakeLLM, import_app, percentile, serialize_requests
+
+SCENARIOS = ('similarity', 'convert_rank', 'leaderboard', 'guess', 'load')
+RESULTS_DIR = os.path.join(REPO_ROOT, 'benchmarks', 'results')
+
+
+def latency_summary(seconds, unit='us'):
+    scale = 1e6 if unit == 'us' else 1e3
+    return {
+        f'p50_{unit}': round(percentile(seconds, 50) * scale, 3),
+        f'p95_{unit}': round(percentile(seconds, 95) * scale, 3),
+        f'mean_{unit}': round(sum(seconds) / len(seconds) * scale, 3) if seconds else 0.0
+    }
+
+
+def time_each(fn, inputs):
+    latencies = []
+    for item in inputs:
+        start = time.perf_counter()
+        fn(item)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def playable_words(app):
+    # Words the LLM opponent accepts as answers (see embedding_store.COMMON_WORD_PATTERN)
+    return [word for word in app.embeddings.get().model.index_to_key[1000:] if word.isalpha() and word.islower()]
+
+
+def bench_similarity(app, args, rng):
+    vocabulary = app.embeddings.get().model.index_to_key
+    targets = rng.sample(vocabulary[:5000], 5)
+    cold = time_each(lambda target: app.calculate_similarity(rng.choice(vocabulary), target), targets)
+    pairs = [(rng.choice(vocabulary), rng.choice(targets)) for _ in range(args.iterations)]
+    warm = time_each(lambda pair: app.calculate_similarity(*pair), pairs)
+    return dict(latency_summary(warm), first_lookup_per_target_ms=round(max(cold) * 1000, 3))
+
+
+def bench_convert_rank(app, args, rng):
+    similarities = [rng.uniform(-0.2, 1.0) for _ in range(args.iterations)]
+    start = time.perf_counter()
+    for similarity in similarities:
+        app.convert_similarity_to_rank(similarity)
+    seconds = time.perf_counter() - start
+    return {'mean_us': round(seconds / len(similarities) * 1e6, 4)}
+
+
+def bench_leaderboard(app, args, rng):
+    words = playable_words(app)
+    results = {}
+    for size in args.board_sizes:
+        game_state = app.GameState()
+        for number, word in enumerate(rng.sample(words, min(size, len(words)))):
+            game_state.add_guess('human' if number % 2 else 'ai', word, rng.randrange(2, 100000), rng.random())
+        repeats = max(10, args.iterations // max(size, 1))
+        data = time_each(lambda _: app.get_leaderboard_data(game_state), range(repeats))
+        body = time_each(lambda _: app.app.json.dumps(app.get_leaderboard_data(game_state)), range(repeats))
+        results[str(size)] = {
+            'get_leaderboard_data_p50_us': round(percentile(data, 50) * 1e6, 3),
+            'response_body_p50_us': round(percentile(body, 50) * 1e6, 3),
+            'response_bytes': len(app.app.json.dumps(app.get_leaderboard_data(game_state)))
+        }
+    return results
+
+
+def read_stream(response):
+    for _ in response.response:
+        pass
+    response.close()
+
+
+class Player:
+    """Plays games through one test client and session, timing each turn"""
+
+    def __init__(self, app, name, words, turns):
+        self.app = app
+        self.client = app.app.test_client()
+        self.headers = {'X-Session-Id': name}
+        self.user_id = name
+        self.words = words
+        self.turns = turns
+        self.guess_seconds = []
+        self.turn_seconds = []
+        self.save_seconds = []
+        self.errors = 0
+
+    def new_game(self):
+        self.client.post('/api/start', json={'ai_strategy': 'llm'}, headers=self.headers)
+        self.client.post('/api/set-target-word', json={'index': 0}, headers=self.headers)
+        self.started = time.time()
+        self.guesses = 0
+
+    def save_game(self, final_rank):
+        start = time.perf_counter()
+        response = self.client.post('/api/save_game', headers=self.headers, json={
+            'user_id': self.user_id, 'target_word': 'benchmark', 'guesses_count': self.guesses,
+            'final_rank': final_rank, 'time_taken': int(time.time() - self.started), 'completed': final_rank == 1
+        })
+        self.save_seconds.append(time.perf_counter() - start)
+        if response.status_code != 200:
+            self.errors += 1
+
+    def play(self, rng):
+        self.new_game()
+        best_rank = None
+        for word in rng.sample(self.words, self.turns):
+            start = time.perf_counter()
+            data = self.client.post('/api/guess', json={'guess': word, 'user_id': self.user_id},
+                                    headers=self.headers).get_json()
+            self.guess_seconds.append(time.perf_counter() - start)
+            if data['status'] != 'success':
+                self.errors += 1
+                continue
+            self.guesses += 1
+            best_rank = min(data['rank'], best_rank or data['rank'])
+            if data.get('ai_pending'):
+                read_stream(self.client.get(f"/api/ai-guess/stream?turn={data['ai_turn']}", headers=self.headers,
+                                            buffered=False))
+            self.turn_seconds.append(time.perf_counter() - start)
+            if data['game_over'] or self.app.load_game(self.headers['X-Session-Id']).game_over:
+                self.save_game(best_rank)
+                self.new_game()
+                best_rank = None
+        if best_rank is not None:
+            self.save_game(best_rank)
+
+
+def bench_guess(app, args, rng):
+    player = Player(app, 'bench-guess', playable_words(app), args.turns)
+    start = time.perf_counter()
+    player.play(rng)
+    seconds = time.perf_counter() - start
+    return {
+        'guess': latency_summary(player.guess_seconds, 'ms'),
+        'turn': latency_summary(player.turn_seconds, 'ms'),
+        'save_game': latency_summary(player.save_seconds, 'ms'),
+        'turns_per_sec': round(len(player.turn_seconds) / seconds, 2),
+        'errors': player.errors
+    }
+
+
+def bench_load(app, args, rng):
+    words = playable_words(app)
+    results = {}
+    for clients in args.clients:
+        players = [Player(app, f'bench-load-{clients}-{number}', words, args.turns) for number in range(clients)]
+        seeds = [rng.random() for _ in players]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(clients) as pool:
+            list(pool.map(lambda pair: pair[0].play(random.Random(pair[1])), zip(players, seeds)))
+        seconds = time.perf_counter() - start
+        guesses = [latency for player in players for latency in player.guess_seconds]
+        turns = [latency for player in players for latency in player.turn_seconds]
+        results[str(clients)] = {
+            'guess': latency_summary(guesses, 'ms'),
+            'turn': latency_summary(turns, 'ms'),
+            'turns_per_sec': round(len(turns) / seconds, 2),
+            'errors': sum(player.errors for player in players)
+        }
+    return results
+
+
+def flatten(results, prefix=''):
+    """{'guess.turn.p50_ms': 1.2, ...} from nested results"""
+    flat = {}
+    for key, value in results.items():
+        name = f'{prefix}.{key}' if prefix else key
+        if isinstance(value, dict):
+            flat.update(flatten(value, name))
+        elif isinstance(value, (int, float)):
+            flat[name] = value
+    return flat
+
+
+def compare(baseline, results, tolerance):
+    """Print each shared metric's change; returns the names that got worse by more than tolerance"""
+    old, new = flatten(baseline['results']), flatten(results)
+    regressions = []
+    print(f"\ncompared with {baseline['meta'].get('commit')}:")
+    print(f"{'metric':<48} {'before':>12} {'after':>12} {'change':>8}")
+    for name in sorted(old.keys() & new.keys()):
+        before, after = old[name], new[name]
+        change = (after - before) / before if before else 0.0
+        if name.rsplit('.', 1)[-1].startswith('p95_'):
+            worse = False  # tails of a short run are too noisy to fail on
+        elif name.endswith(('_us', '_ms')):
+            worse = change > tolerance
+        elif name.endswith('_per_sec'):
+            worse = -change > tolerance
+        else:
+            continue
+        if worse:
+            regressions.append(name)
+        print(f"{name:<48} {before:>12.3f} {after:>12.3f} {change:>+8.1%}{'  worse' if worse else ''}")
+    return regressions
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--only', nargs='+', choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument('--iterations', type=int, default=20000, help='calls per micro-benchmark')
+    parser.add_argument('--board-sizes', type=int, nargs='+', default=[10, 100, 1000, 5000])
+    parser.add_argument('--turns', type=int, default=40, help='turns per player')
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--llm-delay', type=float, default=0.0, help="seconds the fake LLM takes to answer")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='results file (default benchmarks/results/<commit>.json)')
+    parser.add_argument('--compare', help='earlier results file to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.10, help='allowed slowdown before failing')
+    args = parser.parse_args()
+
+    os.environ.setdefault('WARMUP', '0')  # load on our schedule, not a background thread's
+    os.environ.setdefault('LOG_SAMPLE_RATE', '0')
+    commit = git_commit()
+    with mock_aws():
+        serialize_requests()
+        import dynamodb
+        dynamodb.create_tables()
+
+        app = import_app()
+        from llm_cache import LLMGuessCache
+        start = time.perf_counter()
+        app.embeddings.get()
+        load_seconds = time.perf_counter() - start
+        words = playable_words(app)
+        fake_llm = FakeLLM([', '.join(words[number:number + 5]) for number in range(0, 500, 5)], delay=args.llm_delay)
+        app.get_llm = lambda: fake_llm
+        app.llm_cache = LLMGuessCache(max_entries=0)
+
+        # One short game first, so one-off imports and table set-up don't land in a scenario
+        Player(app, 'bench-warmup', words, 5).play(random.Random(args.seed))
+
+        results = {'startup': {'load_embeddings_ms': round(load_seconds * 1000, 1)}}
+        for name in args.only:
+            print(f"running {name}...", file=sys.stderr)
+            results[name] = globals()[f'bench_{name}'](app, args, random.Random(args.seed))
+        app.history_queue.close()
+
+    output = args.output or os.path.join(RESULTS_DIR, f'{commit}.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    report = {
+        'meta': {
+            'commit': commit,
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'args': vars(args)
+        },
+        'results': results
+    }
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(results, indent=2))
+    print(f"\nwrote {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), results, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} metric(s) more than {args.tolerance:.0%} worse")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
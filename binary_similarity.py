@@ -0,0 +1,104 @@
+import numpy as np
+
+from rank_engine import RANK_TABLE_DIR, RankEngine
+
+_M1 = np.uint64(0x5555555555555555)
+_M2 = np.uint64(0x3333333333333333)
+_M4 = np.uint64(0x0F0F0F0F0F0F0F0F)
+_H01 = np.uint64(0x0101010101010101)
+
+
+def popcount_rows(words):
+    """Set bits per row of a (rows, n) uint64 array. Overwrites words."""
+    if hasattr(np, "bitwise_count"):
+        counts = np.bitwise_count(words)
+    else:
+        # SWAR popcount, in place to avoid a temporary per step
+        counts, tmp = words, np.empty_like(words)
+        np.right_shift(counts, np.uint64(1), out=tmp)
+        tmp &= _M1
+        counts -= tmp
+        np.right_shift(counts, np.uint64(2), out=tmp)
+        tmp &= _M2
+        counts &= _M2
+        counts += tmp
+        np.right_shift(counts, np.uint64(4), out=tmp)
+        counts += tmp
+        counts &= _M4
+        counts *= _H01
+        counts >>= np.uint64(56)
+    # Summing column by column is much faster than sum(axis=1) over short rows
+    total = counts[:, 0].astype(np.int32)
+    for column in range(1, counts.shape[1]):
+        total += counts[:, column].astype(np.int32)
+    return total
+
+
+def pack_bits(bits):
+    """Pack a (rows, n_bits) 0/1 matrix into uint8 rows padded to whole uint64 words"""
+    packed = np.packbits(np.asarray(bits, dtype=bool), axis=1)
+    padding = -packed.shape[1] % 8
+    if padding:
+        packed = np.pad(packed, ((0, 0), (0, padding)))
+    return np.ascontiguousarray(packed)
+
+
+def binarize(vectors, n_bits=None, seed=0, chunk_size=65536):
+    """Binary codes for float vectors, as a (rows, n_bits) bool matrix.
+
+    With n_bits None every dimension becomes one bit: its sign. This is
+    exact for vectors that already hold bits, such as Titan's binary
+    embeddings. Otherwise the vectors are projected onto n_bits random
+    hyperplanes first (SimHash), so Hamming distance between codes tracks
+    the angle between the original vectors.
+    """
+    projection = None
+    if n_bits:
+        rng = np.random.default_rng(seed)
+        projection = rng.standard_normal((vectors.shape[1], n_bits)).astype(np.float32)
+    codes = np.empty((len(vectors), n_bits or vectors.shape[1]), dtype=bool)
+    for start in range(0, len(vectors), chunk_size):
+        chunk = np.asarray(vectors[start:start + chunk_size], dtype=np.float32)
+        codes[start:start + len(chunk)] = (chunk @ projection if projection is not None else chunk) > 0
+    return codes
+
+
+class BinaryRankEngine(RankEngine):
+    """RankEngine over packed binary codes instead of float vectors.
+
+    Each word is an n_bits code stored as uint64 words; one word's distance
+    to another is the popcount of their XOR. Ranks order the vocabulary by
+    Hamming distance to the target, ties broken by vocabulary order (most
+    frequent first). Similarities are the SimHash cosine estimate,
+    cos(pi * distance / n_bits), so they sit on the same scale as the float
+    engine's.
+    """
+
+    def __init__(self, packed, n_bits, key_to_index, cache_dir=RANK_TABLE_DIR, max_tables=32, cached_targets=None):
+        super().__init__(packed, key_to_index, cache_dir=cache_dir, max_tables=max_tables,
+                         cached_targets=cached_targets)
+        self.n_bits = n_bits
+        self.codes = np.ascontiguousarray(packed).view(np.uint64)
+
+    @classmethod
+    def from_vectors(cls, vectors, key_to_index, n_bits=None, seed=0, **kwargs):
+        codes = binarize(vectors, n_bits=n_bits, seed=seed)
+        return cls(pack_bits(codes), codes.shape[1], key_to_index, **kwargs)
+
+    @property
+    def nbytes(self):
+        return self.codes.nbytes
+
+    def distances(self, target_index):
+        """Hamming distance from every word's code to target_index's"""
+        return popcount_rows(self.codes ^ self.codes[target_index])
+
+    def _similarity_from_distance(self, distances):
+        return np.cos(np.pi * np.asarray(distances, dtype=np.float32) / self.n_bits)
+
+    def scores(self, target_index):
+        return self._similarity_from_distance(self.distances(target_index))
+
+    def similarities(self, word_indices, target_indices):
+        distances = popcount_rows(self.codes[word_indices] ^ self.codes[target_indices])
+        return self._similarity_from_distance(distances)
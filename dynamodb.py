@@ -1,8 +1,66 @@
+import time
+from botocore.exceptions import ClientError
+from aws_clients import get_dynamodb
+from storage import (
+    USERS_TABLE, GAME_HISTORY_TABLE, USER_STATS_TABLE, DAILY_LEADERBOARD_TABLE, USERNAME_INDEX, EMAIL_INDEX
+)
+
+dynamodb = get_dynamodb()
+
+# Lookup indexes on ContextoUsers, so login and registration query instead of scanning
+USER_INDEXES = [
+    {
+        'IndexName': USERNAME_INDEX,
+        'KeySchema': [
+            {
+                'AttributeName': 'username',
+                'KeyType': 'HASH'
+            }
+        ],
+        # Login reads the password hash, so project the whole item
+        'Projection': {
+            'ProjectionType': 'ALL'
+        },
+        'ProvisionedThroughput': {
+            'ReadCapacityUnits': 5,
+            'WriteCapacityUnits': 5
+        }
+    },
+    {
+        'IndexName': EMAIL_INDEX,
+        'KeySchema': [
+            {
+                'AttributeName': 'email',
+                'KeyType': 'HASH'
+            }
+        ],
+        # Only used to check whether an email is taken
+        'Projection': {
+            'ProjectionType': 'KEYS_ONLY'
+        },
+        'ProvisionedThroughput': {
+            'ReadCapacityUnits': 5,
+            'WriteCapacityUnits': 5
+        }
+    }
+]
+
+USER_INDEX_ATTRIBUTES = [
+    {
+        'AttributeName': 'username',
+        'AttributeType': 'S'
+    },
+    {
+        'AttributeName': 'email',
+        'AttributeType': 'S'
+    }
+]
+
 # Create users table if it doesn't exist
 def create_users_table():
     try:
         table = dynamodb.create_table(
-            TableName='ContextoUsers',
+            TableName=USERS_TABLE,
             KeySchema=[
                 {
                     'AttributeName': 'user_id',
@@ -14,7 +72,8 @@ def create_users_table():
                     'AttributeName': 'user_id',
                     'AttributeType': 'S'
                 }
-            ],
+            ] + USER_INDEX_ATTRIBUTES,
+            GlobalSecondaryIndexes=USER_INDEXES,
             ProvisionedThroughput={
                 'ReadCapacityUnits': 5,
                 'WriteCapacityUnits': 5
@@ -29,11 +88,29 @@ def create_users_table():
             print(f"Error creating table: {e}")
             raise
 
+# Add the username/email indexes to a users table created before they existed
+def add_user_indexes():
+    table = dynamodb.Table(USERS_TABLE)
+    existing = {index['IndexName'] for index in table.global_secondary_indexes or []}
+    for index in USER_INDEXES:
+        if index['IndexName'] in existing:
+            continue
+        # DynamoDB only accepts one index creation per update_table call
+        dynamodb.meta.client.update_table(
+            TableName=USERS_TABLE,
+            AttributeDefinitions=USER_INDEX_ATTRIBUTES,
+            GlobalSecondaryIndexUpdates=[{'Create': index}]
+        )
+        print(f"Creating index {index['IndexName']} on {USERS_TABLE}")
+        dynamodb.meta.client.get_waiter('table_exists').wait(TableName=USERS_TABLE)
+        while any(i['IndexStatus'] != 'ACTIVE' for i in dynamodb.Table(USERS_TABLE).global_secondary_indexes or []):
+            time.sleep(5)
+
 # Create game history table if it doesn't exist
 def create_game_history_table():
     try:
         table = dynamodb.create_table(
-            TableName='ContextoGameHistory',
+            TableName=GAME_HISTORY_TABLE,
             KeySchema=[
                 {
                     'AttributeName': 'game_id',
@@ -96,8 +173,93 @@ def create_game_history_table():
             print(f"Error creating game history table: {e}")
             return False
 
-# Create tables on startup
-try:
-    create_game_history_table()
-except Exception as e:
-    print(f"Error during table creation: {e}")
\ No newline at end of file
+# Create the per-user stats aggregate table if it doesn't exist
+def create_user_stats_table():
+    try:
+        table = dynamodb.create_table(
+            TableName=USER_STATS_TABLE,
+            KeySchema=[
+                {
+                    'AttributeName': 'user_id',
+                    'KeyType': 'HASH'
+                }
+            ],
+            AttributeDefinitions=[
+                {
+                    'AttributeName': 'user_id',
+                    'AttributeType': 'S'
+                }
+            ],
+            ProvisionedThroughput={
+                'ReadCapacityUnits': 5,
+                'WriteCapacityUnits': 5
+            }
+        )
+        table.wait_until_exists()
+        print("User stats table created successfully")
+        return True
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ResourceInUseException':
+            print("User stats table already exists")
+            return True
+        else:
+            print(f"Error creating user stats table: {e}")
+            return False
+
+# Create the daily leaderboard table if it doesn't exist (see storage.py for its layout)
+def create_daily_leaderboard_table():
+    try:
+        table = dynamodb.create_table(
+            TableName=DAILY_LEADERBOARD_TABLE,
+            KeySchema=[
+                {
+                    'AttributeName': 'pk',
+                    'KeyType': 'HASH'
+                },
+                {
+                    'AttributeName': 'sk',
+                    'KeyType': 'RANGE'
+                }
+            ],
+            AttributeDefinitions=[
+                {
+                    'AttributeName': 'pk',
+                    'AttributeType': 'S'
+                },
+                {
+                    'AttributeName': 'sk',
+                    'AttributeType': 'S'
+                }
+            ],
+            # Bursts of finishers around the daily reset are spiky, so pay per request
+            BillingMode='PAY_PER_REQUEST'
+        )
+        table.wait_until_exists()
+        # Old days expire on their own
+        dynamodb.meta.client.update_time_to_live(
+            TableName=DAILY_LEADERBOARD_TABLE,
+            TimeToLiveSpecification={'Enabled': True, 'AttributeName': 'expires_at'}
+        )
+        print("Daily leaderboard table created successfully")
+        return True
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ResourceInUseException':
+            print("Daily leaderboard table already exists")
+            return True
+        else:
+            print(f"Error creating daily leaderboard table: {e}")
+            return False
+
+# Create every table and index the app uses; importing this module creates nothing
+def create_tables():
+    try:
+        create_users_table()
+        add_user_indexes()
+        create_game_history_table()
+        create_user_stats_table()
+        create_daily_leaderboard_table()
+    except Exception as e:
+        print(f"Error during table creation: {e}")
+
+if __name__ == "__main__":
+    create_tables()
\ No newline at end of file
@@ -1,16 +1,27 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: Apache-2.0
 """
-Shows how to generate embeddings with the Amazon Titan Text Embeddings V2 Model
+Generates embeddings with the Amazon Titan Text Embeddings V2 Model.
+
+EmbeddingService embeds many texts with bounded parallel requests and keeps
+every vector in an on-disk cache, so a text is only ever paid for once. Run
+as a script to compare a few words, or to embed a whole vocabulary file
+into an embedding store the game can load:
+
+    python embedding.py house kitchen
+    python embedding.py --vocab words.txt --output titan.store --dimensions 256
 """
 
+import argparse
 import json
 import logging
-import boto3
 import os
-import math
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-from botocore.exceptions import ClientError
+import numpy as np
+from aws_clients import get_client
 from dotenv import load_dotenv
 load_dotenv(override=True)
 
@@ -28,9 +39,10 @@ def generate_embeddings(model_id, body):
         response (JSON): The embedding created by the model and the number of input tokens.
     """
 
-    logger.info("Generating embeddings with Amazon Titan Text Embeddings V2 model %s", model_id)
+    logger.debug("Generating embeddings with Amazon Titan Text Embeddings V2 model %s", model_id)
 
-    bedrock = boto3.client(service_name='bedrock-runtime', region_name='eu-west-3',ACCESS_KEY_ID=os.getenv("ACCESS_KEY_ID"),SECRET_ACCESS_KEY=os.getenv("SECRET_ACCESS_KEY"))
+    # Shared, connection-pooled client instead of a new one per call
+    bedrock = get_client('bedrock-runtime')
 
     accept = "application/json"
     content_type = "application/json"
@@ -44,51 +56,239 @@ def generate_embeddings(model_id, body):
     return response_body
 
 
+DEFAULT_MODEL_ID = "amazon.titan-embed-text-v2:0"
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "embedding_cache.db")
+EMBEDDING_CONCURRENCY = int(os.getenv("EMBEDDING_CONCURRENCY", 8))
+
+
+class EmbeddingCache:
+    """
+    Embedding vectors stored in a local SQLite file.
+    Rows are keyed by (model_id, text, embedding_type) and hold the vector as float32 bytes.
+    """
+
+    def __init__(self, path=EMBEDDING_CACHE_PATH):
+        self.path = path
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "model_id TEXT NOT NULL, text TEXT NOT NULL, embedding_type TEXT NOT NULL, "
+                "vector BLOB NOT NULL, PRIMARY KEY (model_id, text, embedding_type))"
+            )
+
+    def _connection(self):
+        # sqlite3 connections must not cross threads or forked workers
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get_many(self, model_id, texts, embedding_type):
+        """Return {text: vector} for the texts that are cached"""
+        found = {}
+        texts = list(texts)
+        conn = self._connection()
+        # Stay under SQLite's limit on bound parameters
+        for start in range(0, len(texts), 500):
+            chunk = texts[start:start + 500]
+            rows = conn.execute(
+                "SELECT text, vector FROM embeddings WHERE model_id = ? AND embedding_type = ? "
+                f"AND text IN ({', '.join('?' * len(chunk))})",
+                [model_id, embedding_type, *chunk],
+            )
+            for text, vector in rows:
+                found[text] = np.frombuffer(vector, dtype=np.float32)
+        return found
+
+    def put_many(self, model_id, vectors, embedding_type):
+        """Store {text: vector}"""
+        rows = [(model_id, text, embedding_type, np.asarray(vector, dtype=np.float32).tobytes())
+                for text, vector in vectors.items()]
+        with self._connection() as conn:
+            conn.execute("BEGIN")
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model_id, text, embedding_type, vector) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+
+
+def cosine_similarity_matrix(a, b):
+    """
+    Cosine similarity between every row of a and every row of b.
+    Args:
+        a (array): Matrix of shape (n, dim).
+        b (array): Matrix of shape (m, dim).
+    Returns:
+        similarities (array): Matrix of shape (n, m).
+    """
+    a = np.asarray(a, dtype=np.float32)
+    b = np.asarray(b, dtype=np.float32)
+    a_norms = np.linalg.norm(a, axis=1, keepdims=True)
+    b_norms = np.linalg.norm(b, axis=1, keepdims=True)
+    a_norms[a_norms == 0] = 1.0
+    b_norms[b_norms == 0] = 1.0
+    return (a / a_norms) @ (b / b_norms).T
+
+
+class EmbeddingError(Exception):
+    """Some texts could not be embedded; `errors` maps each one to its exception"""
+
+    def __init__(self, errors, message):
+        super().__init__(message)
+        self.errors = errors
+
+
+class EmbeddingService:
+    """
+    Embeds texts with a Titan model, reading and writing through an EmbeddingCache.
+    Missing texts are requested in parallel, at most `max_concurrency` at a time.
+    """
+
+    def __init__(self, model_id=DEFAULT_MODEL_ID, cache=None, max_concurrency=EMBEDDING_CONCURRENCY,
+                 dimensions=None, normalize=True, embed_fn=generate_embeddings):
+        self.model_id = model_id
+        self.cache = cache if cache is not None else EmbeddingCache()
+        self.max_concurrency = max_concurrency
+        self.dimensions = dimensions
+        self.normalize = normalize
+        self.embed_fn = embed_fn
+
+    @property
+    def cache_model_id(self):
+        # Vectors of different sizes from the same model must not share cache rows
+        return f"{self.model_id}@{self.dimensions}" if self.dimensions else self.model_id
+
+    def _request(self, text, embedding_type):
+        body = {
+            "inputText": text,
+            "normalize": self.normalize,
+            "embeddingTypes": [embedding_type],
+        }
+        if self.dimensions:
+            body["dimensions"] = self.dimensions
+        response = self.embed_fn(self.model_id, json.dumps(body))
+        return response["embeddingsByType"][embedding_type]
+
+    def embed(self, texts, embedding_type="float", progress=None):
+        """
+        Embed texts, calling the model only for texts that are not cached.
+        Args:
+            texts (list): The texts to embed.
+            embedding_type (str): "float" or "binary".
+            progress (callable): Optional, called with (done, total) as requests finish.
+        Returns:
+            vectors (array): float32 matrix with one row per text, in order.
+        """
+        texts = list(texts)
+        unique = list(dict.fromkeys(texts))
+        vectors = self.cache.get_many(self.cache_model_id, unique, embedding_type)
+        missing = [text for text in unique if text not in vectors]
+        if missing:
+            logger.info("Embedding %d of %d texts with %s (%d cached)",
+                        len(missing), len(unique), self.model_id, len(unique) - len(missing))
+            fetched, errors = {}, {}
+            with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+                futures = {executor.submit(self._request, text, embedding_type): text for text in missing}
+                for done, future in enumerate(as_completed(futures), 1):
+                    text = futures[future]
+                    try:
+                        fetched[text] = np.asarray(future.result(), dtype=np.float32)
+                    except Exception as err:
+                        errors[text] = err
+                    if len(fetched) >= 500:
+                        self.cache.put_many(self.cache_model_id, fetched, embedding_type)
+                        vectors.update(fetched)
+                        fetched = {}
+                    if progress:
+                        progress(done, len(missing))
+            # Keep what succeeded so a retry only pays for the failures
+            self.cache.put_many(self.cache_model_id, fetched, embedding_type)
+            vectors.update(fetched)
+            if errors:
+                text, err = next(iter(errors.items()))
+                raise EmbeddingError(errors, f"Failed to embed {len(errors)} texts, e.g. {text!r}: {err}")
+        return np.stack([vectors[text] for text in texts]) if texts else np.empty((0, 0), dtype=np.float32)
+
+    def similarity(self, texts_a, texts_b, embedding_type="float"):
+        """Cosine similarity matrix between two lists of texts"""
+        return cosine_similarity_matrix(self.embed(texts_a, embedding_type), self.embed(texts_b, embedding_type))
+
+
+def read_vocabulary(path):
+    """Words from a file with one word per line, skipping blanks and duplicates"""
+    with open(path, encoding="utf-8") as f:
+        return list(dict.fromkeys(line.strip() for line in f if line.strip()))
+
+
+def build_vocabulary_store(service, vocab_path, output_path, embedding_type="float"):
+    """
+    Embed every word in vocab_path and write them as an EmbeddingStore at output_path.
+    Words the model rejects are left out. Point EMBEDDING_STORE_PATH at the result to play with it.
+    """
+    from embedding_store import EmbeddingStore
+
+    words = read_vocabulary(vocab_path)
+    report_every = max(1, len(words) // 20)
+
+    def progress(done, total):
+        if done % report_every == 0 or done == total:
+            logger.info("Embedded %d/%d", done, total)
+
+    try:
+        vectors = service.embed(words, embedding_type, progress=progress)
+    except EmbeddingError as err:
+        logger.warning("Skipping %d words that could not be embedded: %s", len(err.errors), err)
+        words = [word for word in words if word not in err.errors]
+        # Everything else is cached now, so this makes no new requests
+        vectors = service.embed(words, embedding_type)
+    store = EmbeddingStore.build(words, vectors, output_path)
+    logger.info("Wrote %d words x %d dimensions to %s", len(store), store.vector_size, output_path)
+    return store
+
+
 def main():
     """
-    Entrypoint for Amazon Titan Embeddings V2 - Text example.
+    Entrypoint for Amazon Titan Embeddings V2 - Text.
     """
 
     logging.basicConfig(level=logging.INFO,
                         format="%(levelname)s: %(message)s")
 
-    model_id = "amazon.titan-embed-text-v2:0"
-    input_texts = ["house", "kitchen"]
-
-    embeddings_results = []
-    for input_text in input_texts:
-        # Create request body.
-        body = json.dumps({
-            "inputText": input_text,
-            "embeddingTypes": ["binary"]
-        })
-
-        try:
-            response = generate_embeddings(model_id, body)
-            # print(f"\nGenerated embeddings vector for '{input_text}': {response['embeddingsByType']['binary']}")
-            embeddings_results.append(response['embeddingsByType']['binary'])
-
-        except ClientError as err:
-            message = err.response["Error"]["Message"]
-            logger.error("A client error occurred: %s", message)
-            print("A client error occured: " + format(message))
-
-    if len(embeddings_results) == 2:
-        vector1, vector2 = embeddings_results[0], embeddings_results[1]
-        
-        # Calculate dot product
-        dot_product = sum(a * b for a, b in zip(vector1, vector2))
-        
-        # Calculate magnitudes
-        magnitude1 = math.sqrt(sum(a * a for a in vector1))
-        magnitude2 = math.sqrt(sum(b * b for b in vector2))
-        
-        # Calculate cosine similarity
-        similarity = dot_product / (magnitude1 * magnitude2)
-        print(f"\nCosine similarity between '{input_texts[0]}' and '{input_texts[1]}': {similarity}")
-
-    print(f"\nFinished generating embeddings with Amazon Titan Text Embeddings V2 model {model_id}.")
+    parser = argparse.ArgumentParser(description="Generate Titan text embeddings")
+    parser.add_argument("words", nargs="*", default=["house", "kitchen"], help="words to compare")
+    parser.add_argument("--vocab", help="file with one word per line to embed into an embedding store")
+    parser.add_argument("--output", help="embedding store directory to write with --vocab")
+    parser.add_argument("--model-id", default=DEFAULT_MODEL_ID)
+    parser.add_argument("--dimensions", type=int, choices=[256, 512, 1024])
+    parser.add_argument("--embedding-type", default="float", choices=["float", "binary"])
+    parser.add_argument("--concurrency", type=int, default=EMBEDDING_CONCURRENCY)
+    parser.add_argument("--cache", default=EMBEDDING_CACHE_PATH, help="SQLite embedding cache")
+    args = parser.parse_args()
+
+    service = EmbeddingService(args.model_id, EmbeddingCache(args.cache), args.concurrency, args.dimensions)
+
+    try:
+        if args.vocab:
+            if not args.output:
+                parser.error("--vocab needs --output")
+            build_vocabulary_store(service, args.vocab, args.output, args.embedding_type)
+            return
+
+        similarities = service.similarity(args.words, args.words, args.embedding_type)
+        for i, word in enumerate(args.words):
+            for j in range(i + 1, len(args.words)):
+                print(f"Cosine similarity between '{word}' and '{args.words[j]}': {similarities[i, j]:.4f}")
+
+    except EmbeddingError as err:
+        logger.error("An error occurred: %s", err)
+        print("An error occured: " + format(err))
+
+    print(f"\nFinished generating embeddings with Amazon Titan Text Embeddings V2 model {args.model_id}.")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,265 @@
+import bisect
+import json
+import os
+import re
+import shutil
+
+import numpy as np
+
+FORMAT_VERSION = 2
+# Version 1 stores lack int8 support but are otherwise the same layout
+READABLE_VERSIONS = (1, 2)
+INT8_MAX = 127
+# Lowercase alphabetic words, the only kind the game expects players to guess
+COMMON_WORD_PATTERN = re.compile(r"^[a-z]{2,}$")
+
+
+class _SortedKeys:
+    """Sequence view of the vocabulary in sorted order, for bisect"""
+
+    def __init__(self, vocab):
+        self.vocab = vocab
+
+    def __len__(self):
+        return len(self.vocab)
+
+    def __getitem__(self, position):
+        return self.vocab.key(self.vocab._sorted[position])
+
+
+class VocabIndex:
+    """Compact word -> index mapping backed by memory-mapped arrays.
+
+    Words are stored once as a UTF-8 blob with an offsets array, plus a
+    permutation that lists them in sorted order. Lookups are a binary search,
+    so no per-word Python objects are created and every worker shares the
+    same pages. Supports the parts of the dict interface the app uses.
+    """
+
+    def __init__(self, blob, offsets, sorted_order):
+        self.blob = blob
+        self.offsets = offsets
+        self.sorted_order = sorted_order
+        # memoryviews index to plain ints/bytes, avoiding numpy scalar overhead per lookup
+        self._blob = memoryview(np.ascontiguousarray(blob)).cast("B")
+        self._offsets = memoryview(np.ascontiguousarray(offsets, dtype=np.int64)).cast("B").cast("q")
+        self._sorted = memoryview(np.ascontiguousarray(sorted_order, dtype=np.int32)).cast("B").cast("i")
+        self._sorted_keys = _SortedKeys(self)
+
+    def key(self, index):
+        return str(self._blob[self._offsets[index]:self._offsets[index + 1]], "utf-8")
+
+    def get(self, word, default=None):
+        if not isinstance(word, str):
+            return default
+        position = bisect.bisect_left(self._sorted_keys, word)
+        if position < len(self) and self._sorted_keys[position] == word:
+            return self._sorted[position]
+        return default
+
+    def __getitem__(self, word):
+        index = self.get(word)
+        if index is None:
+            raise KeyError(word)
+        return index
+
+    def __contains__(self, word):
+        return self.get(word) is not None
+
+    def __len__(self):
+        return len(self.sorted_order)
+
+    def __iter__(self):
+        return (self.key(i) for i in range(len(self)))
+
+
+class _IndexToKey:
+    """Lazy list-like view of the vocabulary in index order"""
+
+    def __init__(self, vocab):
+        self.vocab = vocab
+
+    def __len__(self):
+        return len(self.vocab)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.vocab.key(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return self.vocab.key(index)
+
+    def __iter__(self):
+        return iter(self.vocab)
+
+
+class EmbeddingStore:
+    """Read-only, unit-normalized word vectors opened with mmap.
+
+    The on-disk layout is a directory holding the normalized matrix
+    (vectors.npy), the vocabulary blob and index arrays, and a small
+    meta.json. Opening it maps the files instead of reading them, so all
+    gunicorn workers share the same physical pages. The object mirrors the
+    subset of gensim's KeyedVectors API used by the app.
+
+    Vectors are float32, float16, or int8 with a per-row scale
+    (scales.npy). An int8 matrix is dequantized into float32 the first time
+    get_normed_vectors is called, so each process holds one float copy; that
+    is small for a pruned vocabulary, which is what int8 stores are for.
+    """
+
+    def __init__(self, path, mmap=True):
+        self.path = path
+        mmap_mode = "r" if mmap else None
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+        if self.meta.get("version") not in READABLE_VERSIONS:
+            raise ValueError(f"Unsupported embedding store version in {path}: {self.meta.get('version')}")
+
+        self.vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode=mmap_mode)
+        blob = np.load(os.path.join(path, "vocab_blob.npy"), mmap_mode=mmap_mode)
+        offsets = np.load(os.path.join(path, "vocab_offsets.npy"), mmap_mode=mmap_mode)
+        sorted_order = np.load(os.path.join(path, "vocab_sorted.npy"), mmap_mode=mmap_mode)
+        self.key_to_index = VocabIndex(blob, offsets, sorted_order)
+        self.index_to_key = _IndexToKey(self.key_to_index)
+        self.vector_size = self.vectors.shape[1]
+        self.scales = None
+        if self.meta.get("dtype") == "int8":
+            self.scales = np.load(os.path.join(path, "scales.npy"), mmap_mode=mmap_mode)
+        self._normed = None
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def __contains__(self, word):
+        return word in self.key_to_index
+
+    def __getitem__(self, word):
+        return self.get_vector(word)
+
+    def get_index(self, word):
+        return self.key_to_index[word]
+
+    def get_vector(self, word):
+        """Return the unit-normalized vector for word as float32"""
+        if self.scales is not None:
+            return self.get_normed_vectors()[self.key_to_index[word]]
+        return np.asarray(self.vectors[self.key_to_index[word]], dtype=np.float32)
+
+    def get_normed_vectors(self):
+        # Vectors are normalized when the store is written
+        if self.scales is None:
+            return self.vectors
+        if self._normed is None:
+            normed = np.asarray(self.vectors, dtype=np.float32) * np.asarray(self.scales, dtype=np.float32)[:, None]
+            # Rounding moves rows slightly off the unit sphere; put them back so dot products stay cosines
+            norms = np.linalg.norm(normed, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            normed /= norms
+            self._normed = normed
+        return self._normed
+
+    @classmethod
+    def build(cls, keys, vectors, path, dtype=np.float32):
+        """Write keys/vectors to a new store directory at path.
+
+        dtype is float32, float16 or int8; int8 rows are scaled so their
+        largest component maps to 127. The directory is assembled under a
+        temporary name and renamed into place, so concurrent builders never
+        expose a half-written store.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        normed = vectors / norms
+        scales = None
+        if np.dtype(dtype) == np.int8:
+            scales = np.abs(normed).max(axis=1) / INT8_MAX
+            scales[scales == 0] = 1.0
+            normed = np.rint(normed / scales[:, None]).astype(np.int8)
+            scales = scales.astype(np.float32)
+        else:
+            normed = normed.astype(dtype)
+
+        encoded = [key.encode("utf-8") for key in keys]
+        if len(encoded) != len(normed):
+            raise ValueError(f"Got {len(encoded)} keys for {len(normed)} vectors")
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(key) for key in encoded])
+        blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        # UTF-8 byte order matches str code point order, which bisect relies on
+        sorted_order = np.array(sorted(range(len(encoded)), key=encoded.__getitem__), dtype=np.int32)
+
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        np.save(os.path.join(tmp_path, "vectors.npy"), normed)
+        np.save(os.path.join(tmp_path, "vocab_blob.npy"), blob)
+        np.save(os.path.join(tmp_path, "vocab_offsets.npy"), offsets)
+        np.save(os.path.join(tmp_path, "vocab_sorted.npy"), sorted_order)
+        if scales is not None:
+            np.save(os.path.join(tmp_path, "scales.npy"), scales)
+        with open(os.path.join(tmp_path, "meta.json"), "w") as f:
+            json.dump({
+                "version": FORMAT_VERSION,
+                "count": len(normed),
+                "vector_size": int(normed.shape[1]),
+                "dtype": np.dtype(dtype).name,
+            }, f)
+
+        try:
+            os.rename(tmp_path, path)
+        except OSError:
+            # Another worker finished first; keep its copy
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            if not os.path.isdir(path):
+                raise
+        return cls(path)
+
+    @classmethod
+    def from_keyed_vectors(cls, keyed_vectors, path, dtype=np.float32, vocab_size=None, pattern=None, keep=()):
+        """Convert a gensim model, optionally keeping only its most frequent words (see frequent_words)"""
+        keys = keyed_vectors.index_to_key
+        if vocab_size is None and pattern is None:
+            return cls.build(keys, keyed_vectors.vectors, path, dtype=dtype)
+        indices = frequent_words(keys, vocab_size, pattern, keep)
+        return cls.build([keys[i] for i in indices], keyed_vectors.vectors[indices], path, dtype=dtype)
+
+    @classmethod
+    def from_word_dict(cls, word_vectors, path, dtype=np.float32):
+        """Convert a {word: vector} dict, such as the pickled word_embeddings.npy game.py used to load"""
+        keys = list(word_vectors)
+        vectors = np.stack([np.asarray(word_vectors[key], dtype=np.float32) for key in keys])
+        return cls.build(keys, vectors, path, dtype=dtype)
+
+
+def frequent_words(keys, limit=None, pattern=None, keep=()):
+    """Indices of the first `limit` keys that match pattern, plus any key in keep.
+
+    GloVe and word2vec models list words most frequent first, so this keeps
+    the most common words. Order is preserved, which keeps the result
+    frequency ordered too.
+    """
+    keep = set(keep)
+    indices, matched = [], 0
+    for index, key in enumerate(keys):
+        wanted = pattern is None or pattern.match(key)
+        if wanted and (limit is None or matched < limit):
+            matched += 1
+            indices.append(index)
+        elif key in keep:
+            indices.append(index)
+    return np.array(indices, dtype=np.int64)
+
+
+def open_or_build(store_path, model_path, dtype=np.float32):
+    """Open the store at store_path, converting the gensim model at model_path on first use"""
+    if not os.path.isdir(store_path):
+        from gensim.models import KeyedVectors
+
+        print(f"Building embedding store '{store_path}' from '{model_path}'...")
+        keyed_vectors = KeyedVectors.load(model_path)
+        EmbeddingStore.from_keyed_vectors(keyed_vectors, store_path, dtype=dtype)
+    return EmbeddingStore(store_path)
@@ -1,12 +1,46 @@
 from flask import Flask, jsonify, request
+import argparse
+import os
 import random
 from datetime import datetime, timedelta
 import numpy as np
 from LLM import llm
 from langchain_core.messages import HumanMessage
+from embedding_store import EmbeddingStore
+from warmup import Lazy
 
 app = Flask(__name__)
 
+# Pickled {word: vector} dict from np.save, the format this script used to load
+EMBEDDINGS_PATH = 'word_embeddings.npy'
+# The same vectors as one normalized matrix plus a word -> index table (see embedding_store.py)
+EMBEDDINGS_STORE_PATH = os.getenv('EMBEDDINGS_STORE_PATH', 'word_embeddings.store')
+
+def convert_embeddings(npy_path=EMBEDDINGS_PATH, store_path=EMBEDDINGS_STORE_PATH, dtype=np.float32):
+    """Convert the pickled dict at npy_path into an embedding store at store_path"""
+    print(f"Converting '{npy_path}' into '{store_path}'...")
+    word_embeddings = np.load(npy_path, allow_pickle=True).item()
+    return EmbeddingStore.from_word_dict(word_embeddings, store_path, dtype=dtype)
+
+class WordEmbeddings:
+    """Unit-normalized vectors as one contiguous matrix, plus a word -> row table"""
+
+    def __init__(self, store):
+        # A plain ndarray over the mapped file: indexing it skips np.memmap's per-access overhead
+        self.vectors = np.asarray(store.get_normed_vectors())
+        # One dict lookup per word; the store's own index is a binary search, slower per call
+        self.word_to_index = {word: index for index, word in enumerate(store.index_to_key)}
+        self.words = list(self.word_to_index)
+
+def load_embeddings():
+    """Open the embedding store, converting the pickled dict on first use"""
+    if not os.path.isdir(EMBEDDINGS_STORE_PATH):
+        convert_embeddings()
+    return WordEmbeddings(EmbeddingStore(EMBEDDINGS_STORE_PATH))
+
+# Opened once per process and shared by every Game
+embeddings = Lazy('word embeddings', load_embeddings)
+
 class Game:
     def __init__(self):
         self.target_word = None
@@ -15,10 +49,15 @@ class Game:
         self.game_over = False
         self.winner = None
         self.current_turn = 'human'  # 'human' or 'ai'
-        
-        # Load word embeddings
-        self.word_embeddings = np.load('word_embeddings.npy', allow_pickle=True).item()
-        self.words = list(self.word_embeddings.keys())
+    
+    @property
+    def word_embeddings(self):
+        # Loaded by the first game that needs them, then shared
+        return embeddings.get()
+    
+    @property
+    def words(self):
+        return self.word_embeddings.words
         
     def start_new_game(self):
         self.target_word = random.choice(self.words)
@@ -30,11 +69,13 @@ class Game:
         return self.target_word
     
     def calculate_similarity(self, word1, word2):
-        if word1 not in self.word_embeddings or word2 not in self.word_embeddings:
+        word_embeddings = self.word_embeddings
+        index1 = word_embeddings.word_to_index.get(word1)
+        index2 = word_embeddings.word_to_index.get(word2)
+        if index1 is None or index2 is None:
             return 0.0
-        vec1 = self.word_embeddings[word1]
-        vec2 = self.word_embeddings[word2]
-        return float(np.dot(vec1, vec2) / (np.linalg.norm(vec1) * np.linalg.norm(vec2)))
+        # Rows are normalized once, when the store is written
+        return float(np.dot(word_embeddings.vectors[index1], word_embeddings.vectors[index2]))
     
     def make_ai_guess(self):
         # Create context from previous guesses
@@ -136,4 +177,15 @@ def give_up():
     })
 
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Word game server over the word embeddings.")
+    parser.add_argument('--convert', action='store_true',
+                        help=f"convert {EMBEDDINGS_PATH} into {EMBEDDINGS_STORE_PATH} and exit")
+    parser.add_argument('--dtype', choices=['float32', 'float16', 'int8'], default='float32')
+    args = parser.parse_args()
+    if args.convert:
+        if os.path.exists(EMBEDDINGS_STORE_PATH):
+            parser.error(f"'{EMBEDDINGS_STORE_PATH}' already exists")
+        store = convert_embeddings(dtype=np.dtype(args.dtype))
+        print(f"Store saved as '{EMBEDDINGS_STORE_PATH}': {len(store)} words.")
+    else:
+        app.run(debug=True)
\ No newline at end of file
@@ -1,7 +1,17 @@
+import argparse
+import os
+
 import gensim.downloader as api
+import numpy as np
+
+from embedding_store import COMMON_WORD_PATTERN, EmbeddingStore
 
 # Path to save the model
 MODEL_PATH = "glove-wiki-gigaword-50.model"
+# Compact artifact the app loads instead of the model (see embedding_store.py)
+STORE_PATH = "glove-wiki-gigaword-50.store"
+# Most frequent common words kept in the store
+DEFAULT_VOCAB_SIZE = 100000
 
 # Download and save the model
 def download_and_save_model():
@@ -9,6 +19,36 @@ def download_and_save_model():
     model = api.load("glove-wiki-gigaword-50")  # GloVe with 50 dimensions
     model.save(MODEL_PATH)
     print(f"Model saved locally as '{MODEL_PATH}'.")
+    return model
+
+# Build the pruned, quantized embedding store from the full model
+def build_store(model, store_path, vocab_size, dtype, keep=()):
+    print(f"Building '{store_path}': {vocab_size or 'all'} most frequent common words, {dtype} vectors...")
+    store = EmbeddingStore.from_keyed_vectors(
+        model, store_path, dtype=np.dtype(dtype), vocab_size=vocab_size or None,
+        pattern=COMMON_WORD_PATTERN if vocab_size else None, keep=keep
+    )
+    size = sum(os.path.getsize(os.path.join(store_path, name)) for name in os.listdir(store_path))
+    print(f"Store saved as '{store_path}': {len(store)} words, {size / 1e6:.1f} MB.")
+    return store
 
 if __name__ == "__main__":
-    download_and_save_model()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Download the GloVe model and build the embedding store the app loads.")
+    parser.add_argument("--store", nargs="?", const=STORE_PATH, default=None,
+                        help=f"also build an embedding store (default path {STORE_PATH})")
+    parser.add_argument("--vocab-size", type=int, default=DEFAULT_VOCAB_SIZE,
+                        help="keep this many of the most frequent lowercase words; 0 keeps the whole vocabulary")
+    parser.add_argument("--dtype", choices=["float32", "float16", "int8"], default="int8")
+    parser.add_argument("--keep", nargs="*", default=[], help="words to keep whatever their frequency")
+    args = parser.parse_args()
+
+    if os.path.exists(MODEL_PATH):
+        from gensim.models import KeyedVectors
+        print(f"Using the model saved as '{MODEL_PATH}'.")
+        model = KeyedVectors.load(MODEL_PATH)
+    else:
+        model = download_and_save_model()
+    if args.store:
+        if os.path.exists(args.store):
+            parser.error(f"'{args.store}' already exists")
+        build_store(model, args.store, args.vocab_size, args.dtype, keep=args.keep)
@@ -0,0 +1,253 @@
+import glob
+import json
+import os
+import threading
+import time
+from collections import deque
+
+
+class HistoryQueue:
+    """Write-behind queue for game history records.
+
+    Request handlers put() a record and return without touching DynamoDB. A
+    background thread hands records to `write_batch` once `batch_size` are
+    waiting or the oldest has waited `flush_interval` seconds. A failed write
+    is retried with capped exponential backoff, up to `max_attempts` times
+    per record; a record that fails with an error `is_retryable` rejects, or
+    runs out of attempts, is dead-lettered to a dead-*.jsonl file in
+    `spill_dir` and logged. At most `max_pending` records wait in memory;
+    beyond that put() spills to disk instead. close() spills the records
+    still waiting to a history-*.jsonl file in `spill_dir`, and the queue
+    replays those files on start and whenever it runs empty.
+
+    write_batch(records) writes a list of records and returns the ones that
+    still need a retry (or raises to retry the whole batch). Returned records
+    keep the keys of the records passed in and may set 'retryable': False.
+    """
+
+    def __init__(self, write_batch, spill_dir=None, batch_size=None, flush_interval=None,
+                 backoff=0.5, max_backoff=30.0, max_attempts=None, max_pending=None, is_retryable=None):
+        self.write_batch = write_batch
+        self.spill_dir = spill_dir or os.getenv("HISTORY_SPILL_DIR", "history_spill")
+        self.batch_size = batch_size or int(os.getenv("HISTORY_BATCH_SIZE", 25))
+        self.flush_interval = flush_interval if flush_interval is not None else float(os.getenv("HISTORY_FLUSH_INTERVAL", 1.0))
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_attempts = max_attempts or int(os.getenv("HISTORY_MAX_ATTEMPTS", 20))
+        self.max_pending = max_pending or int(os.getenv("HISTORY_MAX_PENDING", 10000))
+        self.is_retryable = is_retryable or (lambda error: True)
+        self._cond = threading.Condition()
+        self._pending = deque()  # (enqueued_at, record)
+        self._inflight = []
+        self._retry_at = 0.0
+        self._stopping = False
+        self._worker = None
+        self._worker_pid = None
+        self._reset_metrics()
+
+    def _reset_metrics(self):
+        self._metrics = {
+            "enqueued": 0,
+            "written": 0,
+            "flushes": 0,
+            "failed_flushes": 0,
+            "spilled": 0,
+            "replayed": 0,
+            "overflowed": 0,
+            "dead_lettered": 0,
+        }
+        self._flush_seconds_total = 0.0
+        self._flush_seconds_max = 0.0
+        self._flush_seconds_last = 0.0
+
+    def start(self):
+        """Start the worker for this process, replaying records spilled by earlier runs"""
+        with self._cond:
+            if self._worker is not None and self._worker_pid == os.getpid():
+                return
+            if self._worker_pid is not None:
+                # Forked from a process with a running queue: its records
+                # belong to the parent, whose worker still writes them
+                self._pending.clear()
+                self._inflight = []
+                self._reset_metrics()
+            self._stopping = False
+            self._worker_pid = os.getpid()
+            self._replay_spilled()
+            self._worker = threading.Thread(target=self._run, name="history-queue", daemon=True)
+            self._worker.start()
+
+    def put(self, record):
+        self.start()
+        with self._cond:
+            self._metrics["enqueued"] += 1
+            if len(self._pending) >= self.max_pending:
+                # Writes are falling behind or failing: keep the record on disk,
+                # to be replayed once the queue has drained, rather than in memory
+                self._metrics["overflowed"] += 1
+                self._spill([record])
+                return
+            self._pending.append((time.monotonic(), record))
+            self._cond.notify()
+
+    def _next_batch(self):
+        """Wait until a batch is due and take it; returns None once stopped and drained"""
+        with self._cond:
+            while True:
+                backing_off = self._retry_at - time.monotonic()
+                if backing_off > 0 and not self._stopping:
+                    self._cond.wait(backing_off)
+                    continue
+                if self._pending and (self._stopping or len(self._pending) >= self.batch_size):
+                    break
+                if self._stopping:
+                    return None
+                if self._pending:
+                    wait = self._pending[0][0] + self.flush_interval - time.monotonic()
+                    if wait <= 0:
+                        break
+                    self._cond.wait(wait)
+                else:
+                    self._cond.wait()
+            count = min(self.batch_size, len(self._pending))
+            self._inflight = [self._pending.popleft() for _ in range(count)]
+            return self._inflight
+
+    def _write(self, records):
+        """write_batch, with the records left to retry marked 'retryable' or not"""
+        try:
+            return self.write_batch(records)
+        except Exception as e:
+            print(f"Error writing {len(records)} game history records: {e}")
+            retryable = self.is_retryable(e)
+            if len(records) > 1 and not retryable:
+                # One malformed record fails the whole batch: write them one at a time to find it
+                return [failed for record in records for failed in self._write([record])]
+            return [dict(record, retryable=retryable) for record in records]
+
+    def _run(self):
+        failures = 0
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+
+            start = time.monotonic()
+            failed = self._write([record for _, record in batch])
+            elapsed = time.monotonic() - start
+
+            retry, dead = [], []
+            for record in failed:
+                record["attempts"] = record.get("attempts", 0) + 1
+                if record.pop("retryable", True) and record["attempts"] < self.max_attempts:
+                    retry.append(record)
+                else:
+                    dead.append(record)
+
+            with self._cond:
+                self._inflight = []
+                self._metrics["flushes"] += 1
+                self._metrics["written"] += len(batch) - len(failed)
+                self._flush_seconds_total += elapsed
+                self._flush_seconds_max = max(self._flush_seconds_max, elapsed)
+                self._flush_seconds_last = elapsed
+                if dead:
+                    self._dead_letter(dead)
+                if not retry:
+                    failures = 0
+                    if not self._pending and not self._stopping:
+                        # Pick up records spilled while the queue was full
+                        self._replay_spilled()
+                    continue
+
+                # Put the records back at the front, due immediately after the backoff
+                self._metrics["failed_flushes"] += 1
+                if self._stopping:
+                    if self._worker is None:
+                        # close() gave up waiting and has spilled the rest; spill these after them
+                        self._spill(retry)
+                    else:
+                        # Leave them for close() to spill rather than hold up shutdown
+                        self._pending.extendleft((start, record) for record in reversed(retry))
+                    return
+                self._pending.extendleft((start, record) for record in reversed(retry))
+                failures += 1
+                self._retry_at = time.monotonic() + min(self.max_backoff, self.backoff * 2 ** (failures - 1))
+
+    def close(self, timeout=5.0):
+        """Write what can be written within timeout, then spill the rest to disk"""
+        with self._cond:
+            if self._worker is None or self._worker_pid != os.getpid():
+                return
+            self._stopping = True
+            self._cond.notify_all()
+        self._worker.join(timeout)
+        with self._cond:
+            # A batch still in flight is left to the worker: its stats counters
+            # are not idempotent, so replaying it could count a game twice. If
+            # that write fails the worker spills what is left of it itself.
+            records = [record for _, record in self._pending]
+            self._pending.clear()
+            self._worker = None
+            if records:
+                self._spill(records)
+
+    def _spill(self, records):
+        os.makedirs(self.spill_dir, exist_ok=True)
+        path = os.path.join(self.spill_dir, f"history-{os.getpid()}-{time.time_ns()}.jsonl")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+        os.replace(tmp_path, path)
+        self._metrics["spilled"] += len(records)
+        print(f"Spilled {len(records)} unwritten game history records to {path}")
+
+    def _dead_letter(self, records):
+        # Not replayed: rename the file to history-*.jsonl to try these again
+        os.makedirs(self.spill_dir, exist_ok=True)
+        path = os.path.join(self.spill_dir, f"dead-{os.getpid()}-{time.time_ns()}.jsonl")
+        with open(path, "w") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+        self._metrics["dead_lettered"] += len(records)
+        for record in records:
+            print(f"Gave up on game history record {record.get('game', {}).get('game_id')} "
+                  f"after {record['attempts']} attempt(s)")
+        print(f"Dead-lettered {len(records)} game history records to {path}")
+
+    def _replay_spilled(self):
+        for path in sorted(glob.glob(os.path.join(self.spill_dir, "history-*.jsonl"))):
+            if len(self._pending) >= self.max_pending:
+                break
+            # Claim the file first so only one worker process replays it
+            claimed = f"{path}.{os.getpid()}.replay"
+            try:
+                os.rename(path, claimed)
+            except OSError:
+                continue
+            with open(claimed) as f:
+                records = [json.loads(line) for line in f if line.strip()]
+            now = time.monotonic()
+            self._pending.extend((now, record) for record in records)
+            self._metrics["replayed"] += len(records)
+            os.remove(claimed)
+            print(f"Replaying {len(records)} game history records from {path}")
+
+    def depth(self):
+        with self._cond:
+            return len(self._pending) + len(self._inflight)
+
+    def metrics(self):
+        with self._cond:
+            flushes = self._metrics["flushes"]
+            return dict(
+                self._metrics,
+                depth=len(self._pending) + len(self._inflight),
+                oldest_age_seconds=round(time.monotonic() - self._pending[0][0], 3) if self._pending else 0.0,
+                flush_latency_ms={
+                    "last": round(self._flush_seconds_last * 1000, 2),
+                    "avg": round(self._flush_seconds_total / flushes * 1000, 2) if flushes else 0.0,
+                    "max": round(self._flush_seconds_max * 1000, 2),
+                },
+            )
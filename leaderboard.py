@@ -0,0 +1,83 @@
+import bisect
+import uuid
+
+
+class Leaderboard:
+    """One game's guesses ordered by rank (lower is better), kept sorted as guesses arrive.
+
+    Each guess is inserted at its place by binary search, and the set of
+    used words and the per-player counts are updated alongside, so nothing
+    is rebuilt or re-sorted per request. `etag` changes whenever the
+    content does: it combines an id that is new for every game with the
+    number of guesses, which only ever grows within a game. `delta` describes
+    a single new guess, for clients that keep their own copy of the board.
+    """
+
+    def __init__(self, entries=(), board_id=None):
+        # entries are (rank, word, player) tuples, already sorted by rank
+        self.id = board_id or uuid.uuid4().hex[:12]
+        # Rows are kept in the API's shape so a page is just a slice
+        self._rows = [{'word': word, 'rank': rank, 'player': player} for rank, word, player in entries]
+        self._ranks = [row['rank'] for row in self._rows]  # bisect keys, parallel to _rows
+        self.used_words = {row['word'] for row in self._rows}
+        self._player_counts = {}
+        for row in self._rows:
+            self._player_counts[row['player']] = self._player_counts.get(row['player'], 0) + 1
+
+    @classmethod
+    def from_guesses(cls, human_guesses, ai_guesses, board_id=None):
+        """Build from a game's (word, rank, similarity) guess lists, as stored with its state"""
+        entries = [(rank, word, 'human') for word, rank, _ in human_guesses]
+        entries += [(rank, word, 'ai') for word, rank, _ in ai_guesses]
+        entries.sort(key=lambda entry: entry[0])
+        return cls(entries, board_id=board_id)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __contains__(self, word):
+        return word in self.used_words
+
+    def add(self, word, rank, player):
+        # bisect_right keeps equal ranks in insertion order, like a stable sort
+        position = bisect.bisect_right(self._ranks, rank)
+        self._ranks.insert(position, rank)
+        self._rows.insert(position, {'word': word, 'rank': rank, 'player': player})
+        self.used_words.add(word)
+        self._player_counts[player] = self._player_counts.get(player, 0) + 1
+        return position
+
+    def position(self, word, rank):
+        """Index of a guess in rank order, or None if it is not on the board"""
+        for position in range(bisect.bisect_left(self._ranks, rank), bisect.bisect_right(self._ranks, rank)):
+            if self._rows[position]['word'] == word:
+                return position
+        return None
+
+    def delta(self, word, rank):
+        """What a client holding the previous board needs to show one new guess: the row, where it goes, the totals"""
+        position = self.position(word, rank)
+        return {
+            'inserted': [] if position is None else [{'position': position, **self._rows[position]}],
+            'totalGuesses': len(self._rows),
+            'totalPlayers': self.total_players,
+            'etag': self.etag
+        }
+
+    @property
+    def best_rank(self):
+        return self._ranks[0] if self._ranks else None
+
+    @property
+    def total_players(self):
+        return len(self._player_counts)
+
+    @property
+    def etag(self):
+        return f"{self.id}-{len(self._rows)}"
+
+    def page(self, offset=0, limit=None):
+        """Rows offset..offset+limit for the API (all remaining when limit is None); rows are shared, do not modify"""
+        end = None if limit is None else offset + limit
+        return self._rows[offset:end]
+
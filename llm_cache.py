@@ -0,0 +1,156 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+
+
+class LLMGuessCache:
+    """Cache of the LLM's guesses, keyed by the game situation its prompt describes.
+
+    The prompt shows the ten best guesses and their similarities, so the key
+    is those words, sorted, with similarities rounded into `bucket`-wide
+    buckets; games that reach the same situation share answers whatever the
+    order of play. Each key keeps up to `answers_per_key` valid answers,
+    newest first, and a lookup returns the first one not already used.
+
+    Entries live in an in-memory LRU of `max_entries` and, when `path` is
+    set, in a SQLite file shared by all workers. Both expire after `ttl`.
+    """
+
+    PURGE_EVERY = 500
+
+    def __init__(self, path=None, ttl=DEFAULT_TTL_SECONDS, max_entries=10000, bucket=0.05, top_guesses=10,
+                 answers_per_key=5):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.bucket = bucket
+        self.top_guesses = top_guesses
+        self.answers_per_key = answers_per_key
+        self._entries = OrderedDict()  # key -> (answers, updated_at)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._writes = 0
+        self._hits = 0
+        self._misses = 0
+        self._exhausted = 0
+        self._llm_calls = 0
+        self._llm_seconds = 0.0
+        self._hit_seconds = 0.0
+        if path:
+            with self._connection() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS llm_guesses ("
+                    "key TEXT PRIMARY KEY, answers TEXT NOT NULL, updated_at REAL NOT NULL)"
+                )
+
+    def _connection(self):
+        # sqlite3 connections must not cross threads or forked workers
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def key(self, guesses):
+        """Canonical key for a list of (word, rank, similarity) guesses"""
+        best = sorted(guesses, key=lambda guess: guess[1])[:self.top_guesses]
+        return "|".join(sorted(f"{word}:{int(similarity // self.bucket)}" for word, _, similarity in best))
+
+    def _load(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if now - entry[1] <= self.ttl:
+                    self._entries.move_to_end(key)
+                    return entry[0]
+                del self._entries[key]
+        if not self.path:
+            return None
+
+        row = self._connection().execute(
+            "SELECT answers, updated_at FROM llm_guesses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or now - row[1] > self.ttl:
+            return None
+        answers = json.loads(row[0])
+        self._remember(key, answers, row[1])
+        return answers
+
+    def _remember(self, key, answers, updated_at):
+        with self._lock:
+            self._entries[key] = (answers, updated_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, guesses, used_words):
+        """Return (key, answer); answer is None when nothing cached is still playable"""
+        start = time.perf_counter()
+        key = self.key(guesses)
+        answers = self._load(key) or []
+        answer = next((word for word in answers if word not in used_words), None)
+        with self._lock:
+            if answer is not None:
+                self._hits += 1
+                self._hit_seconds += time.perf_counter() - start
+            else:
+                self._misses += 1
+                if answers:
+                    self._exhausted += 1
+        return key, answer
+
+    def put(self, key, answer, llm_seconds):
+        """Record a valid answer the LLM gave for key, and how long it took"""
+        now = time.time()
+        answers = self._load(key) or []
+        answers = [answer] + [word for word in answers if word != answer][:self.answers_per_key - 1]
+        self._remember(key, answers, now)
+        with self._lock:
+            self._llm_calls += 1
+            self._llm_seconds += llm_seconds
+            self._writes += 1
+            purge = self._writes % self.PURGE_EVERY == 0
+        if self.path:
+            conn = self._connection()
+            conn.execute(
+                "INSERT INTO llm_guesses (key, answers, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET answers = excluded.answers, updated_at = excluded.updated_at",
+                (key, json.dumps(answers), now),
+            )
+            if purge:
+                conn.execute("DELETE FROM llm_guesses WHERE updated_at < ?", (now - self.ttl,))
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            average_llm = self._llm_seconds / self._llm_calls if self._llm_calls else 0.0
+            average_hit = self._hit_seconds / self._hits if self._hits else 0.0
+            return {
+                "entries": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                # Misses where every cached answer had already been played
+                "exhausted": self._exhausted,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "average_llm_ms": round(average_llm * 1000, 2),
+                "average_hit_ms": round(average_hit * 1000, 3),
+                "seconds_saved": round(self._hits * max(0.0, average_llm - average_hit), 3),
+            }
+
+
+def create_llm_cache():
+    """Build the cache from LLM_CACHE_PATH (empty for memory only), LLM_CACHE_TTL_SECONDS and LLM_CACHE_MAX_ENTRIES"""
+    return LLMGuessCache(
+        path=os.getenv("LLM_CACHE_PATH", "llm_cache.db") or None,
+        ttl=float(os.getenv("LLM_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS)),
+        max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", 10000)),
+    )
@@ -0,0 +1,154 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+RANK_TABLE_DIR = os.getenv("RANK_TABLE_DIR", "rank_tables")
+
+
+def model_fingerprint(normed_vectors):
+    """Short hash identifying a vector matrix, used to namespace persisted tables"""
+    digest = hashlib.sha1()
+    digest.update(str(normed_vectors.shape).encode("utf-8"))
+    digest.update(np.ascontiguousarray(normed_vectors[:8]).tobytes())
+    digest.update(np.ascontiguousarray(normed_vectors[-8:]).tobytes())
+    return digest.hexdigest()[:12]
+
+
+class RankEngine:
+    """True vocabulary ranks of every word against a target word.
+
+    When a target is prepared, one cosine pass of the target against the whole
+    normalized matrix is argsorted into a word index -> rank array (rank 1 is the
+    target itself). Scoring a guess is then an array lookup. Tables are kept in an
+    in-memory LRU and persisted as one .npy file per target so restarted workers
+    load them instead of recomputing.
+
+    With cached_targets, only those words' tables are kept and persisted; a
+    table for any other target is computed for the call and dropped, so
+    arbitrary targets can neither fill the disk nor evict the game's tables.
+    """
+
+    def __init__(self, normed_vectors, key_to_index, cache_dir=RANK_TABLE_DIR, max_tables=32, cached_targets=None):
+        self.normed_vectors = normed_vectors
+        self.key_to_index = key_to_index
+        self.max_tables = max_tables
+        self.cached_indices = None
+        if cached_targets is not None:
+            self.cached_indices = {key_to_index[word] for word in cached_targets if word in key_to_index}
+        self.cache_dir = None
+        if cache_dir:
+            self.cache_dir = os.path.join(cache_dir, model_fingerprint(normed_vectors))
+        self._tables = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.normed_vectors)
+
+    def _table_path(self, target_index):
+        return os.path.join(self.cache_dir, f"{target_index}.npy")
+
+    def scores(self, target_index):
+        """Similarity of every word to target_index; ranks sort on these"""
+        return np.asarray(self.normed_vectors @ self.normed_vectors[target_index], dtype=np.float32)
+
+    def similarities(self, word_indices, target_indices):
+        """Similarity of each word to the target at the same position"""
+        return np.einsum(
+            "ij,ij->i",
+            np.asarray(self.normed_vectors[word_indices], dtype=np.float32),
+            np.asarray(self.normed_vectors[target_indices], dtype=np.float32),
+        )
+
+    def _compute(self, target_index):
+        similarities = self.scores(target_index)
+        # Guarantee the target is rank 1 even if another word shares its vector
+        similarities[target_index] = np.inf
+        order = np.argsort(-similarities, kind="stable")
+        ranks = np.empty(len(order), dtype=np.int32)
+        ranks[order] = np.arange(1, len(order) + 1, dtype=np.int32)
+        return ranks
+
+    def _load_or_compute(self, target_index):
+        if self.cache_dir:
+            path = self._table_path(target_index)
+            if os.path.exists(path):
+                try:
+                    return np.load(path, mmap_mode="r")
+                except (OSError, ValueError) as e:
+                    print(f"Discarding unreadable rank table {path}: {e}")
+
+        ranks = self._compute(target_index)
+
+        if self.cache_dir:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                # Write then rename so concurrent workers never read a partial file
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    np.save(f, ranks)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                print(f"Could not persist rank table {path}: {e}")
+        return ranks
+
+    def table(self, target_word):
+        """Return the rank array for target_word, building it on first use.
+
+        Raises KeyError if target_word is not in the vocabulary.
+        """
+        return self.table_for_index(self.key_to_index[target_word])
+
+    def table_for_index(self, target_index):
+        if self.cached_indices is not None and target_index not in self.cached_indices:
+            return self._compute(target_index)
+
+        with self._lock:
+            ranks = self._tables.get(target_index)
+            if ranks is not None:
+                self._tables.move_to_end(target_index)
+                return ranks
+
+        ranks = self._load_or_compute(target_index)
+
+        with self._lock:
+            self._tables[target_index] = ranks
+            self._tables.move_to_end(target_index)
+            while len(self._tables) > self.max_tables:
+                self._tables.popitem(last=False)
+        return ranks
+
+    def prepare(self, target_word):
+        """Build (or load) the table for a newly picked target word"""
+        try:
+            self.table(target_word)
+        except KeyError:
+            print(f"Target word '{target_word}' is not in the vocabulary")
+
+    def lookup(self, word, target_word):
+        """Return (rank, similarity) of word against target_word.
+
+        Raises KeyError if either word is not in the vocabulary.
+        """
+        ranks = self.table(target_word)
+        word_index = self.key_to_index[word]
+        target_index = self.key_to_index[target_word]
+        similarity = float(self.similarities([word_index], [target_index])[0])
+        return int(ranks[word_index]), similarity
+
+    def lookup_batch(self, word_indices, target_indices):
+        """Return (ranks, similarities) arrays for aligned arrays of word and target indices.
+
+        Similarities come from one gathered row-wise pass; ranks from one fancy
+        index into each distinct target's table.
+        """
+        word_indices = np.asarray(word_indices, dtype=np.int64)
+        target_indices = np.asarray(target_indices, dtype=np.int64)
+        similarities = self.similarities(word_indices, target_indices)
+        ranks = np.empty(len(word_indices), dtype=np.int64)
+        for target_index in np.unique(target_indices):
+            selected = target_indices == target_index
+            ranks[selected] = self.table_for_index(int(target_index))[word_indices[selected]]
+        return ranks, similarities
@@ -0,0 +1,3 @@
+from scorer.similarity_scorer import HintLadder, SimilarityScorer
+
+__all__ = ["HintLadder", "SimilarityScorer"]
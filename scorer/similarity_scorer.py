@@ -0,0 +1,107 @@
+import random
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from embedding_store import COMMON_WORD_PATTERN
+
+# Rank bands hints are drawn from, farthest first
+DEFAULT_RANK_BANDS = ((501, 1000), (201, 500), (51, 200), (11, 50), (2, 10))
+
+
+class HintLadder:
+    """Top-K neighbours of one target word, bucketed by rank band.
+
+    Built once from the target's rank table; every hint for that target is
+    then served from these buckets without another neighbour search.
+    """
+
+    def __init__(self, target_word, entries, bands=DEFAULT_RANK_BANDS):
+        self.target_word = target_word
+        self.bands = bands
+        self.buckets = [[entry for entry in entries if low <= entry[1] <= high] for low, high in bands]
+
+    def hint(self, best_rank=None, exclude=(), rng=random):
+        """Pick a hint ranked better than best_rank, from the farthest band that has one.
+
+        Hints therefore move closer to the target one band at a time as the
+        player improves. Returns a (word, rank, similarity) tuple or None.
+        """
+        for bucket in self.buckets:
+            options = [
+                entry for entry in bucket
+                if (best_rank is None or entry[1] < best_rank) and entry[0] not in exclude
+            ]
+            if options:
+                return rng.choice(options)
+        return None
+
+    def neighbours(self, topn=None):
+        entries = sorted((entry for bucket in self.buckets for entry in bucket), key=lambda entry: entry[1])
+        return entries[:topn] if topn else entries
+
+
+class SimilarityScorer:
+    """Similarity queries over the app's embedding model.
+
+    Ranks come from the RankEngine's per-target tables. Hint ladders are
+    built from those tables and kept in an LRU of at most `max_ladders`
+    targets.
+    """
+
+    def __init__(self, model, rank_engine, ladder_size=1000, max_ladders=64, bands=DEFAULT_RANK_BANDS):
+        self.model = model
+        self.rank_engine = rank_engine
+        self.ladder_size = ladder_size
+        self.max_ladders = max_ladders
+        self.bands = bands
+        self._ladders = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_similarity(self, word1, word2):
+        """Cosine similarity of two words; raises KeyError for unknown words"""
+        return self.rank_engine.lookup(word1, word2)[1]
+
+    def get_rank(self, word, target_word):
+        return self.rank_engine.lookup(word, target_word)[0]
+
+    def get_similar(self, word, topn=10):
+        """Closest common words to word as (word, similarity) pairs, best first"""
+        return [(neighbour, similarity) for neighbour, _, similarity in self.get_ladder(word).neighbours(topn)]
+
+    def get_ladder(self, target_word):
+        with self._lock:
+            ladder = self._ladders.get(target_word)
+            if ladder is not None:
+                self._ladders.move_to_end(target_word)
+                return ladder
+
+        ladder = HintLadder(target_word, self._top_neighbours(target_word), self.bands)
+
+        with self._lock:
+            self._ladders[target_word] = ladder
+            self._ladders.move_to_end(target_word)
+            while len(self._ladders) > self.max_ladders:
+                self._ladders.popitem(last=False)
+        return ladder
+
+    def _top_neighbours(self, target_word):
+        ranks = np.asarray(self.rank_engine.table(target_word))
+        # Over-select, since rare tokens and punctuation are filtered out below
+        candidate_ids = np.flatnonzero(ranks <= self.ladder_size * 2)
+        candidate_ids = candidate_ids[np.argsort(ranks[candidate_ids])]
+
+        target_vector = self.model.get_normed_vectors()[self.model.key_to_index[target_word]]
+        similarities = np.asarray(self.model.get_normed_vectors()[candidate_ids], dtype=np.float32) @ target_vector
+
+        entries = []
+        for index, similarity in zip(candidate_ids.tolist(), similarities.tolist()):
+            word = self.model.index_to_key[index]
+            rank = int(ranks[index])
+            if rank == 1 or not COMMON_WORD_PATTERN.match(word):
+                continue
+            entries.append((word, rank, similarity))
+            if len(entries) >= self.ladder_size:
+                break
+        return entries
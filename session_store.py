@@ -0,0 +1,198 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+
+
+class SessionStore:
+    """Interface for game state keyed by session id"""
+
+    def get(self, session_id):
+        """Return the state for session_id, or None if missing or expired"""
+        raise NotImplementedError
+
+    def get_versioned(self, session_id):
+        """Return (state, version) for session_id, or (None, None); every set() bumps the version"""
+        raise NotImplementedError
+
+    def set(self, session_id, state):
+        raise NotImplementedError
+
+    def update(self, session_id, version, apply):
+        """Store apply(state) only if the session is still at version, as one atomic step.
+
+        apply gets the current state and returns the state to store, or None
+        to leave the session as it is. Returns the stored state, or None if
+        nothing was written (apply declined, or the session changed, expired
+        or is gone).
+        """
+        raise NotImplementedError
+
+    def delete(self, session_id):
+        raise NotImplementedError
+
+
+class MemorySessionStore(SessionStore):
+    """In-process LRU of live state objects with TTL eviction.
+
+    Only suitable when a single worker process serves all requests.
+    """
+
+    def __init__(self, max_sessions=10000, ttl=DEFAULT_TTL_SECONDS):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def get(self, session_id):
+        return self.get_versioned(session_id)[0]
+
+    def get_versioned(self, session_id):
+        with self._lock:
+            return self._touch(session_id, time.time())
+
+    def _touch(self, session_id, now):
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            return None, None
+        state, touched_at, version = entry
+        if now - touched_at > self.ttl:
+            del self._sessions[session_id]
+            return None, None
+        self._sessions[session_id] = (state, now, version)
+        self._sessions.move_to_end(session_id)
+        return state, version
+
+    def set(self, session_id, state):
+        now = time.time()
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            self._sessions[session_id] = (state, now, entry[2] + 1 if entry else 1)
+            self._sessions.move_to_end(session_id)
+            self._evict(now)
+
+    def update(self, session_id, version, apply):
+        now = time.time()
+        with self._lock:
+            state, current = self._touch(session_id, now)
+            if state is None or current != version:
+                return None
+            state = apply(state)
+            if state is not None:
+                self._sessions[session_id] = (state, now, version + 1)
+            return state
+
+    def delete(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def _evict(self, now):
+        # Oldest entries sit at the front, so expired ones are popped first
+        while self._sessions:
+            session_id, (_, touched_at, _) = next(iter(self._sessions.items()))
+            if len(self._sessions) <= self.max_sessions and now - touched_at <= self.ttl:
+                break
+            self._sessions.popitem(last=False)
+
+
+class SQLiteSessionStore(SessionStore):
+    """Session state serialized into a local SQLite file.
+
+    Every gunicorn worker on the host opens the same file, so a player sees
+    the same game whichever worker handles the request. dumps/loads convert
+    the state object to and from text. A version column, bumped by every
+    write, lets update() refuse to overwrite a session another worker changed.
+    """
+
+    PURGE_EVERY = 500
+
+    def __init__(self, path, dumps, loads, ttl=DEFAULT_TTL_SECONDS):
+        self.path = path
+        self.dumps = dumps
+        self.loads = loads
+        self.ttl = ttl
+        self._local = threading.local()
+        self._writes = 0
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "session_id TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL, "
+                "version INTEGER NOT NULL DEFAULT 0)"
+            )
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(sessions)")]
+            if "version" not in columns:
+                conn.execute("ALTER TABLE sessions ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+            conn.execute("CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions (updated_at)")
+
+    def _connection(self):
+        # sqlite3 connections must not cross threads or forked workers
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, session_id):
+        return self.get_versioned(session_id)[0]
+
+    def get_versioned(self, session_id):
+        row = self._connection().execute(
+            "SELECT data, updated_at, version FROM sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        if row is None:
+            return None, None
+        data, updated_at, version = row
+        if time.time() - updated_at > self.ttl:
+            self.delete(session_id)
+            return None, None
+        return self.loads(data), version
+
+    def set(self, session_id, state):
+        now = time.time()
+        conn = self._connection()
+        conn.execute(
+            "INSERT INTO sessions (session_id, data, updated_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(session_id) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at, "
+            "version = sessions.version + 1",
+            (session_id, self.dumps(state), now),
+        )
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            conn.execute("DELETE FROM sessions WHERE updated_at < ?", (now - self.ttl,))
+
+    def update(self, session_id, version, apply):
+        state, current = self.get_versioned(session_id)
+        if state is None or current != version:
+            return None
+        state = apply(state)
+        if state is None:
+            return None
+        # Compare-and-set: a write from another worker since the read bumped the version
+        cursor = self._connection().execute(
+            "UPDATE sessions SET data = ?, updated_at = ?, version = version + 1 WHERE session_id = ? AND version = ?",
+            (self.dumps(state), time.time(), session_id, version),
+        )
+        return state if cursor.rowcount == 1 else None
+
+    def delete(self, session_id):
+        self._connection().execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+
+def create_session_store(dumps, loads):
+    """Build the store selected by the SESSION_BACKEND environment variable ('memory' or 'sqlite')"""
+    backend = os.getenv("SESSION_BACKEND", "memory").lower()
+    ttl = int(os.getenv("SESSION_TTL_SECONDS", DEFAULT_TTL_SECONDS))
+    if backend == "sqlite":
+        return SQLiteSessionStore(os.getenv("SESSION_DB_PATH", "sessions.db"), dumps, loads, ttl=ttl)
+    if backend == "memory":
+        return MemorySessionStore(max_sessions=int(os.getenv("SESSION_MAX_SESSIONS", 10000)), ttl=ttl)
+    raise ValueError(f"Unknown SESSION_BACKEND '{backend}'")
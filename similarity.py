@@ -1,6 +1,5 @@
 from scorer.similarity_scorer import SimilarityScorer
 import logging
-import random
 
 log = logging.getLogger("contexto")
 
@@ -10,17 +9,17 @@ class TipsService:
     def __init__(self, scorer: SimilarityScorer):
         self.scorer = scorer
 
-    def get_tip(self, today_word: str):
+    def get_tip(self, today_word: str, best_rank: int = None, exclude=()):
         log.info(f"Get tip for {today_word}")
 
-        similar_list = self.scorer.get_similar(today_word)
-        log.info(f"Similar words for word {today_word}: {similar_list}")
+        # The ladder is precomputed once per target word and cached
+        ladder = self.scorer.get_ladder(today_word)
+        hint = ladder.hint(best_rank, exclude)
+        if hint is None:
+            log.info(f"No tip closer than rank {best_rank} for word {today_word}")
+            return None, None
 
-        similar_words = [word for word, score in similar_list]
+        tip, tip_rank, tip_similarity = hint
 
-        tip = random.choice(similar_words)
-
-        tip_similarity = self.scorer.get_similarity(today_word, tip)
-
-        log.info(f"Tip for word {today_word}: Tip: {tip}. Similarity: {tip_similarity}")
-        return tip, tip_similarity
\ No newline at end of file
+        log.info(f"Tip for word {today_word}: Tip: {tip}. Rank: {tip_rank}. Similarity: {tip_similarity}")
+        return tip, tip_similarity
@@ -34,11 +34,21 @@ document.addEventListener('DOMContentLoaded', () => {
     let isHumanTurn = true;
     let gameOver = false;
     let allGuesses = [];
-    let lastAIGuessWord = null;  // Track the last AI guess word
-    let lastHumanGuessWord = null;  // Track the last human guess word
     let thinkingTimer = null;
     let thinkingTime = 0;
     let hintShown = false;
+    // Bumped for every new game, so a poll for an old game's AI turn stops
+    let gameNumber = 0;
+    const AI_POLL_INTERVAL_MS = 1000;
+
+    // Game session: the server keeps each tab's game under this id
+    let sessionId = sessionStorage.getItem('sessionId');
+    if (!sessionId) {
+        sessionId = window.crypto && crypto.randomUUID
+            ? crypto.randomUUID()
+            : `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+        sessionStorage.setItem('sessionId', sessionId);
+    }
 
     // Auth State
     let currentUser = null;
@@ -110,55 +120,50 @@ document.addEventListener('DOMContentLoaded', () => {
         return `${rank.toLocaleString()}`;
     }
 
-    function addGuessToList(word, rank, isAI = false, isCorrect = false) {
-        // Update last guess based on player
-        if (isAI) {
-            lastAIGuessWord = word;
-        } else {
-            lastHumanGuessWord = word;
+    function renderGuess(guess) {
+        const listItem = document.createElement('div');
+        listItem.className = `guess-item ${getRankClass(guess.rank)}`;
+        if (guess.isCorrect) {
+            listItem.classList.add('correct');
+            if (guess.isAI) {
+                listItem.classList.add('target-word');
+            }
         }
         
-        // Add to our guesses array
-        allGuesses.push({ word, rank, isAI, isCorrect });
+        const wordSpan = document.createElement('span');
+        wordSpan.className = 'word';
+        wordSpan.textContent = guess.word;
         
-        // Sort guesses by rank (best to worst)
-        allGuesses.sort((a, b) => a.rank - b.rank);
+        const playerSpan = document.createElement('span');
+        playerSpan.className = `player ${guess.isAI ? 'ai-player' : 'human-player'}`;
+        playerSpan.innerHTML = guess.isAI ? 
+            '<i class="fas fa-robot"></i> AI' : 
+            '<i class="fas fa-user"></i> You';
         
-        // Clear the list
-        guessesList.innerHTML = '';
+        const rankSpan = document.createElement('span');
+        rankSpan.className = 'rank';
+        rankSpan.textContent = formatRank(guess.rank);
         
-        // Rebuild the entire list
-        allGuesses.forEach(guess => {
-            const listItem = document.createElement('div');
-            listItem.className = `guess-item ${getRankClass(guess.rank)}`;
-            if (guess.isCorrect) {
-                listItem.classList.add('correct');
-                if (guess.isAI) {
-                    listItem.classList.add('target-word');
-                }
-            }
-            if (isAI && guess.word === lastAIGuessWord) listItem.classList.add('ai-last-guess');
-            if (!isAI && guess.word === lastHumanGuessWord) listItem.classList.add('human-last-guess');
-            
-            const wordSpan = document.createElement('span');
-            wordSpan.className = 'word';
-            wordSpan.textContent = guess.word;
-            
-            const playerSpan = document.createElement('span');
-            playerSpan.className = `player ${guess.isAI ? 'ai-player' : 'human-player'}`;
-            playerSpan.innerHTML = guess.isAI ? 
-                '<i class="fas fa-robot"></i> AI' : 
-                '<i class="fas fa-user"></i> You';
-            
-            const rankSpan = document.createElement('span');
-            rankSpan.className = 'rank';
-            rankSpan.textContent = formatRank(guess.rank);
+        listItem.appendChild(wordSpan);
+        listItem.appendChild(playerSpan);
+        listItem.appendChild(rankSpan);
+        return listItem;
+    }
+
+    // Insert the rows of a leaderboard delta at the positions the server gives,
+    // instead of re-sorting and rebuilding the whole list
+    function applyLeaderboardDelta(delta, isCorrect = false) {
+        delta.inserted.forEach(row => {
+            const guess = { word: row.word, rank: row.rank, isAI: row.player === 'ai', isCorrect };
+            allGuesses.splice(row.position, 0, guess);
             
-            listItem.appendChild(wordSpan);
-            listItem.appendChild(playerSpan);
-            listItem.appendChild(rankSpan);
+            // Move the last-guess highlight for this player to the new row
+            const lastGuessClass = guess.isAI ? 'ai-last-guess' : 'human-last-guess';
+            guessesList.querySelectorAll(`.${lastGuessClass}`).forEach(item => item.classList.remove(lastGuessClass));
             
-            guessesList.appendChild(listItem);
+            const listItem = renderGuess(guess);
+            listItem.classList.add(lastGuessClass);
+            guessesList.insertBefore(listItem, guessesList.children[row.position] || null);
         });
     }
 
@@ -168,7 +173,8 @@ document.addEventListener('DOMContentLoaded', () => {
             const response = await fetch('/api/start', {
                 method: 'POST',
                 headers: {
-                    'Content-Type': 'application/json'
+                    'Content-Type': 'application/json',
+                    'X-Session-Id': sessionId
                 }
             });
             
@@ -178,6 +184,7 @@ document.addEventListener('DOMContentLoaded', () => {
             }
             
             // Reset game state
+            gameNumber++;
             gameOver = false;
             isHumanTurn = true;
             allGuesses = [];
@@ -253,14 +260,79 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
+    // Read server-sent events from a streamed fetch response (EventSource can only GET)
+    async function* readEvents(response) {
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) return;
+            buffer += decoder.decode(value, { stream: true });
+            
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const block = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+                let event = 'message';
+                const data = [];
+                block.split('\n').forEach(line => {
+                    if (line.startsWith('event:')) event = line.slice(6).trim();
+                    else if (line.startsWith('data:')) data.push(line.slice(5).trim());
+                });
+                // Comment-only blocks are keep-alives
+                if (data.length) yield { event, data: JSON.parse(data.join('\n')) };
+            }
+        }
+    }
+
+    // Wait out an AI turn the guess stream stopped waiting for: poll
+    // /api/ai-guess until the server hands the turn back, then insert the AI's
+    // row from the returned board. Returns the result, or null if a new game
+    // was started meanwhile.
+    async function pollAITurn(turn) {
+        const game = gameNumber;
+        while (true) {
+            await new Promise(resolve => setTimeout(resolve, AI_POLL_INTERVAL_MS));
+            if (game !== gameNumber) return null;
+            let result;
+            try {
+                const response = await fetch(`/api/ai-guess?turn=${turn}`, {
+                    headers: { 'X-Session-Id': sessionId }
+                });
+                result = await response.json();
+            } catch (error) {
+                console.error('Error polling the AI turn:', error);
+                continue;
+            }
+            if (game !== gameNumber) return null;
+            if (result.status === 'pending') continue;
+            if (result.status !== 'success') throw new Error(result.message);
+            
+            const rows = result.leaderboard.leaderboard;
+            const position = rows.findIndex(row => row.player === 'ai' && row.word === result.ai_guess);
+            if (position !== -1) {
+                applyLeaderboardDelta({ inserted: [{ position, ...rows[position] }] },
+                                      result.game_over && result.winner === 'ai');
+            } else if (!result.game_over) {
+                showNotification('The AI could not make a guess', true);
+            }
+            return result;
+        }
+    }
+
     async function makeGuess(word) {
         if (!word || gameOver || !isHumanTurn) return;
+        isHumanTurn = false;  // No second guess while this one is in flight
         
         try {
-            const response = await fetch('/api/guess', {
+            // The server pushes the human's rank as soon as it is scored,
+            // then the AI's guess as soon as its turn finishes
+            const response = await fetch('/api/guess/stream', {
                 method: 'POST',
                 headers: {
-                    'Content-Type': 'application/json'
+                    'Content-Type': 'application/json',
+                    'X-Session-Id': sessionId
                 },
                 body: JSON.stringify({
                     guess: word,
@@ -268,28 +340,36 @@ document.addEventListener('DOMContentLoaded', () => {
                 })
             });
             
-            const data = await response.json();
-            
-            if (data.status === 'error') {
-                showNotification(data.message, true);
-                return;
-            }
-            
-            // Add human guess
-            addGuessToList(word, data.rank, false, data.game_over && data.winner === 'human');
-            
-            // If AI's turn, add delay and show thinking animation
-            if (!data.game_over) {
-                isHumanTurn = false;
-                updateTurnIndicator();
-                
-                // Wait for 3 seconds before showing AI's guess
-                await new Promise(resolve => setTimeout(resolve, 3000));
-                
-                if (data.ai_guess) {
-                    addGuessToList(data.ai_guess, data.ai_rank, true, data.game_over && data.winner === 'ai');
+            let data = null;
+            for await (const { event, data: payload } of readEvents(response)) {
+                if (event === 'guess') {
+                    if (payload.status === 'error') {
+                        isHumanTurn = true;
+                        showNotification(payload.message, true);
+                        return;
+                    }
+                    // Add human guess
+                    applyLeaderboardDelta(payload.leaderboard_delta, payload.game_over && payload.winner === 'human');
+                    guessInput.value = '';
+                    if (payload.ai_pending) {
+                        updateTurnIndicator();  // Show the AI thinking until its guess arrives
+                    }
+                } else if (event === 'ai_guess') {
+                    if (payload.leaderboard_delta) {
+                        applyLeaderboardDelta(payload.leaderboard_delta, payload.game_over && payload.winner === 'ai');
+                    } else if (!payload.game_over) {
+                        showNotification('The AI could not make a guess', true);
+                    }
+                } else if (event === 'timeout') {
+                    // The server still has the AI's turn: keep the board locked until it hands it back
+                    showNotification('The AI is taking a while...', false);
+                    data = await pollAITurn(payload.ai_turn);
+                    if (data === null) return;  // A new game was started meanwhile
+                    break;
                 }
+                data = payload;
             }
+            if (!data) throw new Error('The guess stream ended early');
             
             // Update game state
             gameOver = data.game_over;
@@ -298,7 +378,7 @@ document.addEventListener('DOMContentLoaded', () => {
             // Show game over message if needed
             if (data.game_over) {
                 if (data.winner === 'ai') {
-                    // AI wins animation and message
+                    // AI wins animation and message; its winning guess is already highlighted
                     showNotification(`AI Wins! The word was "${data.target_word}"`, false, 0);
                     const gameContainer = document.querySelector('.game-container');
                     gameContainer.classList.add('ai-wins');
@@ -312,10 +392,7 @@ document.addEventListener('DOMContentLoaded', () => {
                         gameContainer.classList.remove('ai-wins');
                         eyes.forEach(eye => eye.classList.remove('ai-win-eye'));
                     }, 3000);
-
-                    // Add the target word to the list with green highlight
-                    addGuessToList(data.target_word, 1, true, true);
-                } else {
+                } else if (data.winner === 'human') {
                     // Human wins animation and message
                     showNotification('You Won! Congratulations!', false, 0);
                     const gameContainer = document.querySelector('.game-container');
@@ -336,11 +413,12 @@ document.addEventListener('DOMContentLoaded', () => {
             }
             
             updateTurnIndicator();
-            guessInput.value = '';
             
         } catch (error) {
             console.error('Error making guess:', error);
             showNotification('Failed to submit guess', true);
+            isHumanTurn = !gameOver;
+            updateTurnIndicator();
         }
     }
 
@@ -363,7 +441,8 @@ document.addEventListener('DOMContentLoaded', () => {
             const response = await fetch('/api/give-up', {
                 method: 'POST',
                 headers: {
-                    'Content-Type': 'application/json'
+                    'Content-Type': 'application/json',
+                    'X-Session-Id': sessionId
                 },
                 body: JSON.stringify({
                     user_id: currentUser ? currentUser.user_id : null
@@ -399,59 +478,6 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     });
 
-    function handleAIGuess() {
-        if (gameOver || !isHumanTurn) return;
-        
-        fetch('/ai_guess', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json'
-            },
-            body: JSON.stringify({ guesses: allGuesses })
-        })
-        .then(response => response.json())
-        .then(data => {
-            console.log('AI guess response:', data);
-            // Check if AI won
-            if (data.ai_rank === 1 || data.winner === 'ai') {
-                console.log('AI won! Adding animations...');
-                // AI wins animation and message
-                showNotification("AI WINS! The word was: " + data.ai_guess, false, 0);
-                const gameContainer = document.querySelector('.game-container');
-                console.log('Game container:', gameContainer);
-                gameContainer.classList.add('ai-wins');
-                playSound('correctSound');
-                
-                // Add shake animation to eyes
-                const eyes = document.querySelectorAll('.eye');
-                console.log('Eyes elements:', eyes);
-                eyes.forEach(eye => eye.classList.add('ai-win-eye'));
-                
-                setTimeout(() => {
-                    gameContainer.classList.remove('ai-wins');
-                    eyes.forEach(eye => eye.classList.remove('ai-win-eye'));
-                }, 3000);
-                
-                gameOver = true;
-                submitButton.disabled = true;
-                giveUpButton.disabled = true;
-            }
-            
-            if (data.ai_guess && data.ai_rank) {
-                addGuessToList(data.ai_guess, data.ai_rank, true, data.ai_rank === 1);
-            }
-            
-            isHumanTurn = true;
-            updateTurnIndicator();
-        })
-        .catch(error => {
-            console.error('Error:', error);
-            showNotification('Error making AI guess', true);
-            isHumanTurn = true;
-            updateTurnIndicator();
-        });
-    }
-
     function handleSubmit() {
         const word = guessInput.value.trim().toLowerCase();
         if (word) {
@@ -511,18 +537,27 @@ document.addEventListener('DOMContentLoaded', () => {
         guessInput.classList.toggle('thinking');
     }
 
-    // Function to provide a hint based on previous guesses
-    function provideHint() {
+    // Function to provide a hint closer than the best guess so far
+    async function provideHint() {
         if (allGuesses.length === 0) return;
-        
-        // Find the best guess so far
-        const bestGuess = allGuesses.reduce((prev, current) => 
-            prev.rank < current.rank ? prev : current
-        );
-
-        const hintMessage = `💡 Hint: Your closest guess was "${bestGuess.word}" (rank ${bestGuess.rank}). Try thinking of related words!`;
-        showNotification(hintMessage, false, 2000);
         hintShown = true;
+        
+        try {
+            const response = await fetch('/api/hint', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                    'X-Session-Id': sessionId
+                }
+            });
+            const data = await response.json();
+            if (data.status !== 'success') return;
+            
+            const hintMessage = `💡 Hint: "${data.hint}" is ranked ${data.rank.toLocaleString()}. Try thinking of related words!`;
+            showNotification(hintMessage, false, 4000);
+        } catch (error) {
+            console.error('Error fetching hint:', error);
+        }
     }
 
     // Start thinking timer when input is focused
@@ -831,7 +866,8 @@ document.addEventListener('DOMContentLoaded', () => {
             const response = await fetch('/api/set-target-word', {
                 method: 'POST',
                 headers: {
-                    'Content-Type': 'application/json'
+                    'Content-Type': 'application/json',
+                    'X-Session-Id': sessionId
                 },
                 body: JSON.stringify({ index: selectedIndex })
             });
@@ -839,6 +875,7 @@ document.addEventListener('DOMContentLoaded', () => {
             const data = await response.json();
             if (data.success) {
                 // Reset game state
+                gameNumber++;
                 gameOver = false;
                 isHumanTurn = true;
                 allGuesses = [];  // Clear all guesses
@@ -0,0 +1,564 @@
+import heapq
+import os
+import random
+import time
+import uuid
+import zlib
+from datetime import datetime
+
+import bcrypt
+from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError, ParamValidationError
+
+from aws_clients import get_dynamodb
+from metrics import histogram
+
+USERS_TABLE = 'ContextoUsers'
+GAME_HISTORY_TABLE = 'ContextoGameHistory'
+USER_STATS_TABLE = 'ContextoUserStats'   # one aggregate item per user, updated as games are saved
+DAILY_LEADERBOARD_TABLE = 'ContextoDailyLeaderboard'  # per-day rankings of solved games, see below
+
+# Global secondary indexes (created by dynamodb.py)
+USER_ID_INDEX = 'UserIdIndex'      # ContextoGameHistory: user_id + played_at
+USERNAME_INDEX = 'UsernameIndex'   # ContextoUsers: username
+EMAIL_INDEX = 'EmailIndex'         # ContextoUsers: email
+
+# Wall time of each storage call, including SDK retries (and bcrypt for create_user/verify_user)
+DYNAMODB_SECONDS = histogram(
+    'contexto_dynamodb_seconds', 'Time spent in DynamoDB storage calls, by function', ['operation']
+)
+
+
+def query_pages(table, **kwargs):
+    """Yield the items of a query, following LastEvaluatedKey across pages"""
+    while True:
+        response = table.query(**kwargs)
+        yield from response['Items']
+        last_key = response.get('LastEvaluatedKey')
+        if not last_key:
+            return
+        kwargs['ExclusiveStartKey'] = last_key
+
+def find_user_by(table, index_name, attribute, value):
+    """Return the first user whose attribute equals value, using that attribute's GSI"""
+    for user in query_pages(table, IndexName=index_name, KeyConditionExpression=Key(attribute).eq(value), Limit=1):
+        return user
+    return None
+
+def is_condition_failure(error):
+    return error.response['Error']['Code'] == 'ConditionalCheckFailedException'
+
+# DynamoDB errors that reject the request itself, so repeating it cannot succeed
+PERMANENT_ERROR_CODES = {'ValidationException', 'SerializationException', 'ItemCollectionSizeLimitExceededException'}
+
+def is_retryable_error(error):
+    """Whether a failed write may succeed if repeated: throttling, timeouts, conflicts
+    and service errors may, a malformed request or an unserializable item may not"""
+    if isinstance(error, ClientError):
+        return error.response['Error']['Code'] not in PERMANENT_ERROR_CODES
+    return not isinstance(error, (ParamValidationError, TypeError, ValueError, KeyError))
+
+# Per-user stats aggregate
+def add_game_to_stats(user_id, guesses_count, final_rank, completed):
+    """Count one game in the user's aggregate. Returns False if the user has no aggregate yet."""
+    table = get_dynamodb().Table(USER_STATS_TABLE)
+    try:
+        response = table.update_item(
+            Key={'user_id': user_id},
+            UpdateExpression='ADD total_games :one, completed_games :completed, total_guesses :guesses',
+            ConditionExpression='attribute_exists(user_id)',
+            ExpressionAttributeValues={
+                ':one': 1,
+                ':completed': 1 if completed else 0,
+                ':guesses': guesses_count
+            },
+            ReturnValues='ALL_NEW'
+        )
+    except ClientError as e:
+        if is_condition_failure(e):
+            return False
+        raise
+
+    # Only write best_rank when this game beats it; the condition keeps
+    # concurrent saves from replacing a better rank with a worse one
+    best_rank = response['Attributes'].get('best_rank')
+    if final_rank is not None and (best_rank is None or final_rank < best_rank):
+        try:
+            table.update_item(
+                Key={'user_id': user_id},
+                UpdateExpression='SET best_rank = :rank',
+                ConditionExpression='attribute_not_exists(best_rank) OR best_rank > :rank',
+                ExpressionAttributeValues={':rank': final_rank}
+            )
+        except ClientError as e:
+            if not is_condition_failure(e):
+                raise
+    return True
+
+def rebuild_user_stats(user_id, exclude_game_ids=()):
+    """Create a user's aggregate from their full game history and return it.
+
+    Used for users who played before the aggregate existed. Games in
+    exclude_game_ids are left out so the caller can add them itself. If
+    another request creates the aggregate first, that item is returned instead.
+    """
+    games = query_pages(get_dynamodb().Table(GAME_HISTORY_TABLE),
+        IndexName=USER_ID_INDEX,
+        KeyConditionExpression=Key('user_id').eq(user_id),
+        ProjectionExpression='game_id, completed, final_rank, guesses_count'
+    )
+    games = [game for game in games if game['game_id'] not in exclude_game_ids]
+    item = {'user_id': user_id, 'total_games': 0, 'completed_games': 0, 'total_guesses': 0}
+    for game in games:
+        item['total_games'] += 1
+        item['completed_games'] += 1 if game.get('completed', False) else 0
+        item['total_guesses'] += game.get('guesses_count', 0)
+        if game.get('final_rank') is not None:
+            item['best_rank'] = min(game['final_rank'], item.get('best_rank', game['final_rank']))
+
+    table = get_dynamodb().Table(USER_STATS_TABLE)
+    try:
+        table.put_item(Item=item, ConditionExpression='attribute_not_exists(user_id)')
+    except ClientError as e:
+        if not is_condition_failure(e):
+            raise
+        return table.get_item(Key={'user_id': user_id})['Item']
+    return item
+
+# Game history functions
+def game_history_item(user_id, target_word, guesses_count, final_rank, time_taken, completed=True):
+    return {
+        'game_id': str(uuid.uuid4()),
+        'user_id': user_id,
+        'target_word': target_word,
+        'guesses_count': guesses_count,
+        'final_rank': final_rank,
+        'played_at': int(time.time()),
+        'completed': completed,
+        'time_taken': time_taken
+    }
+
+def apply_game_to_stats(game_item, unapplied_game_ids=None):
+    """Count a saved game in its user's stats.
+
+    unapplied_game_ids are saved games, including this one, that have not
+    been counted yet; a missing aggregate is rebuilt without them.
+    """
+    args = (game_item['user_id'], game_item['guesses_count'], game_item['final_rank'], game_item['completed'])
+    if not add_game_to_stats(*args):
+        rebuild_user_stats(game_item['user_id'], unapplied_game_ids or {game_item['game_id']})
+        add_game_to_stats(*args)
+
+@DYNAMODB_SECONDS.timed('save_game_history')
+def save_game_history(user_id, target_word, guesses_count, final_rank, time_taken, completed=True):
+    try:
+        table = get_dynamodb().Table(GAME_HISTORY_TABLE)
+        game_item = game_history_item(user_id, target_word, guesses_count, final_rank, time_taken, completed)
+        
+        table.put_item(Item=game_item)
+        apply_game_to_stats(game_item)
+        return True, "Game history saved successfully"
+        
+    except Exception as e:
+        print(f"Error saving game history: {e}")
+        return False, str(e)
+
+@DYNAMODB_SECONDS.timed('write_game_history_batch')
+def write_game_history_batch(records):
+    """Write queued history records (see history_queue.py).
+
+    Each record is {'game': item} plus 'saved': True once the item itself has
+    been written and 'counted': True once it is in its user's stats. Items
+    are put in one batch, then counted in their users' stats and put on the
+    daily leaderboard. Records only come from games played out on the server
+    (queue_game_history in app.py), which is what makes them safe to rank;
+    save_game_history, fed by clients, stays off the leaderboard. Returns the records whose updates failed, marked with
+    the steps already done so a retry does not repeat them, and with
+    'retryable': False if the error means a retry would fail the same way;
+    raises if the batch write fails.
+    """
+    unsaved = [record['game'] for record in records if not record.get('saved')]
+    if unsaved:
+        with get_dynamodb().Table(GAME_HISTORY_TABLE).batch_writer(overwrite_by_pkeys=['game_id', 'user_id']) as batch:
+            for game_item in unsaved:
+                batch.put_item(Item=game_item)
+    
+    failed = []
+    unapplied = {record['game']['game_id'] for record in records if not record.get('counted')}
+    for record in records:
+        done = {**record, 'saved': True, 'counted': record.get('counted', False)}
+        try:
+            if not done['counted']:
+                apply_game_to_stats(record['game'], unapplied)
+                unapplied.discard(record['game']['game_id'])
+                done['counted'] = True
+            # Idempotent, so it is safe to repeat after a partial failure
+            record_daily_result(record['game'])
+        except Exception as e:
+            print(f"Error updating stats for game {record['game']['game_id']}: {e}")
+            done['retryable'] = is_retryable_error(e)
+            failed.append(done)
+    return failed
+
+# Daily leaderboard
+#
+# ContextoDailyLeaderboard has a string partition key `pk` and sort key `sk`.
+# Each day has a separate board for every target word played that day
+# (players can pick their own word), and each board holds three kinds of item,
+# with {board} = {day}#{target_word}:
+#
+#   {board}#entries#{shard} / {guesses}#{time}#{user_id}
+#       A user's best solve of the day. Sort keys are zero padded, so a query
+#       returns each shard's entries best first. Users are spread over
+#       DAILY_LEADERBOARD_SHARDS partitions by a hash of their id, which keeps
+#       thousands of simultaneous finishers off a single hot key.
+#   {board}#user#{user_id} / best
+#       Points at the user's entry, so a better solve replaces it and a
+#       replayed save is a no-op.
+#   {board}#counts#{shard} / counts
+#       Counters added to on a random shard: `players`, and `g{n}` for the
+#       number of players whose best solve took n guesses.
+#
+# Top-K merges the first K entries of every shard. A player's rank is the
+# number of players with fewer guesses, from the counters, plus a COUNT
+# query over their own guess count's key range, so neither scans the board.
+# Only games the server saw won are recorded (see write_game_history_batch);
+# results posted to /api/save_game are never ranked. Items expire DAILY_LEADERBOARD_TTL_DAYS after the game.
+DAILY_LEADERBOARD_SHARDS = int(os.getenv('DAILY_LEADERBOARD_SHARDS', 10))
+DAILY_LEADERBOARD_TTL_DAYS = int(os.getenv('DAILY_LEADERBOARD_TTL_DAYS', 8))
+DAILY_LEADERBOARD_ATTEMPTS = 5
+
+def leaderboard_day(timestamp=None):
+    """The game day of a unix timestamp (now by default), on the server's calendar like the daily word"""
+    return (datetime.fromtimestamp(timestamp) if timestamp is not None else datetime.now()).date().isoformat()
+
+def daily_board(day, target_word):
+    """Key prefix of one day's leaderboard for one target word"""
+    return f"{day}#{target_word}"
+
+def leaderboard_score(guesses_count, time_taken, user_id):
+    # Fewer guesses first, then faster, then user id so every key is unique
+    return f"{int(guesses_count):06d}#{max(0, int(time_taken)):08d}#{user_id}"
+
+def entry_shard(user_id):
+    return zlib.crc32(user_id.encode('utf-8')) % DAILY_LEADERBOARD_SHARDS
+
+@DYNAMODB_SECONDS.timed('record_daily_result')
+def record_daily_result(game_item):
+    """Put a solved game on its day's leaderboard for its word if it is the user's best there.
+
+    The pointer, the entries and the counters change in one transaction,
+    conditional on the pointer still holding what was read, and the
+    transaction is retried if another save got in first. Returns True if
+    the leaderboard changed; unsolved games, worse results and replays of
+    the same game return False.
+    """
+    if not game_item.get('completed'):
+        return False
+    user_id = game_item['user_id']
+    board = daily_board(leaderboard_day(game_item['played_at']), game_item['target_word'])
+    guesses_count = int(game_item['guesses_count'])
+    time_taken = int(game_item.get('time_taken') or 0)
+    score = leaderboard_score(guesses_count, time_taken, user_id)
+    shard = entry_shard(user_id)
+    expires_at = int(game_item['played_at']) + DAILY_LEADERBOARD_TTL_DAYS * 86400
+
+    table = get_dynamodb().Table(DAILY_LEADERBOARD_TABLE)
+    client = get_dynamodb().meta.client  # takes plain Python values, like the Table methods
+    pointer_key = {'pk': f"{board}#user#{user_id}", 'sk': 'best'}
+    for attempt in range(DAILY_LEADERBOARD_ATTEMPTS):
+        previous = table.get_item(Key=pointer_key, ConsistentRead=True).get('Item')
+        if previous is not None and previous['score'] <= score:
+            return False
+
+        pointer = {**pointer_key, 'score': score, 'shard': shard, 'guesses_count': guesses_count,
+                   'time_taken': time_taken, 'expires_at': expires_at}
+        if previous is None:
+            pointer_put = {'ConditionExpression': 'attribute_not_exists(pk)'}
+        else:
+            pointer_put = {'ConditionExpression': 'score = :previous',
+                           'ExpressionAttributeValues': {':previous': previous['score']}}
+        entry = {'pk': f"{board}#entries#{shard}", 'sk': score, 'user_id': user_id, 'guesses_count': guesses_count,
+                 'time_taken': time_taken, 'played_at': int(game_item['played_at']), 'expires_at': expires_at}
+        actions = [
+            {'Put': {'TableName': DAILY_LEADERBOARD_TABLE, 'Item': pointer, **pointer_put}},
+            {'Put': {'TableName': DAILY_LEADERBOARD_TABLE, 'Item': entry}},
+        ]
+
+        counts = {f"g{guesses_count}": 1}
+        if previous is None:
+            counts['players'] = 1
+        else:
+            actions.append({'Delete': {'TableName': DAILY_LEADERBOARD_TABLE, 'Key': {
+                'pk': f"{board}#entries#{int(previous['shard'])}", 'sk': previous['score']}}})
+            old_bucket = f"g{int(previous['guesses_count'])}"
+            counts[old_bucket] = counts.get(old_bucket, 0) - 1
+        counts = {name: delta for name, delta in counts.items() if delta}
+        if counts:
+            names = {f"#c{i}": name for i, name in enumerate(counts)}
+            actions.append({'Update': {
+                'TableName': DAILY_LEADERBOARD_TABLE,
+                'Key': {'pk': f"{board}#counts#{random.randrange(DAILY_LEADERBOARD_SHARDS)}", 'sk': 'counts'},
+                'UpdateExpression': 'ADD ' + ', '.join(f"{alias} :d{i}" for i, alias in enumerate(names)),
+                'ExpressionAttributeNames': names,
+                'ExpressionAttributeValues': {f":d{i}": delta for i, delta in enumerate(counts.values())},
+            }})
+
+        try:
+            client.transact_write_items(TransactItems=actions)
+            return True
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'TransactionCanceledException':
+                raise
+            # The pointer changed under us, or the counter shard was busy: read again and retry
+            time.sleep(random.uniform(0, 0.02 * (attempt + 1)))
+    raise RuntimeError(f"Could not update the {board} leaderboard for user {user_id}")
+
+def _daily_counts(board):
+    """Sum a board's counter shards into {'players': n, guesses_count: players, ...}"""
+    keys = [{'pk': f"{board}#counts#{shard}", 'sk': 'counts'} for shard in range(DAILY_LEADERBOARD_SHARDS)]
+    totals = {'players': 0}
+    resource = get_dynamodb()
+    for start in range(0, len(keys), 100):
+        request = {DAILY_LEADERBOARD_TABLE: {'Keys': keys[start:start + 100]}}
+        while request:
+            response = resource.batch_get_item(RequestItems=request)
+            for item in response['Responses'].get(DAILY_LEADERBOARD_TABLE, []):
+                for name, value in item.items():
+                    if name == 'players':
+                        totals['players'] += int(value)
+                    elif name.startswith('g') and name[1:].isdigit():
+                        totals[int(name[1:])] = totals.get(int(name[1:]), 0) + int(value)
+            request = response.get('UnprocessedKeys')
+    return totals
+
+@DYNAMODB_SECONDS.timed('get_daily_player_count')
+def get_daily_player_count(target_word, day=None):
+    """Number of players who solved target_word on the day (today by default)"""
+    try:
+        return True, _daily_counts(daily_board(day or leaderboard_day(), target_word))['players']
+    except Exception as e:
+        print(f"Error retrieving daily player count: {e}")
+        return False, str(e)
+
+def _usernames(user_ids):
+    user_ids = list(dict.fromkeys(user_ids))
+    names = {}
+    resource = get_dynamodb()
+    for start in range(0, len(user_ids), 100):
+        request = {USERS_TABLE: {'Keys': [{'user_id': user_id} for user_id in user_ids[start:start + 100]],
+                                 'ProjectionExpression': 'user_id, username'}}
+        while request:
+            response = resource.batch_get_item(RequestItems=request)
+            for item in response['Responses'].get(USERS_TABLE, []):
+                names[item['user_id']] = item.get('username')
+            request = response.get('UnprocessedKeys')
+    return names
+
+def _daily_rank(table, board, pointer, counts):
+    guesses_count = int(pointer['guesses_count'])
+    better = sum(players for bucket, players in counts.items() if bucket != 'players' and bucket < guesses_count)
+    # Players with the same guess count who were at least as fast, this player included
+    same = 0
+    for shard in range(DAILY_LEADERBOARD_SHARDS):
+        kwargs = {'KeyConditionExpression': Key('pk').eq(f"{board}#entries#{shard}") &
+                  Key('sk').between(f"{guesses_count:06d}#", pointer['score']), 'Select': 'COUNT'}
+        while True:
+            response = table.query(**kwargs)
+            same += response['Count']
+            if not response.get('LastEvaluatedKey'):
+                break
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    return better + same
+
+@DYNAMODB_SECONDS.timed('get_daily_leaderboard')
+def get_daily_leaderboard(target_word, day=None, limit=10, user_id=None):
+    """The top `limit` players on target_word that day, the number of players, and user_id's own entry and rank"""
+    try:
+        day = day or leaderboard_day()
+        board = daily_board(day, target_word)
+        table = get_dynamodb().Table(DAILY_LEADERBOARD_TABLE)
+
+        # Each shard is sorted best first, so the top K is within every shard's first K
+        shards = [
+            table.query(KeyConditionExpression=Key('pk').eq(f"{board}#entries#{shard}"), Limit=limit)['Items']
+            for shard in range(DAILY_LEADERBOARD_SHARDS)
+        ] if limit > 0 else []
+        top = list(heapq.merge(*shards, key=lambda entry: entry['sk']))[:limit]
+        names = _usernames([entry['user_id'] for entry in top]) if top else {}
+        leaderboard = [{
+            'rank': position,
+            'user_id': entry['user_id'],
+            'username': names.get(entry['user_id']),
+            'guesses_count': int(entry['guesses_count']),
+            'time_taken': int(entry['time_taken'])
+        } for position, entry in enumerate(top, start=1)]
+
+        counts = _daily_counts(board)
+        player = None
+        if user_id:
+            pointer = table.get_item(Key={'pk': f"{board}#user#{user_id}", 'sk': 'best'}).get('Item')
+            if pointer is not None:
+                player = {
+                    'rank': _daily_rank(table, board, pointer, counts),
+                    'guesses_count': int(pointer['guesses_count']),
+                    'time_taken': int(pointer['time_taken'])
+                }
+
+        return True, {'day': day, 'target_word': target_word, 'leaderboard': leaderboard, 'totalPlayers': counts['players'], 'player': player}
+
+    except Exception as e:
+        print(f"Error retrieving daily leaderboard: {e}")
+        return False, str(e)
+
+@DYNAMODB_SECONDS.timed('get_user_game_history')
+def get_user_game_history(user_id, limit=10):
+    try:
+        table = get_dynamodb().Table(GAME_HISTORY_TABLE)
+        
+        # Newest games first from the user's partition of UserIdIndex
+        items = []
+        for item in query_pages(table,
+                IndexName=USER_ID_INDEX,
+                KeyConditionExpression=Key('user_id').eq(user_id),
+                ScanIndexForward=False,
+                Limit=limit):
+            items.append(item)
+            if len(items) >= limit:
+                break
+        
+        return True, items
+        
+    except Exception as e:
+        print(f"Error retrieving game history: {e}")
+        return False, str(e)
+
+@DYNAMODB_SECONDS.timed('get_user_stats')
+def get_user_stats(user_id):
+    try:
+        table = get_dynamodb().Table(USER_STATS_TABLE)
+        
+        # One read of the user's aggregate, however many games they have played
+        item = table.get_item(Key={'user_id': user_id}).get('Item')
+        if item is None:
+            item = rebuild_user_stats(user_id)
+        
+        total_games = int(item.get('total_games', 0))
+        completed_games = int(item.get('completed_games', 0))
+        best_rank = item.get('best_rank')
+        
+        stats = {
+            'total_games': total_games,
+            'completed_games': completed_games,
+            'completion_rate': (completed_games / total_games * 100) if total_games > 0 else 0,
+            'best_rank': int(best_rank) if best_rank is not None else None,
+            'average_guesses': round(int(item.get('total_guesses', 0)) / total_games, 1) if total_games > 0 else 0
+        }
+        
+        return True, stats
+        
+    except Exception as e:
+        print(f"Error retrieving user stats: {e}")
+        return False, str(e)
+
+# User management functions
+@DYNAMODB_SECONDS.timed('create_user')
+def create_user(username, email, password):
+    try:
+        table = get_dynamodb().Table(USERS_TABLE)
+        
+        # Check if username already exists
+        if find_user_by(table, USERNAME_INDEX, 'username', username):
+            return False, "Username already exists"
+            
+        # Check if email already exists
+        if find_user_by(table, EMAIL_INDEX, 'email', email):
+            return False, "Email already exists"
+        
+        # Hash password
+        password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+        
+        # Create user
+        user_id = str(uuid.uuid4())
+        timestamp = int(time.time())
+        
+        user_item = {
+            'user_id': user_id,
+            'username': username,
+            'email': email,
+            'password_hash': password_hash.decode('utf-8'),
+            'created_at': timestamp,
+            'last_login': timestamp,
+            'games_played': 0,
+            'best_score': 0
+        }
+        
+        table.put_item(Item=user_item)
+        get_dynamodb().Table(USER_STATS_TABLE).put_item(Item={
+            'user_id': user_id,
+            'total_games': 0,
+            'completed_games': 0,
+            'total_guesses': 0
+        })
+        return True, "User created successfully"
+        
+    except Exception as e:
+        print(f"Error creating user: {e}")
+        return False, str(e)
+
+@DYNAMODB_SECONDS.timed('verify_user')
+def verify_user(username, password):
+    try:
+        table = get_dynamodb().Table(USERS_TABLE)
+        
+        # Get user by username
+        user = find_user_by(table, USERNAME_INDEX, 'username', username)
+        
+        if user is None:
+            return False, "User not found"
+        
+        # Verify password
+        if bcrypt.checkpw(password.encode('utf-8'), user['password_hash'].encode('utf-8')):
+            # Update last login
+            table.update_item(
+                Key={'user_id': user['user_id']},
+                UpdateExpression='SET last_login = :timestamp',
+                ExpressionAttributeValues={':timestamp': int(time.time())}
+            )
+            return True, user
+        else:
+            return False, "Invalid password"
+            
+    except Exception as e:
+        print(f"Error verifying user: {e}")
+        return False, str(e)
+
+@DYNAMODB_SECONDS.timed('update_user_stats')
+def update_user_stats(user_id, score):
+    try:
+        table = get_dynamodb().Table(USERS_TABLE)
+        
+        # Get current user stats
+        response = table.get_item(
+            Key={'user_id': user_id}
+        )
+        
+        if 'Item' not in response:
+            return False, "User not found"
+            
+        user = response['Item']
+        
+        # Update stats
+        table.update_item(
+            Key={'user_id': user_id},
+            UpdateExpression='SET games_played = games_played + :inc, best_score = :score',
+            ExpressionAttributeValues={
+                ':inc': 1,
+                ':score': min(score, user.get('best_score', float('inf'))) if user.get('best_score') else score
+            }
+        )
+        return True, "Stats updated successfully"
+        
+    except Exception as e:
+        print(f"Error updating user stats: {e}")
+        return False, str(e)
@@ -0,0 +1,98 @@
+import os
+import threading
+import time
+
+
+class Lazy:
+    """A resource built on first use, once per process.
+
+    Concurrent callers wait for the one build in progress instead of
+    starting their own. A failed build is remembered for `status()` and
+    retried on the next `get()`. A build that was running when gunicorn
+    forked never finishes in the child, so each process tracks its own.
+    """
+
+    def __init__(self, name, factory):
+        self.name = name
+        self._factory = factory
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._value = None
+        self._ready = False
+        self._seconds = None
+        self._error = None
+
+    def _reset_for_pid(self):
+        # A lock held by a thread of the parent stays held in the child
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._lock = threading.Lock()
+
+    def get(self):
+        if self._ready:
+            return self._value
+        self._reset_for_pid()
+        with self._lock:
+            if not self._ready:
+                start = time.perf_counter()
+                try:
+                    self._value = self._factory()
+                except Exception as e:
+                    self._error = f"{type(e).__name__}: {e}"
+                    raise
+                self._seconds = time.perf_counter() - start
+                self._error = None
+                self._ready = True
+        return self._value
+
+    @property
+    def ready(self):
+        return self._ready
+
+    def status(self):
+        return {
+            'ready': self._ready,
+            'seconds': round(self._seconds, 3) if self._seconds is not None else None,
+            'error': self._error
+        }
+
+
+class Warmup:
+    """Builds Lazy resources on a background thread, so the first requests don't pay for them.
+
+    `required` resources decide readiness (the /readyz endpoint); optional
+    ones are warmed the same way but a failure only shows in the status.
+    Started per process: a thread started before a gunicorn fork does not
+    run in the workers.
+    """
+
+    def __init__(self, required=(), optional=()):
+        self.required = list(required)
+        self.optional = list(optional)
+        self._pid = None
+
+    def start(self):
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        threading.Thread(target=self._run, name='warmup', daemon=True).start()
+
+    def _run(self):
+        for resource in self.required + self.optional:
+            try:
+                resource.get()
+            except Exception as e:
+                print(f"Warm-up of {resource.name} failed: {e}")
+
+    @property
+    def ready(self):
+        return all(resource.ready for resource in self.required)
+
+    def status(self):
+        return {
+            'ready': self.ready,
+            'resources': {
+                resource.name: dict(resource.status(), required=resource in self.required)
+                for resource in self.required + self.optional
+            }
+        }